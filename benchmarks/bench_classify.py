@@ -0,0 +1,84 @@
+#!/usr/bin/python3
+"""Show that file classification scales linearly with the number of files.
+
+Builds the validation job list for 1k to 100k synthetic paths, with the
+classification index and, up to 10k files, with the list-based
+`sort_files` it replaced.
+
+Usage: python3 benchmarks/bench_classify.py
+"""
+
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from enki_files_validator import classify_files
+
+
+PREFIXES = ['assembly_', 'proc_', 'con_', 'ref_', 'snip_', '']
+
+# the list-based classification is quadratic; stop measuring it here
+LIST_LIMIT = 10000
+
+
+def synthetic_paths(count: int) -> list[str]:
+    return [f'/docs/dir{i % 100}/{PREFIXES[i % len(PREFIXES)]}file{i}.adoc' for i in range(count)]
+
+
+def sort_files(files: list[str]) -> tuple[list[str], list[str], list[str]]:
+    """The list-based classification used before the index."""
+    prefix_assemblies = []
+    prefix_modules = []
+    undefined_content = []
+
+    for file in files:
+        file_name = os.path.basename(file)
+        if file_name.startswith('assembly'):
+            prefix_assemblies.append(file)
+        elif file_name.startswith(("proc_", "con_", "ref_", "proc-", "con-", "ref-")):
+            prefix_modules.append(file)
+        else:
+            undefined_content.append(file)
+
+    return prefix_assemblies, prefix_modules, undefined_content
+
+
+def list_jobs(files: list[str]) -> list[str]:
+    prefix_assemblies, prefix_modules, undefined_content = sort_files(files)
+    kinds = []
+    for path in files:
+        if path in undefined_content:
+            kinds.append('undefined')
+        elif path in prefix_assemblies:
+            kinds.append('assembly')
+        elif path in prefix_modules:
+            kinds.append('module')
+    return kinds
+
+
+def index_jobs(files: list[str]) -> list[object]:
+    file_kinds = classify_files(files)
+    return [file_kinds[path] for path in files]
+
+
+def measure(function, files: list[str]) -> float:
+    start = time.perf_counter()
+    function(files)
+    return time.perf_counter() - start
+
+
+def main() -> None:
+    print(f"{'files':>8}{'index (ms)':>14}{'us/file':>10}{'lists (ms)':>14}")
+    for count in [1000, 10000, 100000]:
+        files = synthetic_paths(count)
+        index_time = measure(index_jobs, files)
+        line = f'{count:>8}{index_time * 1000:>14.2f}{index_time / count * 1e6:>10.2f}'
+        if count <= LIST_LIMIT:
+            line += f'{measure(list_jobs, files) * 1000:>14.2f}'
+        print(line)
+
+
+if __name__ == '__main__':
+    main()
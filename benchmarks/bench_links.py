@@ -0,0 +1,76 @@
+#!/usr/bin/python3
+"""Compare the Python link extractor with the Asciidoctor conversion in lcheck.rb.
+
+Extracts the links of a synthetic book with both, when the asciidoctor gem
+is installed, and prints the times and the links that only one finds.
+Then extracts the links of books that share all their files, to show
+that shared files are parsed once per run.
+
+Usage: python3 benchmarks/bench_links.py [SIZE]
+"""
+
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from corpus import generate_corpus
+from enki_link_extractor import extract_links
+
+
+# books that include the same assemblies
+BOOKS = 20
+
+LCHECK_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src', 'lcheck.rb')
+
+
+def asciidoctor_links(master_adoc: str) -> set[str]:
+    result = subprocess.run(['ruby', LCHECK_PATH, master_adoc], capture_output=True, text=True, check=True)
+    return set(json.loads(result.stdout)['links'])
+
+
+def main() -> None:
+    size = sys.argv[1] if len(sys.argv) > 1 else 'medium'
+
+    with tempfile.TemporaryDirectory() as root:
+        # without defects, so that no unterminated conditional hides the rest of the book
+        paths = generate_corpus(root, size, defect_rate=0)
+        master_adoc = os.path.join(root, 'master.adoc')
+
+        start = time.perf_counter()
+        links, files = extract_links([master_adoc])
+        python_time = time.perf_counter() - start
+        print(f'{len(paths)} files, {files} read, {len(links)} links')
+        print(f'python:      {python_time * 1000:>10.1f} ms')
+
+        books = []
+        for i in range(BOOKS):
+            book = os.path.join(root, f'book{i}', 'master.adoc')
+            os.makedirs(os.path.dirname(book))
+            with open(os.path.join(root, 'master.adoc')) as source, open(book, 'w') as file:
+                file.write(source.read().replace('include::', 'include::../'))
+            books.append(book)
+
+        start = time.perf_counter()
+        extract_links(books)
+        print(f'python, {BOOKS} books sharing their files: {(time.perf_counter() - start) * 1000:>10.1f} ms')
+
+        try:
+            start = time.perf_counter()
+            reference = asciidoctor_links(master_adoc)
+            ruby_time = time.perf_counter() - start
+        except (OSError, subprocess.CalledProcessError) as e:
+            print(f'asciidoctor: not available ({getattr(e, "stderr", None) or e})'.strip())
+            return
+
+        print(f'asciidoctor: {ruby_time * 1000:>10.1f} ms ({ruby_time / python_time:.0f}x slower)')
+        print(f'only python:      {sorted(set(links) - reference)}')
+        print(f'only asciidoctor: {sorted(reference - set(links))}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,102 @@
+#!/usr/bin/python3
+"""Compare the memory of Report with the dict of lists that it replaced.
+
+Builds the report of a merge of many repositories from findings read as
+JSON, as `enki merge` reads partial reports, so that no two findings
+share a string object. Prints the memory that each structure holds and
+the time to build it.
+
+Usage: python3 benchmarks/bench_report_memory.py [FINDINGS]
+"""
+
+import json
+import os
+import sys
+import time
+import tracemalloc
+from typing import Callable, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from enki_msg import Report
+
+
+CATEGORIES = [
+    'Mentions of sudo access', 'Words such as master, slave, whitelist, blacklist', 'Vanilla xrefs',
+    '"Related information" section', 'Path-based xref', 'Unterminated conditional statement',
+    'More than 1/3 of the lines are comments. Too many comments', 'No empty line after the include statement',
+]
+
+# findings in each file
+FINDINGS_PER_FILE = 4
+
+REPOSITORIES = 200
+
+
+class DictReport():
+    """The layout of Report before findings were stored as columns."""
+
+    def __init__(self):
+        self.report: dict[str, list[str]] = {}
+        self.locations: dict[str, list[Optional[tuple[int, int]]]] = {}
+        self.count = 0
+
+    def create_report(self, category: str, file_path: str, location: Optional[tuple[int, int]] = None) -> None:
+        self.count += 1
+        if not category in self.report:
+            self.report[category] = []
+            self.locations[category] = []
+        self.report[category].append(file_path)
+        self.locations[category].append(location)
+
+
+def partial_reports(findings: int) -> str:
+    """Return the findings of all repositories as JSON `[category, file, line, column]` lists."""
+    results = []
+    for i in range(findings):
+        file_number = i // FINDINGS_PER_FILE
+        repository = file_number % REPOSITORIES
+        file_path = f'repository-{repository}/modules/networking/con_configuring-interface-{file_number}.adoc'
+        results.append([CATEGORIES[i % len(CATEGORIES)], file_path, i % 500 + 1, i % 40 + 1])
+    return json.dumps(results)
+
+
+def measure(build: Callable[[list], object], data: str) -> tuple[float, int]:
+    """Return the seconds to build a report from the findings and the bytes that it holds.
+
+    The findings are read again, so that the report holds its own strings,
+    and freed before measuring, so that only what the report keeps counts.
+    """
+    tracemalloc.start()
+    results = json.loads(data)
+    start = time.perf_counter()
+    report = build(results)
+    seconds = time.perf_counter() - start
+    del results
+    size = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del report
+    return seconds, size
+
+
+def build(report_class: type) -> Callable[[list], object]:
+    def run(results: list) -> object:
+        report = report_class()
+        for category, file_path, line, column in results:
+            report.create_report(category, file_path, (line, column))
+        return report
+    return run
+
+
+def main() -> None:
+    findings = int(sys.argv[1]) if len(sys.argv) > 1 else 500_000
+    data = partial_reports(findings)
+
+    print(f'{findings} findings in {findings // FINDINGS_PER_FILE} files')
+    for name, report_class in [('dict of lists', DictReport), ('columns', Report)]:
+        seconds, size = measure(build(report_class), data)
+        print(f'{name:<15} {size / 1024 / 1024:>8.1f} MB {seconds:>8.2f} s')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/python3
+"""Time the startup of enki and a single-file run against a latency budget.
+
+Pre-commit hooks and editors run enki on one file at a time, so the time
+to import the modules is most of the time of a run. Prints the best time
+to import enki and to validate one file in a new process, and the slowest
+imports, and exits with an error if the run takes longer than the budget.
+
+The run is timed as users run it, with the result cache, in a cache
+directory that is filled with as many entries as a large repository
+leaves behind. The time without the cache is printed for comparison.
+
+Usage: python3 benchmarks/bench_startup.py [--budget SECONDS] [--repeat N] [--cache-entries N]
+"""
+
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from enki_cache import ResultCache
+
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+
+FIXTURE = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'tests', 'fixtures', 'few-comments.adoc')
+
+# Seconds that a single-file `enki --oneline` run may take, including the interpreter startup
+DEFAULT_BUDGET = 0.2
+
+# Imports listed by -X importtime
+SLOWEST_IMPORTS = 10
+
+# Entries in the result cache of the timed run, about what the large corpus leaves behind
+DEFAULT_CACHE_ENTRIES = 40000
+
+
+def best_time(command: list[str], repeat: int) -> float:
+    """Return the shortest wall time of a command."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(command, cwd=SRC_DIR, capture_output=True)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def fill_cache(cache_dir: str, entries: int) -> None:
+    """Fill a result cache with entries of other files, like earlier runs leave behind."""
+    cache = ResultCache(cache_dir)
+    for i in range(entries):
+        key = cache.key(f'= File {i}\n', f'modules/con_{i}.adoc', 'module', True)
+        cache.put(key, [['Vanilla xrefs', i % 100 + 1, 5]] if i % 10 == 0 else [])
+    # starts the size tally, as the first run with the cache does
+    cache.prune()
+
+
+def slowest_imports() -> list[tuple[int, str]]:
+    """Return the cumulative microseconds and the names of the slowest top-level imports of enki."""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', 'import enki'],
+                            cwd=SRC_DIR, capture_output=True, text=True)
+    imports = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _self, cumulative, name = line[len('import time:'):].split('|')
+        # only the modules that enki imports directly
+        if name.startswith('   ') and not name.startswith('    '):
+            imports.append((int(cumulative), name.strip()))
+    return sorted(imports, reverse=True)[:SLOWEST_IMPORTS]
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Time the startup of enki against a latency budget.')
+    parser.add_argument('--budget', type=float, default=DEFAULT_BUDGET,
+                        help='seconds a single-file run may take (default: %(default)s)')
+    parser.add_argument('--repeat', type=int, default=5, help='runs of each command (default: %(default)s)')
+    parser.add_argument('--cache-entries', type=int, default=DEFAULT_CACHE_ENTRIES,
+                        help='entries in the result cache of the timed run (default: %(default)s)')
+    args = parser.parse_args()
+
+    interpreter = best_time([sys.executable, '-c', 'pass'], args.repeat)
+    imports = best_time([sys.executable, '-c', 'import enki'], args.repeat)
+    no_cache = best_time([sys.executable, 'enki.py', '--oneline', '--no-cache', FIXTURE], args.repeat)
+
+    with tempfile.TemporaryDirectory() as cache_dir:
+        fill_cache(cache_dir, args.cache_entries)
+        # the first run writes the entry of the file, the timed runs find it
+        run = best_time([sys.executable, 'enki.py', '--oneline', '--cache-dir', cache_dir, FIXTURE], args.repeat)
+
+    print(f'{"python startup":<20} {interpreter * 1000:>8.1f} ms')
+    print(f'{"import enki":<20} {imports * 1000:>8.1f} ms')
+    print(f'{"without the cache":<20} {no_cache * 1000:>8.1f} ms')
+    print(f'{"single-file run":<20} {run * 1000:>8.1f} ms (budget {args.budget * 1000:.0f} ms, '
+          f'{args.cache_entries} cache entries)')
+
+    print('\nslowest imports:')
+    for microseconds, name in slowest_imports():
+        print(f'{name:<20} {microseconds / 1000:>8.1f} ms')
+
+    if run > args.budget:
+        print(f'\nA single-file run takes longer than the budget of {args.budget * 1000:.0f} ms.')
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
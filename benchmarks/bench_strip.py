@@ -0,0 +1,97 @@
+#!/usr/bin/python3
+"""Compare the stripping engine with the chain of `re.sub` calls it replaces.
+
+Usage: python3 benchmarks/bench_strip.py [LINES]
+"""
+
+import os
+import re
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from enki_regex import Regexes
+from enki_strip import strip_blocks, strip_comments
+
+
+# the regexes the linear-time finders replace
+MULTI_LINE_COMMENT_REGEX = re.compile(Regexes.MULTI_LINE_COMMENT.pattern)
+INTERNAL_IFDEF_REGEX = re.compile(Regexes.INTERNAL_IFDEF.pattern)
+
+
+SECTION = """== Section {i}
+
+Some text that mentions the product and the {{attribute}} value.
+// a single-line comment
+Another paragraph with an xref:some-id[label] and a link:https://example.com[link].
+
+----
+$ command --option {i}
+output
+----
+
+ifdef::internal[]
+Internal text.
+endif::[]
+
+ifdef::upstream[Upstream text.]
+
+////
+A multi-line comment
+that spans lines.
+////
+
+"""
+
+
+def regex_strip(original: str) -> tuple[str, str]:
+    stripped = MULTI_LINE_COMMENT_REGEX.sub('', original)
+    stripped = Regexes.SINGLE_LINE_COMMENT.sub('', stripped)
+    without_comments = stripped
+    stripped = Regexes.CODE_BLOCK_DASHES.sub('', stripped)
+    stripped = Regexes.CODE_BLOCK_DOTS.sub('', stripped)
+    stripped = Regexes.CODE_BLOCK_TWO_DASHES.sub('', stripped)
+    stripped = INTERNAL_IFDEF_REGEX.sub('', stripped)
+    stripped = Regexes.SINGLE_LINE_CONDITIONAL.sub('', stripped)
+    return without_comments, stripped
+
+
+def engine_strip(original: str) -> tuple[str, str]:
+    without_comments = strip_comments(original)
+    return without_comments, strip_blocks(without_comments)
+
+
+def measure(function, original: str, repeat: int = 5) -> tuple[float, int]:
+    """Return the best wall time and the peak allocation of a function."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(original)
+        best = min(best, time.perf_counter() - start)
+
+    tracemalloc.start()
+    function(original)
+    _current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return best, peak
+
+
+def main() -> None:
+    lines = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    section_lines = SECTION.count('\n')
+    original = ''.join(SECTION.format(i=i) for i in range(lines // section_lines + 1))
+
+    assert regex_strip(original) == engine_strip(original)
+
+    print(f'File: {original.count(chr(10))} lines, {len(original)} characters')
+    print(f"{'implementation':<16}{'time (ms)':>12}{'peak (KiB)':>14}")
+    for name, function in [('re.sub chain', regex_strip), ('enki_strip', engine_strip)]:
+        elapsed, peak = measure(function, original)
+        print(f'{name:<16}{elapsed * 1000:>12.2f}{peak / 1024:>14.0f}')
+
+
+if __name__ == '__main__':
+    main()
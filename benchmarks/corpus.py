@@ -0,0 +1,160 @@
+#!/usr/bin/python3
+"""Generate reproducible synthetic AsciiDoc corpora for the benchmarks.
+
+A corpus is a master file that includes assemblies, assemblies that
+include modules, and modules that include snippets. The module text mixes
+paragraphs with single-line and multi-line comments, code blocks,
+conditionals and includes, and some of it triggers the checks. The same
+size and seed always generate the same files.
+
+Usage: python3 benchmarks/corpus.py DIR [--size SIZE] [--seed SEED]
+"""
+
+import argparse
+import os
+import random
+
+
+# assemblies, modules, snippets and sections per module
+SIZES = {
+    'small': (10, 100, 20, 5),
+    'medium': (50, 1000, 100, 10),
+    'large': (200, 10000, 500, 10),
+}
+
+MODULE_PREFIXES = ['con_', 'proc_', 'ref_']
+
+# text that triggers a check, added to some sections
+DEFECTS = [
+    '$ sudo dnf install package\n',
+    'Add the host to the whitelist.\n',
+    'See <<some-section>> for details.\n',
+    'See xref:other/path/file.adoc[the file].\n',
+    'ifdef::pantheonenv[]\nPantheon text.\nendif::[]\n',
+    '.Related information\n* link:https://example.com[Example]\n',
+    'ifdef::upstream[]\nUnterminated conditional.\n',
+]
+
+WORDS = ('the a product cluster node install configure service option value file '
+         'command user system network storage update version attribute').split()
+
+
+class CorpusGenerator():
+    """Generate the text of corpus files from a seeded random generator."""
+
+    def __init__(self, seed: int = 0, comment_density: float = 0.1, defect_rate: float = 0.05):
+        self.rnd = random.Random(seed)
+        self.comment_density = comment_density
+        self.defect_rate = defect_rate
+
+    def sentence(self) -> str:
+        words = self.rnd.choices(WORDS, k=self.rnd.randint(6, 16))
+        return ' '.join(words).capitalize() + '.'
+
+    def paragraph(self) -> str:
+        lines = []
+        for _ in range(self.rnd.randint(1, 4)):
+            if self.rnd.random() < self.comment_density:
+                lines.append(f'// {self.sentence()}')
+            else:
+                lines.append(self.sentence())
+        return '\n'.join(lines) + '\n'
+
+    def block(self, snippets: list[str]) -> str:
+        kind = self.rnd.randrange(8)
+
+        if kind == 0:
+            return f'[source,terminal]\n----\n$ command --option {self.rnd.randint(0, 99)}\noutput\n----\n'
+        if kind == 1:
+            return f'....\n{self.sentence()}\n....\n'
+        if kind == 2:
+            return f'[NOTE]\n--\n{self.sentence()}\n--\n'
+        if kind == 3:
+            return f'ifdef::internal[]\n{self.paragraph()}endif::[]\n'
+        if kind == 4:
+            return f'ifdef::upstream[{self.sentence()}]\n'
+        if kind == 5:
+            return f'ifndef::downstream[]\n{self.paragraph()}endif::[]\n'
+        if kind == 6 and snippets:
+            return f'include::../snippets/{self.rnd.choice(snippets)}[]\n'
+        if self.rnd.random() < self.comment_density * 2:
+            return f'////\n{self.paragraph()}////\n'
+        return self.paragraph()
+
+    def section(self, level: int, snippets: list[str]) -> str:
+        parts = [f"{'=' * level} {self.sentence()[:-1]}\n"]
+        for _ in range(self.rnd.randint(2, 5)):
+            parts.append(self.block(snippets))
+        if self.rnd.random() < self.defect_rate:
+            parts.append(self.rnd.choice(DEFECTS))
+        return '\n'.join(parts) + '\n'
+
+    def module(self, name: str, sections: int, snippets: list[str]) -> str:
+        content_type = {'con_': 'CONCEPT', 'proc_': 'PROCEDURE', 'ref_': 'REFERENCE'}[name[:name.index('_') + 1]]
+        parts = [f':_content-type: {content_type}\n[id="{name[:-5]}_{{context}}"]\n= {self.sentence()[:-1]}\n\n']
+        for _ in range(sections):
+            parts.append(self.section(2, snippets))
+        return ''.join(parts)
+
+    def snippet(self) -> str:
+        return f':_content-type: SNIPPET\n{self.paragraph()}'
+
+    def assembly(self, name: str, modules: list[str]) -> str:
+        parts = [f':_content-type: ASSEMBLY\n[id="{name[:-5]}"]\n= {self.sentence()[:-1]}\n',
+                 ':context: assembly\n\n', self.paragraph(), '\n']
+        for module in modules:
+            parts.append(f'include::../modules/{module}[leveloffset=+1]\n\n')
+        return ''.join(parts)
+
+
+def generate_corpus(
+        root: str,
+        size: str = 'small',
+        seed: int = 0,
+        comment_density: float = 0.1,
+        defect_rate: float = 0.05) -> list[str]:
+    """Write a corpus to `root` and return the paths of its files."""
+    assemblies, modules, snippets, sections = SIZES[size]
+    generator = CorpusGenerator(seed, comment_density, defect_rate)
+
+    snippet_names = [f'snip_{i}.adoc' for i in range(snippets)]
+    module_names = [f'{MODULE_PREFIXES[i % len(MODULE_PREFIXES)]}{i}.adoc' for i in range(modules)]
+    assembly_names = [f'assembly_{i}.adoc' for i in range(assemblies)]
+
+    files = {}
+    for name in snippet_names:
+        files[os.path.join('snippets', name)] = generator.snippet()
+    for name in module_names:
+        files[os.path.join('modules', name)] = generator.module(name, sections, snippet_names)
+    for i, name in enumerate(assembly_names):
+        files[os.path.join('assemblies', name)] = generator.assembly(name, module_names[i::assemblies])
+    files['master.adoc'] = ''.join(f'include::assemblies/{name}[leveloffset=+1]\n\n' for name in assembly_names)
+
+    paths = []
+    for relative_path, content in files.items():
+        path = os.path.join(root, relative_path)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as file:
+            file.write(content)
+        paths.append(path)
+
+    return paths
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Generate a synthetic AsciiDoc corpus.')
+    parser.add_argument('root', help='directory to write the corpus to')
+    parser.add_argument('--size', choices=SIZES, default='small')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--comment-density', type=float, default=0.1,
+                        help='share of paragraph lines that are comments')
+    parser.add_argument('--defect-rate', type=float, default=0.05,
+                        help='share of sections with text that triggers a check')
+    args = parser.parse_args()
+
+    paths = generate_corpus(args.root, args.size, args.seed, args.comment_density, args.defect_rate)
+    print(f'Wrote {len(paths)} files to {args.root}')
+
+
+if __name__ == '__main__':
+    main()
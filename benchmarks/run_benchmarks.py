@@ -0,0 +1,251 @@
+#!/usr/bin/python3
+"""Time the validation pipeline on a synthetic corpus.
+
+Generates a corpus with benchmarks/corpus.py and times file discovery,
+reading, every stripping stage, every check, whole-file validation and
+report rendering separately. Each timing is the best of several runs.
+The results can be saved as JSON and compared with the results of
+another commit.
+
+Usage: python3 benchmarks/run_benchmarks.py [--size SIZE] [--output FILE] [--compare FILE]
+"""
+
+import argparse
+import contextlib
+import io
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable, Iterator, Optional
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from corpus import SIZES, generate_corpus
+from enki_checks import (con_lang_check, con_lang_filename_check, nesting_in_modules_check, related_info_offset,
+                         sudo_check, too_many_comments_check, unterminated_conditional_offset, SEARCH_CHECKS)
+from enki_discovery import discover_files
+from enki_files_validator import classify_files, validate_content
+from enki_msg import Report, StreamingReport
+from enki_strip import BLOCK_STAGES, COMMENT_STAGES, remove_spans
+
+
+class CorpusFile():
+    """A corpus file and its text after each stripping phase."""
+
+    def __init__(self, path: str, original: str):
+        self.path = path
+        self.original = original
+        self.without_comments = ''
+        self.stripped = ''
+
+
+def best_time(function: Callable[[], object], repeat: int) -> float:
+    """Return the best wall time of a function in seconds."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+@contextlib.contextmanager
+def quiet() -> Iterator[None]:
+    """Send the report output to memory instead of the terminal."""
+    root = logging.getLogger()
+    handlers = root.handlers
+    root.handlers = [logging.StreamHandler(io.StringIO())]
+    try:
+        with contextlib.redirect_stdout(io.StringIO()):
+            yield
+    finally:
+        root.handlers = handlers
+
+
+def strip_stage(files: list[CorpusFile], finder, attribute: str) -> None:
+    """Run one stripping stage on every file and store the result."""
+    for file in files:
+        text = getattr(file, attribute)
+        setattr(file, attribute, remove_spans(text, finder(text)))
+
+
+def time_stripping(files: list[CorpusFile], repeat: int) -> dict[str, float]:
+    """Time each stripping stage on the output of the stage before it."""
+    timings = {}
+
+    for file in files:
+        file.without_comments = file.original
+    for name, finder in COMMENT_STAGES:
+        before = [file.without_comments for file in files]
+
+        def run(finder=finder):
+            for file, text in zip(files, before):
+                file.without_comments = text
+            strip_stage(files, finder, 'without_comments')
+
+        timings[f'strip.{name}'] = best_time(run, repeat)
+
+    for file in files:
+        file.stripped = file.without_comments
+    for name, finder in BLOCK_STAGES:
+        before = [file.stripped for file in files]
+
+        def run(finder=finder):
+            for file, text in zip(files, before):
+                file.stripped = text
+            strip_stage(files, finder, 'stripped')
+
+        timings[f'strip.{name}'] = best_time(run, repeat)
+
+    return timings
+
+
+def time_checks(files: list[CorpusFile], repeat: int) -> dict[str, float]:
+    """Time each check on the text it runs on during validation."""
+    report = Report()
+    checks: dict[str, Callable[[CorpusFile], object]] = {
+        'too_many_comments_check':
+            lambda file: too_many_comments_check(file.original, file.without_comments, report, file.path),
+        'con_lang_filename_check': lambda file: con_lang_filename_check(report, file.path),
+        'con_lang_check': lambda file: con_lang_check(file.without_comments, report, file.path),
+        'sudo_check': lambda file: sudo_check(file.without_comments, report, file.path),
+        'unterminated_conditional_check': lambda file: unterminated_conditional_offset(file.stripped),
+        'related_info_check': lambda file: related_info_offset(file.stripped),
+        'nesting_in_modules_check': lambda file: nesting_in_modules_check(report, file.stripped, file.path),
+    }
+    for name, pattern in SEARCH_CHECKS:
+        checks[f'{name}_check'] = lambda file, pattern=pattern: pattern.search(file.stripped)
+
+    return {f'check.{name}': best_time(lambda: [check(file) for file in files], repeat)
+            for name, check in checks.items()}
+
+
+def time_rendering(report: Report, repeat: int) -> dict[str, float]:
+    """Time printing the report in each output format."""
+    timings = {}
+
+    with quiet():
+        for output in ['validate', 'oneline']:
+            timings[f'render.{output}'] = best_time(lambda: report.print_report(0, output), repeat)
+
+        for output in ['jsonl', 'gitlab', 'sarif', 'json']:
+            def stream(output=output):
+                streaming = StreamingReport(output, io.StringIO())
+                streaming.merge(report)
+                streaming.print_report(0)
+
+            timings[f'render.{output}'] = best_time(stream, repeat)
+
+    return timings
+
+
+def run_benchmarks(root: str, repeat: int) -> tuple[dict[str, float], dict[str, int]]:
+    """Time every part of the validation of the corpus in `root`."""
+    timings = {}
+
+    timings['discovery'] = best_time(lambda: discover_files([Path(root)]), repeat)
+    paths, _unsupported = discover_files([Path(root)])
+
+    def read() -> list[CorpusFile]:
+        files = []
+        for path in paths:
+            with open(path, 'r') as file:
+                files.append(CorpusFile(os.path.relpath(path, root), file.read()))
+        return files
+
+    timings['read'] = best_time(read, repeat)
+    files = read()
+
+    timings.update(time_stripping(files, repeat))
+    timings.update(time_checks(files, repeat))
+
+    kinds = classify_files([file.path for file in files])
+    report = Report()
+
+    def validate() -> None:
+        for file in files:
+            validate_content(file.original, file.path, kinds[file.path])
+
+    timings['validate'] = best_time(validate, repeat)
+    for file in files:
+        file_report = validate_content(file.original, file.path, kinds[file.path])
+        report.merge(file_report)
+
+    timings.update(time_rendering(report, repeat))
+
+    corpus = {
+        'files': len(files),
+        'bytes': sum(len(file.original.encode()) for file in files),
+        'lines': sum(file.original.count('\n') for file in files),
+        'findings': report.count,
+    }
+    return timings, corpus
+
+
+def git_commit() -> Optional[str]:
+    """Return the commit of the working tree, if it is a git repository."""
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def print_results(timings: dict[str, float], baseline: Optional[dict[str, float]] = None) -> None:
+    """Print the timings, and the ratio to the baseline timings if given."""
+    header = f"{'benchmark':<44}{'time (ms)':>12}"
+    if baseline is not None:
+        header += f"{'baseline':>12}{'ratio':>8}"
+    print(header)
+
+    for name, seconds in timings.items():
+        line = f'{name:<44}{seconds * 1000:>12.2f}'
+        if baseline is not None and baseline.get(name):
+            line += f'{baseline[name] * 1000:>12.2f}{seconds / baseline[name]:>8.2f}'
+        print(line)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description='Time the validation pipeline on a synthetic corpus.')
+    parser.add_argument('--size', choices=SIZES, default='small')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--repeat', type=int, default=5, help='runs per benchmark; the best time is kept')
+    parser.add_argument('--corpus', help='directory to generate the corpus in; a temporary one by default')
+    parser.add_argument('--output', help='save the results as JSON to this file')
+    parser.add_argument('--compare', help='JSON results of an earlier run to compare with')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = args.corpus or tmp
+        generate_corpus(root, args.size, args.seed)
+        timings, corpus = run_benchmarks(root, args.repeat)
+
+    results = {
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'corpus': dict(size=args.size, seed=args.seed, **corpus),
+        'repeat': args.repeat,
+        'timings': timings,
+    }
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, 'r') as file:
+            baseline = json.load(file)['timings']
+
+    print(f"Corpus: {corpus['files']} files, {corpus['lines']} lines, {corpus['findings']} findings")
+    print_results(timings, baseline)
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(results, file, indent=2)
+
+
+if __name__ == '__main__':
+    main()
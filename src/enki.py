@@ -1,17 +1,30 @@
 #!/usr/bin/python3
 
 import argparse
+import json
 from pathlib import Path
 import os
 import sys
 import time
 import logging
+from typing import Optional
 
-from enki_files_validator import validating_files, lcheck_validate
+from enki_cache import LinkCache, ResultCache, default_cache_dir
+from enki_discovery import discover_files, scan_tree
+from enki_files_validator import validating_files
+from enki_includes import dependents, including_files, read_includes
+from enki_links import DEFAULT_CONCURRENCY, DEFAULT_PER_HOST, DEFAULT_RATE, links_validate
+from enki_msg import FORMATS
+from enki_profile import Profile
 import enki_checks
 
 
 def main() -> None:
+    if sys.argv[1:2] == ['serve']:
+        serve_main(sys.argv[2:])
+    if sys.argv[1:2] == ['merge']:
+        merge_main(sys.argv[2:])
+
     args = cli_args()
 
     # Configure the level of logging output
@@ -27,24 +40,22 @@ def main() -> None:
 
     # if args.command == 'validate':
     #     validate(user_input, args)
-    adoc_files, unsupported_files = get_files(user_input)
+    adoc_files, unsupported_files = get_files(user_input, args.jobs)
 
     if unsupported_files:
         separator = "\n\t"
         logging.error(f'Not adoc file. The following files cannot be validated:\n\t{separator.join(unsupported_files)}\n')
         sys.exit(2)
 
+    if adoc_files and args.changed_since:
+        adoc_files = select_changed_files(adoc_files, args.changed_since, None if args.no_cache else args.cache_dir)
+
+        if not adoc_files:
+            logging.info(f"No adoc files changed since '{args.changed_since}'.")
+            sys.exit(0)
+
     if adoc_files:
-        start = time.time()
-
-        if args.validate:
-            validating_files(adoc_files, start)
-        elif args.oneline:
-            validating_files(adoc_files, start, output='oneline')
-        elif args.gitlab:
-            validating_files(adoc_files, start, output='gitlab')
-        elif args.links:
-            lcheck_validate(adoc_files)
+        check_files(adoc_files, args)
     else:
         #TODO: get rid of possix path
         separator = "\n\t"
@@ -52,6 +63,46 @@ def main() -> None:
         sys.exit(2)
 
 
+def check_files(adoc_files: list[str], args: argparse.Namespace) -> None:
+    """Validate the files, or check their links or watch them, as the command-line options ask."""
+    start = time.time()
+
+    cache = None
+    if not args.no_cache:
+        cache = ResultCache(args.cache_dir, args.cache_size * 1024 * 1024)
+
+    profile = Profile() if args.profile else None
+    daemon = None
+    if args.daemon:
+        # imported here, only runs with --daemon and `enki serve` need the socket modules
+        from enki_daemon import default_socket_path
+        daemon = args.socket or default_socket_path()
+
+    output = 'oneline' if args.oneline else 'jsonl' if args.jsonl else 'gitlab' if args.gitlab else args.format
+
+    if args.shard:
+        if args.links or args.watch:
+            logging.error('--shard cannot be used with --links or --watch.')
+            sys.exit(2)
+        from enki_shard import shard_validate
+        shard, shards = args.shard
+        shard_validate(adoc_files, shard, shards, output, args.jobs, cache)
+        sys.exit(0)
+
+    if args.validate or output:
+        validating_files(adoc_files, start, output=output, jobs=args.jobs, cache=cache, profile=profile, daemon=daemon)
+    elif args.links:
+        link_cache = None if args.no_cache else LinkCache(args.cache_dir)
+        links_validate(adoc_files, start, args.link_concurrency, args.link_per_host, args.link_rate,
+                       link_cache, args.refresh_links)
+    elif args.watch:
+        from enki_watch import DEFAULT_INTERVAL, Watcher
+        try:
+            Watcher(args.path, jobs=args.jobs, cache=cache).watch(args.interval or DEFAULT_INTERVAL)
+        except KeyboardInterrupt:
+            sys.exit(0)
+
+
 def cli_args() -> argparse.Namespace:
     parser = argparse.ArgumentParser(
                         prog = 'enki',
@@ -62,14 +113,48 @@ def cli_args() -> argparse.Namespace:
     parser.add_argument('-t', '--testcase', action="store_true",
                          help="show test cases")
     parser.add_argument('path', nargs='+', type=Path, help='path to files')
+    parser.add_argument('-j', '--jobs', type=positive_int, default=os.cpu_count() or 1,
+                         help="number of parallel validation processes (default: all cores)")
+    parser.add_argument('--no-cache', action="store_true",
+                         help="do not use or update the result cache, the link cache and the metadata index")
+    parser.add_argument('--cache-dir', default=default_cache_dir(),
+                         help="directory of the caches and the metadata index (default: %(default)s)")
+    parser.add_argument('--cache-size', type=positive_int, default=256, metavar='MB',
+                         help="size cap of the result cache in MB (default: %(default)s)")
+    parser.add_argument('--changed-since', metavar='REV',
+                         help="only validate files changed since a git revision and the files that include them")
+    parser.add_argument('--daemon', action="store_true",
+                         help="validate with a running `enki serve`; validate in-process if none is running")
+    parser.add_argument('--socket',
+                         help="socket of the daemon (default: the socket of `enki serve`)")
+    parser.add_argument('--shard', type=shard_spec, metavar='I/N',
+                         help="validate only shard I of N and print a partial report for `enki merge`")
+    parser.add_argument('--profile', action="store_true",
+                         help="print the time spent in each stripping stage and check, and the slowest files, to stderr")
     group.add_argument('-v', '--validate', action="store_true",
                          help="perform validation")
     group.add_argument('-o', '--oneline', action="store_true",
                          help="print one validation error per line")
+    group.add_argument('--jsonl', action="store_true",
+                         help="print one validation error per line in JSON format")
     group.add_argument('-g', '--gitlab', action="store_true",
                          help="print validation errors in xml format")
+    group.add_argument('--format', choices=FORMATS,
+                         help="print validation errors as a SARIF log or a JSON document")
     group.add_argument('-l', '--links', action="store_true",
                          help="find broken links")
+    group.add_argument('-w', '--watch', action="store_true",
+                         help="validate, then revalidate files when they change and print the new and resolved errors")
+    parser.add_argument('--link-concurrency', type=positive_int, default=DEFAULT_CONCURRENCY, metavar='N',
+                         help="number of links checked at the same time (default: %(default)s)")
+    parser.add_argument('--link-per-host', type=positive_int, default=DEFAULT_PER_HOST, metavar='N',
+                         help="number of links to one host checked at the same time (default: %(default)s)")
+    parser.add_argument('--link-rate', type=non_negative_float, default=DEFAULT_RATE, metavar='RATE',
+                         help="requests per second sent to one host, 0 for no limit (default: %(default)s)")
+    parser.add_argument('--refresh-links', action="store_true",
+                         help="check all links again instead of reusing the results in the cache")
+    parser.add_argument('--interval', type=positive_float, metavar='SECONDS',
+                         help="time between two checks for changes in watch mode (default: 0.5)")
 
     if any(x in sys.argv for x in ['-t', '--testcase']):
         help(enki_checks)
@@ -80,38 +165,148 @@ def cli_args() -> argparse.Namespace:
     return args
 
 
-def get_files(user_input: list[Path]):
-    files = []
-    unsupported_files = []
+def serve_main(argv: list[str]) -> None:
+    """Run or stop the validation daemon."""
+    from enki_daemon import default_socket_path, serve, stop
+
+    parser = argparse.ArgumentParser(
+                        prog = 'enki serve',
+                        description = 'Keep enki loaded and validate files for clients on a Unix socket')
+    parser.add_argument('--socket', default=default_socket_path(),
+                         help="socket to listen on (default: %(default)s)")
+    parser.add_argument('--stop', action="store_true",
+                         help="stop the daemon listening on the socket")
+    parser.add_argument('-j', '--jobs', type=positive_int, default=os.cpu_count() or 1,
+                         help="number of validation processes of the daemon (default: all cores)")
+    args = parser.parse_args(argv)
 
-    for path in user_input:
-        str_path = str(path)
-        if path.is_dir():
-            expanded_files = expand_file_paths(path)
-            for file in expanded_files:
-                if file not in files:
-                    files.append(file)
-        elif path.suffix == '.adoc':
-            file = os.path.realpath(path)
-            if file not in files:
-                files.append(file)
-        else:
-            unsupported_files.append(str_path)
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
 
-    return files, unsupported_files
+    if args.stop:
+        if not stop(args.socket):
+            logging.error(f"No daemon is listening on '{args.socket}'.")
+            sys.exit(2)
+        sys.exit(0)
 
-def expand_file_paths(path: Path) -> list[str]:
-    """Expand filepaths."""
-    expanded_files = []
+    try:
+        serve(args.socket, args.jobs)
+    except OSError as e:
+        logging.error(f"Cannot start the daemon: {e}")
+        sys.exit(2)
+    except KeyboardInterrupt:
+        pass
+    sys.exit(0)
 
-    for dirpath, _dirnames, filenames in os.walk(path):
-        for name in filenames:
-            if not name.startswith('_') and name.endswith('.adoc') and name != 'README.adoc':
-                file = os.path.realpath(os.path.join(dirpath, name))
-                if file not in expanded_files:
-                    expanded_files.append(file)
 
-    return expanded_files
+def merge_main(argv: list[str]) -> None:
+    from enki_shard import MergeError, print_merged
+
+    parser = argparse.ArgumentParser(
+                        prog = 'enki merge',
+                        description = 'Print the report of a sharded run from the partial reports of its shards')
+    parser.add_argument('partial_reports', nargs='+', type=Path, help="partial reports written by `enki --shard`")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(levelname)s: %(message)s')
+
+    partials = []
+    for path in args.partial_reports:
+        try:
+            with open(path, 'r') as file:
+                partials.append(json.load(file))
+        except (OSError, ValueError) as e:
+            logging.error(f"Cannot read the partial report '{path}': {e}")
+            sys.exit(2)
+
+    try:
+        print_merged(partials)
+    except (MergeError, KeyError, TypeError) as e:
+        logging.error(f"Cannot merge the partial reports: {e}")
+        sys.exit(2)
+
+
+def shard_spec(value: str) -> tuple[int, int]:
+    """Parse a `I/N` shard command-line value."""
+    try:
+        shard, shards = map(int, value.split('/'))
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"'{value}' is not a shard like 1/4")
+    if not 1 <= shard <= shards:
+        raise argparse.ArgumentTypeError(f"'{value}' must be I/N with I from 1 to N")
+    return shard, shards
+
+
+def positive_int(value: str) -> int:
+    """Parse a positive integer command-line value."""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"'{value}' is not a number")
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"'{value}' must be at least 1")
+    return number
+
+
+def positive_float(value: str) -> float:
+    """Parse a positive number command-line value."""
+    try:
+        number = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"'{value}' is not a number")
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"'{value}' must be greater than 0")
+    return number
+
+
+def non_negative_float(value: str) -> float:
+    """Parse a non-negative number command-line value."""
+    try:
+        number = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"'{value}' is not a number")
+    if number < 0:
+        raise argparse.ArgumentTypeError(f"'{value}' must not be negative")
+    return number
+
+
+def select_changed_files(files: list[str], rev: str, cache_dir: Optional[str] = None) -> list[str]:
+    """Keep the files changed since a revision and the files that include them.
+
+    With a cache directory, the includes come from the metadata index, and
+    only the files that changed since the last run are read.
+    """
+    # imported here, most runs do not need to run git
+    import subprocess
+    from enki_git import changed_files
+
+    try:
+        changed = changed_files(rev)
+    except (OSError, subprocess.CalledProcessError) as e:
+        error = getattr(e, 'stderr', None) or e
+        logging.error(f"Cannot get the files changed since '{rev}': {str(error).strip()}")
+        sys.exit(2)
+
+    if cache_dir is None:
+        includes = read_includes(files)
+    else:
+        # imported here, most runs do not need sqlite3
+        from enki_index import indexed_includes
+        includes = indexed_includes(files, cache_dir)
+
+    included_by = including_files(includes)
+    selected = dependents(changed, included_by, set(files))
+
+    return [file for file in files if file in selected]
+
+
+def get_files(user_input: list[Path], threads: int = 1) -> tuple[list[str], list[str]]:
+    """Get the adoc files and the unsupported files from the user input."""
+    return discover_files(user_input, threads)
+
+
+def expand_file_paths(path: Path) -> list[str]:
+    """Expand filepaths."""
+    return [file for file, _key in scan_tree(str(path))]
 
 # Run the program
 if __name__ == '__main__':
@@ -0,0 +1,262 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from typing import Optional
+
+
+# Bump when the layout of the cache entries changes
+CACHE_VERSION = '4'
+
+# Bump when the layout of the link cache changes
+LINK_CACHE_VERSION = '2'
+
+# Modules whose source determines the validation results
+FINGERPRINT_MODULES = ['enki_checks.py', 'enki_regex.py', 'enki_strip.py', 'enki_files_validator.py', 'enki_msg.py']
+
+DEFAULT_MAX_SIZE = 256 * 1024 * 1024
+
+# Lines of the size tally, one per written entry, before they are added up into one
+MAX_TALLY_LINES = 1024
+
+# Seconds that the result of a working link is reused
+DEFAULT_SUCCESS_TTL = 7 * 24 * 3600
+
+# Seconds that the result of a broken link is reused; short, because errors are often temporary
+DEFAULT_FAILURE_TTL = 3600
+
+
+def default_cache_dir() -> str:
+    """Return the default cache directory."""
+    cache_home = os.environ.get('XDG_CACHE_HOME') or os.path.join(os.path.expanduser('~'), '.cache')
+    return os.path.join(cache_home, 'enki')
+
+
+def checks_fingerprint() -> str:
+    """Hash the source of the checks and regexes.
+
+    Any change to the checks invalidates all cached results.
+    """
+    src_path = os.path.dirname(os.path.abspath(__file__))
+    digest = hashlib.sha256(CACHE_VERSION.encode())
+
+    for name in FINGERPRINT_MODULES:
+        with open(os.path.join(src_path, name), 'rb') as file:
+            digest.update(file.read())
+
+    return digest.hexdigest()
+
+
+class ResultCache():
+    """Store per-file validation results keyed by file content."""
+
+    def __init__(self, cache_dir: str, max_size: int = DEFAULT_MAX_SIZE):
+        self.cache_dir = os.path.join(cache_dir, 'results')
+        self.max_size = max_size
+        self.fingerprint = checks_fingerprint()
+        # the sizes of the written entries, to know when to evict entries without listing them
+        self.tally_path = os.path.join(self.cache_dir, 'size')
+        self.tally_start = file_size(self.tally_path)
+
+    def key(self, content: str, relative_path: str, file_kind: str, cli_checks: bool) -> str:
+        """Return the cache key for a file.
+
+        The path and the file kind are part of the key because some checks
+        look at the file name. The output format is not: it only decides
+        whether the CLI-only checks run.
+        """
+        digest = hashlib.sha256(
+            '\0'.join([self.fingerprint, 'cli' if cli_checks else '', file_kind, relative_path, '']).encode())
+        digest.update(content.encode())
+        return digest.hexdigest()
+
+    def _entry_path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], key[2:] + '.json')
+
+    def get(self, key: str) -> Optional[list[list]]:
+        """Return the cached findings of a file, if any.
+
+        Each finding is a `[category, line, column]` list; the line and
+        column are None if the finding has no location.
+        """
+        entry_path = self._entry_path(key)
+
+        try:
+            with open(entry_path, 'r') as file:
+                entry = json.load(file)
+            # mark the entry as recently used
+            os.utime(entry_path)
+        except (OSError, ValueError):
+            return None
+
+        return entry['findings']
+
+    def put(self, key: str, findings: list[list]) -> None:
+        """Store the findings of a file and add its size to the tally."""
+        entry_path = self._entry_path(key)
+        data = json.dumps({'findings': findings})
+
+        try:
+            os.makedirs(os.path.dirname(entry_path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(entry_path), suffix='.tmp')
+            with os.fdopen(fd, 'w') as file:
+                file.write(data)
+            os.replace(tmp_path, entry_path)
+            # appends of a short line do not interleave, so pool workers can add to the tally at once
+            with open(self.tally_path, 'a') as tally:
+                tally.write(f'{len(data.encode())}\n')
+        except OSError as e:
+            logging.debug(f'Cannot write to the cache: {e}')
+
+    def prune(self) -> None:
+        """Evict the least recently used entries if the cache grew past its size cap.
+
+        The size of the cache is tallied as entries are written, so the
+        entries are listed only when the tally exceeds the cap, or once to
+        start the tally. Nothing is read if no entry was written since the
+        cache was opened or last pruned.
+        """
+        tally_size = file_size(self.tally_path)
+        if tally_size is None or tally_size == self.tally_start:
+            return
+
+        if self.tally_start is None or self._read_tally() > self.max_size:
+            self._write_tally(self._evict())
+
+        self.tally_start = file_size(self.tally_path)
+
+    def _read_tally(self) -> int:
+        """Return the size of the cache in the tally, and keep the tally short."""
+        try:
+            with open(self.tally_path, 'r') as tally:
+                sizes = [int(line) for line in tally]
+        except (OSError, ValueError):
+            # count again
+            return self.max_size + 1
+
+        total_size = sum(sizes)
+        if len(sizes) > MAX_TALLY_LINES:
+            self._write_tally(total_size)
+        return total_size
+
+    def _write_tally(self, total_size: int) -> None:
+        """Replace the tally with the size of the cache.
+
+        Sizes that other processes add at the same time can be lost; the
+        tally is corrected the next time the entries are listed.
+        """
+        try:
+            fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.tmp')
+            with os.fdopen(fd, 'w') as tally:
+                tally.write(f'{total_size}\n')
+            os.replace(tmp_path, self.tally_path)
+        except OSError as e:
+            logging.debug(f'Cannot write to the cache: {e}')
+
+    def _entries(self) -> list[tuple[float, str, int]]:
+        """List the modification time, path and size of each entry."""
+        entries = []
+
+        for shard in list_directory(self.cache_dir):
+            if not shard.is_dir(follow_symlinks=False):
+                continue
+            for entry in list_directory(shard.path):
+                try:
+                    stat = entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+                entries.append((stat.st_mtime, entry.path, stat.st_size))
+
+        return entries
+
+    def _evict(self) -> int:
+        """Evict the least recently used entries until the cache fits its size cap, and return its size."""
+        entries = self._entries()
+        total_size = sum(size for _mtime, _path, size in entries)
+
+        for _mtime, path, size in sorted(entries):
+            if total_size <= self.max_size:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total_size -= size
+
+        return total_size
+
+
+def file_size(path: str) -> Optional[int]:
+    """Return the size of a file, or None if it does not exist."""
+    try:
+        return os.stat(path).st_size
+    except OSError:
+        return None
+
+
+def list_directory(path: str) -> list[os.DirEntry]:
+    """List a directory, or nothing if it cannot be read.
+
+    Another process may remove entries and shards while they are listed.
+    """
+    try:
+        with os.scandir(path) as iterator:
+            return list(iterator)
+    except OSError:
+        return []
+
+
+class LinkCache():
+    """Store the results of link checks, with separate lifetimes for working and broken links.
+
+    The cache is one JSON file that maps each URL to its HTTP status, its
+    error, the target it redirects to, and the time it was checked.
+    """
+
+    def __init__(
+            self,
+            cache_dir: str,
+            success_ttl: float = DEFAULT_SUCCESS_TTL,
+            failure_ttl: float = DEFAULT_FAILURE_TTL):
+        self.path = os.path.join(cache_dir, 'links.json')
+        self.success_ttl = success_ttl
+        self.failure_ttl = failure_ttl
+        self.entries: dict[str, dict] = {}
+
+        try:
+            with open(self.path, 'r') as file:
+                entries = json.load(file)
+            if entries.get('version') == LINK_CACHE_VERSION:
+                self.entries = entries['links']
+        except (OSError, ValueError, AttributeError, KeyError):
+            pass
+
+    def get(self, link: str, now: float) -> Optional[dict]:
+        """Return the cached result of a link, or None if there is none or it expired."""
+        entry = self.entries.get(link)
+        if entry is None:
+            return None
+
+        ttl = self.success_ttl if entry['error'] is None else self.failure_ttl
+        if now - entry['checked'] >= ttl:
+            return None
+        return entry
+
+    def put(self, link: str, status: Optional[int], error: Optional[str], redirect: Optional[str], now: float) -> None:
+        """Store the result of a link check."""
+        self.entries[link] = {'status': status, 'error': error, 'redirect': redirect, 'checked': now}
+
+    def save(self, now: float) -> None:
+        """Write the cache to disk without the expired results."""
+        max_ttl = max(self.success_ttl, self.failure_ttl)
+        links = {link: entry for link, entry in self.entries.items() if now - entry['checked'] < max_ttl}
+
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(self.path), suffix='.tmp')
+            with os.fdopen(fd, 'w') as file:
+                json.dump({'version': LINK_CACHE_VERSION, 'links': links}, file)
+            os.replace(tmp_path, self.path)
+        except OSError as e:
+            logging.debug(f'Cannot write the link cache: {e}')
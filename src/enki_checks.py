@@ -1,20 +1,30 @@
 import re
-import itertools
-import inspect
-import sys
+from typing import Callable, Optional
 
-from enki_msg import Report
+from enki_msg import Location, Report
+from enki_profile import Profile, profiled
 from enki_regex import Regexes, Tags
 
+# Maps an offset in the checked text to the line and column in the file
+Locate = Callable[[int], Location]
+
+
+def _location(locate: Optional[Locate], offset: int) -> Optional[Location]:
+    """Locate an offset, if a locator is given."""
+    return locate(offset) if locate is not None else None
+
+
 # standalone test to run on code blocks
 def sudo_check(
     stripped_file: str,
     report: Report,
-    file_path: str) -> None:
+    file_path: str,
+    locate: Optional[Locate] = None) -> None:
     """Checks if sudo access is mentioned in documentation."""
-    if re.findall(Regexes.SUDO, stripped_file):
+    match = Regexes.SUDO.search(stripped_file)
+    if match:
         report.create_report(
-                      'Mentions of sudo access', file_path)
+                      'Mentions of sudo access', file_path, _location(locate, match.start()))
 
 # standalone test to run on filenames;
 # exclusive to CLI
@@ -32,11 +42,13 @@ def con_lang_filename_check(
 def con_lang_check(
     stripped_file: str,
     report: Report,
-    file_path: str) -> None:
+    file_path: str,
+    locate: Optional[Locate] = None) -> None:
     """Checks if stop words are present in file source."""
-    if re.findall(Regexes.CON_LANG, stripped_file):
+    match = Regexes.CON_LANG.search(stripped_file)
+    if match:
         report.create_report(
-            'Words such as master, slave, whitelist, blacklist', file_path)
+            'Words such as master, slave, whitelist, blacklist', file_path, _location(locate, match.start()))
 
 
 def path_xref_check(stripped_file: str) -> bool:
@@ -78,6 +90,31 @@ def unterminated_conditional_check(stripped_file: str) -> bool:
         return False
 
 
+def unterminated_conditional_offset(stripped_file: str) -> Optional[int]:
+    """Find the conditional that `unterminated_conditional_check` reports.
+
+    Returns the offset of the first closing conditional without an opening
+    one, or else of the first opening conditional that is never closed.
+    Returns None if the number of opening and closing conditionals match.
+    """
+    openings = [match.start() for match in Regexes.OPENING_CONDITIONAL.finditer(stripped_file)]
+    closings = [match.start() for match in Regexes.CLOSING_CONDITIONAL.finditer(stripped_file)]
+    if len(openings) == len(closings):
+        return None
+
+    unclosed: list[int] = []
+    for offset, opening in sorted([(offset, True) for offset in openings] +
+                                  [(offset, False) for offset in closings]):
+        if opening:
+            unclosed.append(offset)
+        elif unclosed:
+            unclosed.pop()
+        else:
+            return offset
+
+    return unclosed[0]
+
+
 # NOTE: DISABLED
 # def footnote_ref_check(stripped_file: str) -> bool:
 #     """Checks if deprecated foornoteref is present."""
@@ -135,16 +172,13 @@ def html_markup_check(stripped_file: str) -> bool:
 def nesting_in_modules_check(
         report: Report,
         stripped_file: str,
-        file_path: str) -> None:
+        file_path: str,
+        locate: Optional[Locate] = None) -> None:
     """Checks if modules contain nested content."""
-    includes = re.findall(Regexes.INCLUDE_STATEMENT, stripped_file)
-
-    error = 0
-    for i in includes:
-        if not Regexes.SNIPPET_INCLUDE.match(i):
-            error += 1
-    if error != 0:
-        report.create_report('Nesting in modules', file_path)
+    for include in Regexes.INCLUDE_STATEMENT.finditer(stripped_file):
+        if not Regexes.SNIPPET_INCLUDE.match(include.group()):
+            report.create_report('Nesting in modules', file_path, _location(locate, include.start()))
+            return
 
 
 def related_info_check(stripped_file: str) -> bool:
@@ -170,29 +204,79 @@ def add_res_wrong_format_check(stripped_file: str) -> bool:
 """
 
 
+# Checks run by `scan_checks` that only need to know if the pattern occurs
+SEARCH_CHECKS = [
+    ('vanilla_xref', Regexes.VANILLA_XREF),
+    ('empty_line_after_include', Regexes.EMPTY_LINE_AFTER_INCLUDE),
+    ('pantheon_env', Regexes.PV_ENV),
+    ('path_xref', Regexes.PATH_XREF),
+]
+
+
+def related_info_offset(text: str) -> Optional[int]:
+    """Find the Related information section, like `related_info_check`."""
+    # the case-insensitive pattern tests every character; for ASCII text,
+    # a plain search in the lowercase text rules out most files first
+    if text.isascii() and 'related information' not in text.lower():
+        return None
+    match = Regexes.RELATED_INFO.search(text)
+    return match.start() if match else None
+
+
+def scan_checks(stripped_file: str, profile: Optional[Profile] = None) -> dict[str, int]:
+    """Run the checks of `checks` and map the names of those that found a problem to its offset.
+
+    Gives the same results as the individual check functions. A check stops
+    scanning at its first match instead of collecting every match.
+    """
+    found = {}
+    size = len(stripped_file)
+
+    offset = profiled(profile, 'check.unterminated_conditional_check', size,
+                      unterminated_conditional_offset, stripped_file)
+    if offset is not None:
+        found['unterminated_conditional'] = offset
+
+    offset = profiled(profile, 'check.related_info_check', size, related_info_offset, stripped_file)
+    if offset is not None:
+        found['related_info'] = offset
+
+    for name, pattern in SEARCH_CHECKS:
+        match = profiled(profile, f'check.{name}_check', size, pattern.search, stripped_file)
+        if match:
+            found[name] = match.start()
+
+    return found
+
+
 def checks(
         report: Report,
         stripped_file: str,
         original_file: str,
-        file_path: str) -> None:
+        file_path: str,
+        locate: Optional[Locate] = None,
+        profile: Optional[Profile] = None) -> None:
     """Run the checks."""
 
-    if unterminated_conditional_check(stripped_file):
-        report.create_report('Unterminated conditional statement', file_path)
+    found = scan_checks(stripped_file, profile)
+
+    if 'unterminated_conditional' in found:
+        report.create_report('Unterminated conditional statement', file_path,
+                             _location(locate, found['unterminated_conditional']))
 
     # NOTE: DISABLED
     # if footnote_ref_check(stripped_file):
     #     report.create_report('Deprecated `footnoteref` markup', file_path)
 
-    if related_info_check(stripped_file):
-        report.create_report('"Related information" section', file_path)
+    if 'related_info' in found:
+        report.create_report('"Related information" section', file_path, _location(locate, found['related_info']))
 
     # NOTE: DISABLED
     # if add_res_wrong_format_check(stripped_file):
     #    report.create_report('incorrectly formatted Additional recourses section', file_path)
 
-    if vanilla_xref_check(stripped_file):
-        report.create_report('Vanilla xrefs', file_path)
+    if 'vanilla_xref' in found:
+        report.create_report('Vanilla xrefs', file_path, _location(locate, found['vanilla_xref']))
 
     # NOTE: DISABLED
     # if html_markup_check(stripped_file):
@@ -208,14 +292,15 @@ def checks(
     #    report.create_report(
     #        'Xrefs without the human readable label', file_path)
 
-    if empty_line_after_include_check(stripped_file):
+    if 'empty_line_after_include' in found:
         report.create_report(
-            'No empty line after the include statement', file_path)
+            'No empty line after the include statement', file_path,
+            _location(locate, found['empty_line_after_include']))
 
 
-    if pantheon_env_check(stripped_file):
-        report.create_report('`pantheonenv` variable', file_path)
+    if 'pantheon_env' in found:
+        report.create_report('`pantheonenv` variable', file_path, _location(locate, found['pantheon_env']))
 
 
-    if path_xref_check(stripped_file):
-        report.create_report('Path-based xref', file_path)
+    if 'path_xref' in found:
+        report.create_report('Path-based xref', file_path, _location(locate, found['path_xref']))
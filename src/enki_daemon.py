@@ -0,0 +1,308 @@
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import socket
+import socketserver
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, Optional
+
+from enki_files_validator import classify_files, cli_checks, file_kind, file_results, validate_content
+from enki_msg import Report
+
+
+# Upper limit of per-file results kept in memory by the daemon
+MAX_ENTRIES = 100000
+
+# Seconds a client waits for the next answer line of the daemon before giving up
+CLIENT_TIMEOUT = 60
+
+
+def default_socket_path() -> str:
+    """Return the default path of the daemon socket.
+
+    Without a runtime directory, which only its user can access, the socket
+    is in a directory of the user in the temporary directory, so that other
+    users cannot bind it first.
+    """
+    runtime_dir = os.environ.get('XDG_RUNTIME_DIR')
+    if runtime_dir:
+        return os.path.join(runtime_dir, 'enki.sock')
+    return os.path.join(tempfile.gettempdir(), f'enki-{os.getuid()}', 'enki.sock')
+
+
+def prepare_socket_directory(socket_path: str) -> None:
+    """Create the directory of the default socket, accessible only to the user, if it does not exist.
+
+    Raises OSError if the directory belongs to another user.
+    """
+    directory = os.path.dirname(os.path.abspath(socket_path))
+    os.makedirs(directory, mode=0o700, exist_ok=True)
+    if os.stat(directory).st_uid != os.getuid():
+        raise OSError(f"The directory of the socket '{directory}' belongs to another user")
+    os.chmod(directory, 0o700)
+
+
+def check_owner(socket_path: str) -> None:
+    """Raise OSError if the socket does not belong to the user, so that another user's daemon is not trusted."""
+    if os.stat(socket_path).st_uid != os.getuid():
+        raise OSError(f"The socket '{socket_path}' belongs to another user")
+
+
+class MemoryCache():
+    """Keep the findings of recently validated files, least recently used first."""
+
+    def __init__(self, max_entries: int = MAX_ENTRIES):
+        self.entries: OrderedDict[tuple, list[list]] = OrderedDict()
+        self.max_entries = max_entries
+        self.lock = threading.Lock()
+
+    def get(self, key: tuple) -> Optional[list[list]]:
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is not None:
+                self.entries.move_to_end(key)
+            return entry
+
+    def put(self, key: tuple, findings: list[list]) -> None:
+        with self.lock:
+            self.entries[key] = findings
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.max_entries:
+                self.entries.popitem(last=False)
+
+
+class ValidationServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Validate files for clients on a Unix socket.
+
+    A request is one line of JSON. It has either a `files` list of paths,
+    or a `buffers` list of `{"path", "content"}` objects for unsaved
+    editor content, plus the `cwd` that reported paths are relative to, the
+    `output` format and the number of `jobs` that validate the files, up to
+    the processes of the server. The
+    server answers with one JSON line per file, in order, as soon as the
+    file is done, `{"file", "findings", "time"}`, where each finding is a
+    `[category, line, column]` list and the time is the seconds spent on the
+    file, and a last `{"done": true}` line.
+    `{"command": "ping"}` and `{"command": "shutdown"}` control the server.
+    """
+    daemon_threads = True
+
+    def __init__(self, socket_path: str, jobs: int = 1):
+        self.cache = MemoryCache()
+        self.jobs = jobs
+        # one pool for all requests; its processes do not fork from the threads of the requests
+        self.executor = None
+        if jobs > 1:
+            self.executor = ProcessPoolExecutor(max_workers=jobs, mp_context=multiprocessing.get_context(start_method()))
+        # the socket is created accessible only to the user, with no window where others can connect
+        umask = os.umask(0o077)
+        try:
+            super().__init__(socket_path, RequestHandler)
+        finally:
+            os.umask(umask)
+
+    def server_close(self) -> None:
+        super().server_close()
+        if self.executor is not None:
+            self.executor.shutdown(cancel_futures=True)
+
+    def validate_request(self, request: dict) -> Iterator[dict]:
+        """Validate the files or buffers of a request and yield the result of each file.
+
+        Files that are not in the memory cache are validated in the process
+        pool of the server, by up to `jobs` processes. Raises OSError before
+        the first result if a file does not exist.
+        """
+        cwd = request.get('cwd') or os.getcwd()
+        output = request.get('output')
+        jobs = min(request.get('jobs', 1), self.jobs)
+
+        paths = [os.path.join(cwd, path) for path in request.get('files', [])]
+        kinds = classify_files(paths)
+        keys = {}
+        for path in paths:
+            stat = os.stat(path)
+            keys[path] = ('file', path, stat.st_ino, stat.st_mtime_ns, stat.st_size, kinds[path], cwd, cli_checks(output))
+
+        cached = {path: self.cache.get(keys[path]) for path in paths}
+        # validated in order, only when the previous results were sent
+        results = file_results([path for path in paths if cached[path] is None], kinds, output, jobs,
+                               cwd=cwd, executor=self.executor)
+
+        for path in paths:
+            start = time.perf_counter()
+            relative_path = os.path.relpath(path, cwd)
+            findings = cached[path]
+
+            if findings is None:
+                _path, report = next(results)
+                findings = report.findings()
+                self.cache.put(keys[path], findings)
+                spent = report.times[relative_path]
+            else:
+                spent = time.perf_counter() - start
+
+            yield {'file': relative_path, 'findings': findings, 'time': spent}
+
+        for buffer in request.get('buffers', []):
+            start = time.perf_counter()
+            relative_path = os.path.relpath(os.path.join(cwd, buffer['path']), cwd)
+            kind = file_kind(relative_path)
+            digest = hashlib.sha256(buffer['content'].encode()).hexdigest()
+            key: tuple = ('buffer', relative_path, digest, kind, cli_checks(output))
+
+            findings = self.cache.get(key)
+            if findings is None:
+                findings = validate_content(buffer['content'], relative_path, kind, output).findings()
+                self.cache.put(key, findings)
+
+            yield {'file': relative_path, 'findings': findings, 'time': time.perf_counter() - start}
+
+
+class RequestHandler(socketserver.StreamRequestHandler):
+    """Answer one client request."""
+    server: ValidationServer
+
+    def handle(self) -> None:
+        try:
+            request = json.loads(self.rfile.readline())
+        except ValueError as e:
+            self.send({'error': f'Invalid request: {e}'})
+            return
+
+        command = request.get('command')
+        if command == 'ping':
+            self.send({'done': True})
+            return
+        if command == 'shutdown':
+            self.send({'done': True})
+            threading.Thread(target=self.server.shutdown).start()
+            return
+
+        try:
+            for result in self.server.validate_request(request):
+                self.send(result)
+        except (BrokenPipeError, ConnectionResetError):
+            # the client gave up
+            return
+        except (OSError, UnicodeDecodeError, KeyError, TypeError) as e:
+            self.send({'error': str(e)})
+            return
+
+        self.send({'done': True})
+
+    def send(self, message: dict) -> None:
+        self.wfile.write(json.dumps(message).encode() + b'\n')
+
+
+def start_method() -> str:
+    """Return how the processes of the pool start.
+
+    The server runs requests in threads, and forking a process that has
+    threads can deadlock the child, so processes are started by a fork
+    server, or spawned where there is none.
+    """
+    return 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+
+def serve(socket_path: str, jobs: int = 1) -> None:
+    """Run the daemon, with a pool of `jobs` processes, until it receives a shutdown request.
+
+    Raises OSError if another daemon is already listening on the socket, or
+    if the directory of the default socket belongs to another user.
+    """
+    if socket_path == default_socket_path():
+        prepare_socket_directory(socket_path)
+    if os.path.exists(socket_path):
+        if ping(socket_path):
+            raise OSError(f"A daemon is already listening on '{socket_path}'")
+        # left over from a daemon that did not shut down cleanly
+        os.unlink(socket_path)
+
+    with ValidationServer(socket_path, jobs) as server:
+        logging.info(f'Listening on {socket_path}')
+        try:
+            server.serve_forever()
+        finally:
+            os.unlink(socket_path)
+
+
+def answer_lines(socket_path: str, message: dict) -> Iterator[dict]:
+    """Send a request to the daemon and yield the answer lines as they arrive.
+
+    Raises OSError if the daemon is not running, does not send the next line
+    in time, or its socket belongs to another user, and ValueError if the
+    answer is incomplete or reports an error.
+    """
+    check_owner(socket_path)
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+        # the timeout applies to each line, not to the whole answer
+        client.settimeout(CLIENT_TIMEOUT)
+        client.connect(socket_path)
+        client.sendall(json.dumps(message).encode() + b'\n')
+
+        with client.makefile('rb') as answer:
+            for line in answer:
+                message = json.loads(line)
+                if 'error' in message:
+                    raise ValueError(message['error'])
+                if message.get('done'):
+                    return
+                yield message
+
+    raise ValueError('The daemon closed the connection before the end of the answer')
+
+
+def request(socket_path: str, message: dict) -> list[dict]:
+    """Send a request to the daemon and return the answer lines, like `answer_lines`."""
+    return list(answer_lines(socket_path, message))
+
+
+def ping(socket_path: str) -> bool:
+    """Check if a daemon is listening on the socket."""
+    try:
+        request(socket_path, {'command': 'ping'})
+    except (OSError, ValueError):
+        return False
+    return True
+
+
+def stop(socket_path: str) -> bool:
+    """Ask the daemon to shut down. Return False if no daemon is running."""
+    try:
+        request(socket_path, {'command': 'shutdown'})
+    except (OSError, ValueError):
+        return False
+    return True
+
+
+def validate_remote(
+        files: list[str],
+        report: Report,
+        output: Optional[str],
+        socket_path: str,
+        jobs: int = 1) -> list[str]:
+    """Validate files with the daemon and merge its findings into `report` as each file is done.
+
+    Return the files that the daemon did not validate, all of them if it is
+    not available, so that the caller can validate them in-process.
+    """
+    done = 0
+
+    try:
+        for result in answer_lines(socket_path, {'files': files, 'cwd': os.getcwd(), 'output': output, 'jobs': jobs}):
+            file_report = Report()
+            file_report.add_findings(result['findings'], result['file'])
+            file_report.times[result['file']] = result.get('time', 0.0)
+            report.merge(file_report)
+            done += 1
+    except (OSError, ValueError) as e:
+        logging.debug(f'Validating {len(files) - done} files in-process, the daemon is not available: {e}')
+
+    return files[done:]
@@ -0,0 +1,121 @@
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Optional
+
+
+# (st_dev, st_ino) identifies a file regardless of the path used to reach it
+FileKey = tuple[int, int]
+
+
+def is_adoc_name(name: str) -> bool:
+    """Check if a file name is an adoc file that should be validated."""
+    return not name.startswith('_') and name.endswith('.adoc') and name != 'README.adoc'
+
+
+def scan_directory(directory: str, device: int, files: list[tuple[str, FileKey]]) -> list[tuple[str, int]]:
+    """Add the adoc files of a directory to `files`, and return its subdirectories and their devices.
+
+    Both are sorted by name.
+    """
+    try:
+        with os.scandir(directory) as iterator:
+            entries = sorted(iterator, key=lambda entry: entry.name)
+    except OSError:
+        return []
+
+    subdirectories = []
+
+    for entry in entries:
+        try:
+            if entry.is_dir(follow_symlinks=False):
+                subdirectories.append((entry.path, entry.stat(follow_symlinks=False).st_dev))
+            elif is_adoc_name(entry.name):
+                if entry.is_symlink():
+                    stat = entry.stat()
+                    files.append((os.path.realpath(entry.path), (stat.st_dev, stat.st_ino)))
+                elif entry.is_file(follow_symlinks=False):
+                    files.append((entry.path, (device, entry.inode())))
+        except OSError:
+            # broken symlink or a file removed during the scan
+            continue
+
+    return subdirectories
+
+
+def scan_tree(root: str, directories: Optional[list[str]] = None) -> list[tuple[str, FileKey]]:
+    """List the adoc files in a directory tree.
+
+    Files come before subdirectories, and both are sorted by name, so the
+    order does not depend on the file system. Does not descend into
+    symlinked directories. Paths are resolved without a `realpath` call
+    per file: only symlinked files are resolved. If `directories` is
+    given, the scanned directories are added to it.
+    """
+    files: list[tuple[str, FileKey]] = []
+    root = os.path.realpath(root)
+
+    try:
+        root_device = os.stat(root).st_dev
+    except OSError:
+        return files
+
+    stack = [(root, root_device)]
+
+    while stack:
+        directory, device = stack.pop()
+
+        if directories is not None:
+            directories.append(directory)
+
+        subdirectories = scan_directory(directory, device, files)
+
+        # the stack is last in, first out
+        stack.extend(reversed(subdirectories))
+
+    return files
+
+
+def discover_files(
+        paths: list[Path],
+        threads: int = 1,
+        scanned_directories: Optional[list[str]] = None) -> tuple[list[str], list[str]]:
+    """Get the adoc files to validate and the unsupported files.
+
+    Directories are scanned in parallel threads. Files are kept in the order
+    of the paths and deduplicated by device and inode. If
+    `scanned_directories` is given, every scanned directory is added to it.
+    """
+    directories = [str(path) for path in paths if path.is_dir()]
+
+    def scan(directory: str) -> list[tuple[str, FileKey]]:
+        return scan_tree(directory, scanned_directories)
+
+    if threads > 1 and len(directories) > 1:
+        with ThreadPoolExecutor(max_workers=min(threads, len(directories))) as executor:
+            scanned = dict(zip(directories, executor.map(scan, directories)))
+    else:
+        scanned = {directory: scan(directory) for directory in directories}
+
+    files = []
+    unsupported_files = []
+    seen: set[FileKey] = set()
+
+    for path in paths:
+        str_path = str(path)
+
+        if str_path in scanned:
+            found = scanned[str_path]
+        elif path.suffix == '.adoc':
+            stat = os.stat(path)
+            found = [(os.path.realpath(path), (stat.st_dev, stat.st_ino))]
+        else:
+            unsupported_files.append(str_path)
+            continue
+
+        for file, key in found:
+            if key not in seen:
+                seen.add(key)
+                files.append(file)
+
+    return files, unsupported_files
@@ -1,124 +1,302 @@
 import os
 import re
 import sys
-import logging
-from typing import Optional
+import itertools
+import time
+from collections import deque
+from enum import Enum
+from typing import TYPE_CHECKING, Iterator, Optional
 
-from enki_msg import Report
+from enki_cache import ResultCache
+from enki_msg import STREAMING_OUTPUTS, Report, StreamingReport
+from enki_profile import Profile, profiled
 from enki_checks import checks, nesting_in_modules_check, too_many_comments_check, con_lang_check, con_lang_filename_check, sudo_check
 from enki_regex import Regexes
+from enki_strip import LineIndex, Locator, OffsetMap, strip_blocks, strip_comments
 
+if TYPE_CHECKING:
+    from concurrent.futures import Executor
 
-def sort_files(files: list[str]) -> tuple[list[str], list[str], list[str]]:
-    """Get a list of assemblies, modules, and unidentified files."""
-    prefix_assemblies = []
-    prefix_modules = []
-    undefined_content = []
 
-    for file in files:
+# Upper limit of files per pool task, to keep streaming output responsive
+MAX_CHUNKSIZE = 64
 
-        file_name = os.path.basename(file)
 
-        if file_name.startswith('assembly'):
-            prefix_assemblies.append(file)
-        elif file_name.startswith(("proc_", "con_", "ref_", "proc-", "con-", "ref-")):
-            prefix_modules.append(file)
-        else:
-            undefined_content.append(file)
+class FileKind(Enum):
+    """Kind of a file, based on the prefix of its name."""
+    ASSEMBLY = 'assembly'
+    MODULE = 'module'
+    UNDEFINED = 'undefined'
 
-    return prefix_assemblies, prefix_modules, undefined_content
+
+def file_kind(file: str) -> FileKind:
+    """Get the kind of a file from its name."""
+    file_name = os.path.basename(file)
+
+    if file_name.startswith('assembly'):
+        return FileKind.ASSEMBLY
+    if file_name.startswith(("proc_", "con_", "ref_", "proc-", "con-", "ref-")):
+        return FileKind.MODULE
+    return FileKind.UNDEFINED
+
+
+def classify_files(files: list[str]) -> dict[str, FileKind]:
+    """Map each file to its kind."""
+    return {file: file_kind(file) for file in files}
+
+
+def cli_checks(output: Optional[str]) -> bool:
+    """Return whether the checks that only the CLI runs apply to an output."""
+    return output != 'gitlab'
+
+
+def validate_file(
+        path: str,
+        kind: FileKind,
+        cwd: str,
+        output: Optional[str] = None,
+        cache: Optional[ResultCache] = None,
+        profile: Optional[Profile] = None) -> Report:
+    """Run validation checks on a single file and return its findings.
+
+    Unchanged files are served from the cache.
+    """
+    start = time.perf_counter()
+    relative_path = os.path.relpath(path, cwd)
+
+    with open(path, 'r') as file:
+        original = file.read()
+
+    if profile is not None:
+        profile.record('read', time.perf_counter() - start, len(original))
+
+    cached = None
+    if cache is not None:
+        key = cache.key(original, relative_path, kind.value, cli_checks(output))
+        cached = profiled(profile, 'cache.get', 0, cache.get, key)
+
+    if cached is not None:
+        report = Report()
+        report.add_findings(cached, relative_path)
+    else:
+        report = validate_content(original, relative_path, kind, output, profile)
+
+        if cache is not None:
+            profiled(profile, 'cache.put', 0, cache.put, key, report.findings())
+
+    report.times[relative_path] = time.perf_counter() - start
+    if profile is not None:
+        profile.record_file(relative_path, report.times[relative_path])
+
+    return report
+
+
+def validate_content(
+        original: str,
+        relative_path: str,
+        kind: FileKind,
+        output: Optional[str] = None,
+        profile: Optional[Profile] = None) -> Report:
+    """Run validation checks on the content of a file.
+
+    The findings point at the line and column in `original`: the stripping
+    stages record what they remove, and a locator maps offsets in the
+    stripped text back.
+    """
+    report = Report()
+
+    line_index = LineIndex(original)
+    offsets = OffsetMap()
+    stripped = strip_comments(original, offsets, profile)
+    locate = Locator(line_index, offsets.copy())
+
+    # this check should run before
+    # code blocks
+    # internal/single line conditionals
+    # are replaced
+    profiled(profile, 'check.too_many_comments_check', len(original),
+             too_many_comments_check, original, stripped, report, relative_path)
+
+    if cli_checks(output):
+        profiled(profile, 'check.con_lang_filename_check', len(relative_path),
+                 con_lang_filename_check, report, relative_path)
+        profiled(profile, 'check.con_lang_check', len(stripped),
+                 con_lang_check, stripped, report, relative_path, locate)
+        profiled(profile, 'check.sudo_check', len(stripped),
+                 sudo_check, stripped, report, relative_path, locate)
+
+    stripped = strip_blocks(stripped, offsets, profile)
+    locate = Locator(line_index, offsets)
+
+    checks(report, stripped, original, relative_path, locate, profile)
+
+    if kind == FileKind.UNDEFINED or kind == FileKind.ASSEMBLY:
+        nesting = bool(re.findall(Regexes.MODULE_TYPE, stripped))
+    else:
+        # a module with an assembly content type is not checked
+        nesting = not re.findall(Regexes.ASSEMBLY_TYPE, stripped)
+
+    if nesting:
+        profiled(profile, 'check.nesting_in_modules_check', len(stripped),
+                 nesting_in_modules_check, report, stripped, relative_path, locate)
+
+    return report
+
+
+def _validate_chunk(
+        chunk: list[tuple[str, FileKind, str, Optional[str], Optional[ResultCache]]],
+        profiling: bool = False) -> tuple[list[Report], Optional[Profile]]:
+    """Validate a chunk of files in a pool worker.
+
+    If `profiling` is set, also return the profile of the chunk.
+    """
+    profile = Profile() if profiling else None
+    return [validate_file(*job, profile=profile) for job in chunk], profile
+
+
+def _pool_results(
+        job_list: list[tuple[str, FileKind, str, Optional[str], Optional[ResultCache]]],
+        jobs: int,
+        profile: Optional[Profile] = None,
+        executor: Optional['Executor'] = None) -> Iterator[Report]:
+    """Validate files in a process pool and yield the results in order.
+
+    Only a few chunks per worker are in flight at a time, so results are
+    yielded as soon as the files finish and do not pile up in memory. The
+    profiles of the workers are merged into `profile`. Without an
+    `executor`, a pool of `jobs` processes is started for these files.
+    """
+    if executor is not None:
+        yield from _executor_results(executor, job_list, jobs, profile)
+        return
+
+    # imported here, a run that validates files in this process does not need it
+    from concurrent.futures import ProcessPoolExecutor
+
+    with ProcessPoolExecutor(max_workers=jobs) as executor:
+        yield from _executor_results(executor, job_list, jobs, profile)
+
+
+def _executor_results(
+        executor: 'Executor',
+        job_list: list[tuple[str, FileKind, str, Optional[str], Optional[ResultCache]]],
+        jobs: int,
+        profile: Optional[Profile] = None) -> Iterator[Report]:
+    """Submit the chunks of files to an executor, `jobs` workers' worth at a time, and yield the results in order."""
+    from concurrent.futures import Future
+
+    profiling = profile is not None
+    chunksize = max(1, min(MAX_CHUNKSIZE, len(job_list) // (jobs * 4)))
+    chunks = (job_list[i:i + chunksize] for i in range(0, len(job_list), chunksize))
+    pending: deque[Future] = deque()
+
+    for chunk in itertools.islice(chunks, jobs * 2):
+        pending.append(executor.submit(_validate_chunk, chunk, profiling))
+
+    while pending:
+        results, chunk_profile = pending.popleft().result()
+
+        if profile is not None and chunk_profile is not None:
+            profile.merge(chunk_profile)
+
+        next_chunk = next(chunks, None)
+        if next_chunk is not None:
+            pending.append(executor.submit(_validate_chunk, next_chunk, profiling))
+
+        yield from results
+
+
+def file_results(
+        all_files: list[str],
+        file_kinds: dict[str, FileKind],
+        output: Optional[str] = None,
+        jobs: int = 1,
+        cache: Optional[ResultCache] = None,
+        profile: Optional[Profile] = None,
+        cwd: Optional[str] = None,
+        executor: Optional['Executor'] = None) -> Iterator[tuple[str, Report]]:
+    """Validate files and yield the path and findings of each, in order.
+
+    With more than one job, files are validated in a process pool, in
+    `executor` if it is given. Reported paths are relative to `cwd`, the
+    current directory by default.
+    """
+    cwd = cwd or os.getcwd()
+
+    job_list = [(path, file_kinds[path], cwd, output, cache) for path in all_files]
+
+    jobs = min(jobs, len(job_list))
+
+    if jobs > 1:
+        results = _pool_results(job_list, jobs, profile, executor)
+    else:
+        results = (validate_file(*job, profile=profile) for job in job_list)
+
+    yield from zip(all_files, results)
 
 
 def validate(
         all_files: list[str],
         report: Report,
-        undefined_content: list[str],
-        prefix_assemblies: list[str],
-        prefix_modules: list[str],
-        output: Optional[str] = None) -> Report:
-    """Run validation checks and return the report."""
-
-    undetermined_file_type = []
-    confused_files = []
-
-    cwd = os.getcwd()
-
-    for path in all_files:
-        relative_path = os.path.relpath(path, cwd)
-
-        with open(path, 'r') as file:
-            original = file.read()
-            stripped = Regexes.MULTI_LINE_COMMENT.sub('', original)
-            stripped = Regexes.SINGLE_LINE_COMMENT.sub('', stripped)
-
-            # this check should run before
-            # code blocks
-            # internal/single line conditionals
-            # are replaced
-            too_many_comments_check(original, stripped, report, relative_path)
-
-            if output != 'gitlab':
-                # this check is CLI only
-                con_lang_filename_check(report, relative_path)
-                con_lang_check(stripped, report, relative_path)
-                sudo_check(stripped, report, relative_path)
-
-            stripped = Regexes.CODE_BLOCK_DASHES.sub('', stripped)
-            stripped = Regexes.CODE_BLOCK_DOTS.sub('', stripped)
-            stripped = Regexes.CODE_BLOCK_TWO_DASHES.sub('', stripped)
-            stripped = Regexes.INTERNAL_IFDEF.sub('', stripped)
-            stripped = Regexes.SINGLE_LINE_CONDITIONAL.sub('', stripped)
-
-            checks(report, stripped, original, relative_path)
-
-            if path in undefined_content:
-                if re.findall(Regexes.MODULE_TYPE, stripped):
-                    nesting_in_modules_check(report, stripped, relative_path)
-                elif re.findall(Regexes.SNIPPET_TYPE, stripped):
-                    continue
-                else:
-                    undetermined_file_type.append(relative_path)
-
-            if path in prefix_assemblies:
-                if re.findall(Regexes.MODULE_TYPE, stripped):
-                    confused_files.append(relative_path)
-                    nesting_in_modules_check(report, stripped, relative_path)
-
-            if path in prefix_modules:
-                if re.findall(Regexes.ASSEMBLY_TYPE, stripped):
-                    confused_files.append(path)
-                else:
-                    nesting_in_modules_check(report, stripped, relative_path)
+        file_kinds: dict[str, FileKind],
+        output: Optional[str] = None,
+        jobs: int = 1,
+        cache: Optional[ResultCache] = None,
+        profile: Optional[Profile] = None) -> Report:
+    """Run validation checks and return the report.
+
+    With more than one job, files are validated in a process pool. Results
+    are merged in the order of `all_files`, so the report does not depend on
+    the number of workers. Each file's findings are merged as soon as the
+    file is done, which lets a streaming report print them right away.
+
+    If `profile` is given, the time spent in each stage and check is
+    recorded in it.
+    """
+    for _, file_report in file_results(all_files, file_kinds, output, jobs, cache, profile):
+        report.merge(file_report)
+
+    if cache is not None:
+        cache.prune()
 
     return report
 
 
-def validating_files(files: list[str], start_time: float, output: Optional[str] = None) -> None:
-    """Print the result of validation and exit with an error."""
-    report = Report()
+def validating_files(
+        files: list[str],
+        start_time: float,
+        output: Optional[str] = None,
+        jobs: int = 1,
+        cache: Optional[ResultCache] = None,
+        profile: Optional[Profile] = None,
+        daemon: Optional[str] = None) -> None:
+    """Print the result of validation and exit with an error.
 
-    prefix_assemblies, prefix_modules, undefined_content = sort_files(files)
-    file_validation = validate(
-        files, report, undefined_content, prefix_assemblies, prefix_modules, output)
+    If `profile` is given, print it to stderr after the report. If `daemon`
+    is the socket of a running `enki serve`, the daemon validates the
+    files with `jobs` processes; the files it does not validate are
+    validated in this process.
+    """
+    if output in STREAMING_OUTPUTS:
+        report: Report = StreamingReport(output)
+    else:
+        report = Report()
 
-    if file_validation.count == 0:
-        sys.exit(0)
+    remaining = files
+    if daemon is not None and profile is None:
+        # imported here, enki_daemon uses this module
+        from enki_daemon import validate_remote
+        remaining = validate_remote(files, report, output, daemon, jobs)
 
-    file_validation.print_report(start_time, output)
-    sys.exit(2)
+    if remaining:
+        validate(remaining, report, classify_files(remaining), output, jobs, cache, profile)
 
+    if report.count != 0 or isinstance(report, StreamingReport):
+        # a streaming report prints its summary even without findings
+        report.print_report(start_time, output)
 
-def lcheck_validate(files: list[str]) -> None:
-    "Find broken links."
-    lcheck_path = os.path.dirname(
-        os.path.abspath(__file__)) + '/lcheck.rb'
+    if profile is not None:
+        profile.print_profile(sys.stderr)
 
-    master_adocs = []
-    for file in files:
-        if os.path.basename(file) == 'master.adoc':
-            master_adocs.append(file)
+    sys.exit(2 if report.count else 0)
 
-    if master_adocs:
-        os.system(f'ruby {lcheck_path} {master_adocs}')
-    else:
-        logging.error('No master.adoc detected.')
@@ -0,0 +1,140 @@
+import json
+import re
+from abc import ABC, abstractmethod
+from typing import Optional, TextIO
+from urllib.parse import quote
+
+from enki_msg import Location
+
+
+SARIF_VERSION = '2.1.0'
+SARIF_SCHEMA = 'https://json.schemastore.org/sarif-2.1.0.json'
+INFORMATION_URI = 'https://github.com/Levi-Leah/enki'
+
+# Characters that do not appear in rule IDs
+RULE_SEPARATORS = re.compile('[^a-z0-9]+')
+
+# Quote a string as JSON; the C implementation that json.dumps uses
+encode_string = json.encoder.encode_basestring  # type: ignore[attr-defined]
+
+
+def rule_id(category: str) -> str:
+    """Return the stable ID of the check that reports a category, like `related-information-section`."""
+    return RULE_SEPARATORS.sub('-', category.lower()).strip('-')
+
+
+class FindingWriter(ABC):
+    """Write findings as one JSON document without keeping them in memory.
+
+    Findings are written as they arrive. The strings that repeat from
+    finding to finding, the category and the file, are quoted once.
+    """
+
+    def __init__(self, stream: TextIO):
+        self.stream = stream
+        self.count = 0
+        self.started = False
+        # category: index of its rule, in order of the first finding
+        self.rules: dict[str, int] = {}
+        self.categories: dict[str, str] = {}
+        self._file_path: Optional[str] = None
+        self._file = ''
+
+    def add(self, category: str, file_path: str, location: Optional[Location]) -> None:
+        """Write a finding."""
+        if not self.started:
+            self.stream.write(self.header())
+            self.started = True
+
+        if category not in self.rules:
+            self.rules[category] = len(self.rules)
+            self.categories[category] = self.quote_category(category)
+        if file_path != self._file_path:
+            # findings arrive grouped by file
+            self._file_path = file_path
+            self._file = self.quote_file(file_path)
+
+        self.stream.write((',\n' if self.count else '\n') + self.finding(category, location))
+        self.count += 1
+
+    def close(self, files: int, seconds: float) -> None:
+        """Write the end of the document."""
+        if not self.started:
+            self.stream.write(self.header())
+        self.stream.write(self.footer(files, seconds))
+        self.stream.flush()
+
+    def summary(self, files: int, seconds: float) -> str:
+        return json.dumps({'findings': self.count, 'files': files, 'time': round(seconds, 3)})
+
+    def quote_category(self, category: str) -> str:
+        return encode_string(category)
+
+    def quote_file(self, file_path: str) -> str:
+        return encode_string(file_path)
+
+    @abstractmethod
+    def header(self) -> str:
+        """Return the start of the document, up to the first finding."""
+
+    @abstractmethod
+    def finding(self, category: str, location: Optional[Location]) -> str:
+        """Return a finding of the current file."""
+
+    @abstractmethod
+    def footer(self, files: int, seconds: float) -> str:
+        """Return the end of the document, after the last finding."""
+
+
+class JsonWriter(FindingWriter):
+    """Write findings as a JSON object with a `findings` list and a `summary`."""
+
+    def quote_category(self, category: str) -> str:
+        return f'"rule": {encode_string(rule_id(category))}, "category": {encode_string(category)}'
+
+    def header(self) -> str:
+        return '{"findings": ['
+
+    def finding(self, category: str, location: Optional[Location]) -> str:
+        position = f', "line": {location[0]}, "column": {location[1]}' if location else ''
+        return f'{{{self.categories[category]}, "file": {self._file}{position}}}'
+
+    def footer(self, files: int, seconds: float) -> str:
+        return f'\n], "summary": {self.summary(files, seconds)}}}\n'
+
+
+class SarifWriter(FindingWriter):
+    """Write findings as a SARIF 2.1.0 log, for code scanning tools.
+
+    Each category is a rule. The rules are listed after the results, as
+    they are only known once all findings are written.
+    """
+
+    def quote_category(self, category: str) -> str:
+        return (f'"ruleId": {encode_string(rule_id(category))}, "ruleIndex": {self.rules[category]}, '
+                f'"level": "error", "message": {{"text": {encode_string(category + " found.")}}}')
+
+    def quote_file(self, file_path: str) -> str:
+        # artifact locations are relative URI references
+        return encode_string(quote(file_path.replace('\\', '/')))
+
+    def header(self) -> str:
+        return (f'{{"version": "{SARIF_VERSION}", "$schema": "{SARIF_SCHEMA}", '
+                f'"runs": [{{"results": [')
+
+    def finding(self, category: str, location: Optional[Location]) -> str:
+        region = (f', "region": {{"startLine": {location[0]}, "startColumn": {location[1]}}}'
+                  if location else '')
+        return (f'{{{self.categories[category]}, "locations": [{{"physicalLocation": '
+                f'{{"artifactLocation": {{"uri": {self._file}}}{region}}}}}]}}')
+
+    def footer(self, files: int, seconds: float) -> str:
+        rules = [{'id': rule_id(category), 'shortDescription': {'text': category}}
+                 for category in self.rules]
+        driver = {'name': 'enki', 'informationUri': INFORMATION_URI, 'rules': rules}
+        return (f'\n], "tool": {{"driver": {json.dumps(driver)}}}, '
+                f'"properties": {{"summary": {self.summary(files, seconds)}}}}}]}}\n')
+
+
+# Writers of the output formats of `--format`
+FORMAT_WRITERS: dict[str, type[FindingWriter]] = {'sarif': SarifWriter, 'json': JsonWriter}
@@ -0,0 +1,27 @@
+import os
+import subprocess
+
+
+def git(*args: str) -> str:
+    """Run a git command in the current directory and return its output."""
+    result = subprocess.run(['git', *args], capture_output=True, text=True, check=True)
+    return result.stdout
+
+
+def changed_files(rev: str) -> set[str]:
+    """Get the adoc files that changed since a revision.
+
+    Includes modified, added, and untracked files; deleted files are skipped.
+    Files of the whole repository are listed, even when run from a
+    subdirectory. Raises subprocess.CalledProcessError if git fails.
+    """
+    top_level = git('rev-parse', '--show-toplevel').strip()
+
+    names = git('diff', '--name-only', '--diff-filter=d', rev, '--', ':(top)*.adoc').splitlines()
+    names += git('ls-files', '--others', '--exclude-standard', '--full-name', '--', ':(top)*.adoc').splitlines()
+
+    files = set()
+    for name in names:
+        files.add(os.path.realpath(os.path.join(top_level, name)))
+
+    return files
@@ -0,0 +1,186 @@
+import asyncio
+import time
+from contextlib import asynccontextmanager
+from typing import AsyncIterator, Iterable, Optional
+from urllib.parse import urlsplit
+
+import aiohttp
+
+from enki_links import DEFAULT_CONCURRENCY, DEFAULT_PER_HOST, DEFAULT_RATE, DEFAULT_TIMEOUT
+
+
+# Upper limit of seconds to wait when a host asks to retry later
+MAX_RETRY_DELAY = 10
+
+# Bytes of a GET response body that are read to keep the connection open
+MAX_DRAINED_BODY = 64 * 1024
+
+HEADERS = {'User-Agent': 'enki link checker'}
+
+
+class TokenBucket():
+    """Allow `rate` requests per second on average, and bursts of up to `capacity` requests."""
+
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = float(capacity)
+        self.updated = time.monotonic()
+
+    async def acquire(self) -> None:
+        """Wait until a request is allowed and take its token."""
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            if self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class HostScheduler():
+    """Limit the concurrent requests, overall and per host, and the request rate of each host.
+
+    Requests to one host wait for a slot of that host without holding up
+    the requests to other hosts. Every request takes a token, so the rate
+    counts the GET fallbacks and retries of a link too. A rate of 0 means
+    that requests are not throttled. A request starts only when it has a
+    slot, so it never waits for a pooled connection, and its timeout does
+    not include the time spent queued.
+    """
+
+    def __init__(
+            self,
+            per_host: int = DEFAULT_PER_HOST,
+            rate: float = DEFAULT_RATE,
+            concurrency: int = DEFAULT_CONCURRENCY):
+        self.per_host = per_host
+        self.rate = rate
+        self.connections = asyncio.Semaphore(concurrency)
+        self.hosts: dict[str, tuple[asyncio.Semaphore, Optional[TokenBucket]]] = {}
+
+    @asynccontextmanager
+    async def slot(self, host: str) -> AsyncIterator[None]:
+        """Wait for a free connection and a token of a host for one request, and keep the connection while in use."""
+        if host not in self.hosts:
+            bucket = TokenBucket(self.rate, self.per_host) if self.rate else None
+            self.hosts[host] = (asyncio.Semaphore(self.per_host), bucket)
+        semaphore, bucket = self.hosts[host]
+
+        # the host slot and its token first, so that a request waiting for its host does not hold a connection
+        async with semaphore:
+            if bucket is not None:
+                await bucket.acquire()
+            async with self.connections:
+                yield
+
+
+def retry_delay(response: aiohttp.ClientResponse) -> float:
+    """Return the seconds that a throttled request should wait before a retry."""
+    try:
+        delay = float(response.headers.get('Retry-After', 1))
+    except ValueError:
+        # an HTTP date; waiting the longest time is simpler than parsing it
+        delay = MAX_RETRY_DELAY
+    return min(max(delay, 0), MAX_RETRY_DELAY)
+
+
+def redirect_target(response: aiohttp.ClientResponse) -> Optional[str]:
+    """Return the URL that a response was redirected to, or None."""
+    return str(response.url) if response.history else None
+
+
+async def probe(session: aiohttp.ClientSession, scheduler: HostScheduler, link: str) -> tuple[int, Optional[str]]:
+    """Return the HTTP status of a link and the URL it redirects to, if any.
+
+    HEAD is sent first, so that page bodies are not downloaded. Some servers
+    do not support HEAD or answer it with an error, so GET is sent when HEAD
+    fails. A throttled request is repeated once after the requested delay.
+    Each request waits for its own slot of the scheduler, and no slot is
+    held during the delay.
+    """
+    host = urlsplit(link).hostname or ''
+
+    try:
+        async with scheduler.slot(host), session.head(link, allow_redirects=True) as response:
+            status = response.status
+            redirect = redirect_target(response)
+            delay = retry_delay(response) if status == 429 else 0
+    except (aiohttp.ClientConnectorError, aiohttp.InvalidURL):
+        # GET would not connect either
+        raise
+    except aiohttp.ClientError:
+        status, delay = 0, 0
+
+    if status and status < 400:
+        return status, redirect
+
+    for attempt in range(2):
+        if delay:
+            await asyncio.sleep(delay)
+        async with scheduler.slot(host), session.get(link) as response:
+            status = response.status
+            redirect = redirect_target(response)
+            if response.content_length is not None and response.content_length <= MAX_DRAINED_BODY:
+                # a connection returns to the pool only after the whole body is read; a large
+                # body, or one of unknown length, is not downloaded, and the connection is closed
+                await response.read()
+            if status != 429 or attempt:
+                return status, redirect
+            delay = retry_delay(response)
+
+    return status, redirect
+
+
+class LinkResult():
+    """The outcome of a link check.
+
+    `error` is None if the link works. `status` is None if the server did
+    not answer, and `redirect` is the URL that the link redirects to, if any.
+    """
+
+    def __init__(self, error: Optional[str], status: Optional[int] = None, redirect: Optional[str] = None):
+        self.error = error
+        self.status = status
+        self.redirect = redirect
+
+
+async def check_link(session: aiohttp.ClientSession, scheduler: HostScheduler, link: str) -> LinkResult:
+    """Request a link and return the result of the check."""
+    if not link.startswith(('http://', 'https://')):
+        return LinkResult('Bad URI')
+
+    try:
+        status, redirect = await probe(session, scheduler, link)
+    except aiohttp.InvalidURL:
+        return LinkResult('Invalid URL')
+    except asyncio.TimeoutError:
+        return LinkResult('TimeoutError')
+    except aiohttp.ClientError:
+        return LinkResult('Connection error')
+    except ValueError:
+        # for example, a port number out of range
+        return LinkResult('Invalid URL')
+
+    return LinkResult(str(status) if status >= 400 else None, status, redirect)
+
+
+async def check_links_async(
+        links: Iterable[str],
+        concurrency: int = DEFAULT_CONCURRENCY,
+        timeout: float = DEFAULT_TIMEOUT,
+        per_host: int = DEFAULT_PER_HOST,
+        rate: float = DEFAULT_RATE) -> dict[str, LinkResult]:
+    """Check links concurrently and map each link to the result of its check."""
+    links = list(links)
+    scheduler = HostScheduler(per_host, rate, concurrency)
+
+    # the connector pools keep-alive connections per host and caps how many are open
+    connector = aiohttp.TCPConnector(limit=concurrency, limit_per_host=per_host)
+    client_timeout = aiohttp.ClientTimeout(total=timeout)
+
+    async with aiohttp.ClientSession(connector=connector, timeout=client_timeout, headers=HEADERS) as session:
+        results = await asyncio.gather(*(check_link(session, scheduler, link) for link in links))
+
+    return dict(zip(links, results))
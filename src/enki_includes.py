@@ -0,0 +1,68 @@
+import os
+from collections import deque
+from typing import Iterable, Optional
+
+from enki_regex import Regexes
+
+
+def include_targets(path: str, content: str) -> list[str]:
+    """Resolve the targets of the include statements in a file.
+
+    Targets that use attributes cannot be resolved and are skipped.
+    """
+    targets = []
+    file_dir = os.path.dirname(path)
+
+    for statement in Regexes.INCLUDE_STATEMENT.findall(content):
+        target = statement[len('include::'):].split('[', 1)[0]
+        if not target or '{' in target:
+            continue
+        targets.append(os.path.realpath(os.path.join(file_dir, target)))
+
+    return targets
+
+
+def read_includes(files: Iterable[str]) -> dict[str, list[str]]:
+    """Map each file to the files it includes."""
+    includes = {}
+
+    for path in files:
+        try:
+            with open(path, 'r') as file:
+                includes[path] = include_targets(path, file.read())
+        except (OSError, UnicodeDecodeError):
+            includes[path] = []
+
+    return includes
+
+
+def including_files(includes: dict[str, list[str]]) -> dict[str, list[str]]:
+    """Reverse the include graph: map each file to the files that include it."""
+    included_by: dict[str, list[str]] = {}
+
+    for path, targets in includes.items():
+        for target in targets:
+            included_by.setdefault(target, []).append(path)
+
+    return included_by
+
+
+def dependents(
+        changed: Iterable[str],
+        included_by: dict[str, list[str]],
+        limit_to: Optional[set[str]] = None) -> set[str]:
+    """Get the changed files and every file that includes them, transitively."""
+    seen = set(changed)
+    queue = deque(seen)
+
+    while queue:
+        path = queue.popleft()
+        for parent in included_by.get(path, []):
+            if parent not in seen:
+                seen.add(parent)
+                queue.append(parent)
+
+    if limit_to is not None:
+        seen &= limit_to
+
+    return seen
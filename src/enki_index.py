@@ -0,0 +1,218 @@
+import hashlib
+import logging
+import os
+import sqlite3
+from typing import Iterable, Optional
+
+from enki_includes import include_targets, read_includes
+from enki_regex import Regexes
+from enki_strip import LineIndex, Locator, OffsetMap, strip_comments
+
+
+# Bump when the tables or the way files are parsed change
+INDEX_VERSION = 1
+
+SCHEMA = '''
+DROP TABLE IF EXISTS files;
+DROP TABLE IF EXISTS includes;
+DROP TABLE IF EXISTS anchors;
+DROP TABLE IF EXISTS xrefs;
+CREATE TABLE files (path TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER, digest TEXT, content_type TEXT);
+CREATE TABLE includes (path TEXT, target TEXT);
+CREATE TABLE anchors (path TEXT, anchor TEXT, line INTEGER);
+CREATE TABLE xrefs (path TEXT, target TEXT, line INTEGER);
+CREATE INDEX includes_path ON includes (path);
+CREATE INDEX includes_target ON includes (target);
+CREATE INDEX anchors_path ON anchors (path);
+CREATE INDEX anchors_anchor ON anchors (anchor);
+CREATE INDEX xrefs_path ON xrefs (path);
+CREATE INDEX xrefs_target ON xrefs (target);
+'''
+
+
+class FileMetadata():
+    """What other files and tools need to know about a file without reading it."""
+
+    def __init__(
+            self,
+            content_type: Optional[str] = None,
+            includes: Optional[list[str]] = None,
+            anchors: Optional[list[tuple[str, int]]] = None,
+            xrefs: Optional[list[tuple[str, int]]] = None):
+        self.content_type = content_type
+        # real paths of the included files
+        self.includes = includes or []
+        # (ID, line) of each anchor and (target, line) of each cross reference
+        self.anchors = anchors or []
+        self.xrefs = xrefs or []
+
+
+def read_metadata(path: str, content: str) -> FileMetadata:
+    """Parse the content type, includes, anchors and cross references of a file.
+
+    Includes are resolved like `read_includes` resolves them. The other
+    metadata is read from the file without its comments.
+    """
+    offsets = OffsetMap()
+    stripped = strip_comments(content, offsets)
+    locate = Locator(LineIndex(content), offsets)
+
+    content_type = Regexes.CONTENT_TYPE.search(stripped)
+    anchors = [(next(group for group in anchor.groups() if group), locate(anchor.start())[0])
+               for anchor in Regexes.ANCHOR.finditer(stripped)]
+    xrefs = [(xref.group(1) or xref.group(2), locate(xref.start())[0])
+             for xref in Regexes.XREF.finditer(stripped)]
+
+    return FileMetadata(content_type.group(1) if content_type else None,
+                        include_targets(path, content), anchors, xrefs)
+
+
+class MetadataIndex():
+    """Keep the metadata of files in an SQLite database in the cache directory.
+
+    A file is parsed again only when its modification time or size changed
+    and its content hash differs from the indexed one. Files are keyed by
+    their real path. Other tools can query the database directly; the
+    tables are `files`, `includes`, `anchors` and `xrefs`.
+    """
+
+    def __init__(self, cache_dir: str):
+        os.makedirs(cache_dir, exist_ok=True)
+        self.path = os.path.join(cache_dir, 'index.sqlite3')
+        self.connection = sqlite3.connect(self.path, timeout=30)
+
+        version = self.connection.execute('PRAGMA user_version').fetchone()[0]
+        if version != INDEX_VERSION:
+            self.connection.executescript(SCHEMA + f'PRAGMA user_version = {INDEX_VERSION};')
+
+    def close(self) -> None:
+        self.connection.close()
+
+    def refresh(self, files: Iterable[str]) -> list[str]:
+        """Parse the files that changed since they were indexed, and return their real paths.
+
+        Files that no longer exist are removed from the index, and so are
+        the indexed files in the directory of the files that were deleted or
+        renamed since. Other indexed files are kept, so refreshing a subset
+        of the files does not drop the rest.
+        """
+        paths = list(dict.fromkeys(map(os.path.realpath, files)))
+        refreshed = []
+
+        with self.connection:
+            # only the rows of these files are read
+            self.connection.execute('CREATE TEMP TABLE IF NOT EXISTS seen (path TEXT PRIMARY KEY)')
+            self.connection.execute('DELETE FROM seen')
+            self.connection.executemany('INSERT INTO seen VALUES (?)', [(path,) for path in paths])
+            indexed = {path: (mtime_ns, size, digest) for path, mtime_ns, size, digest in self.connection.execute(
+                'SELECT path, mtime_ns, size, digest FROM files JOIN seen USING (path)')}
+
+            for path in paths:
+                stamp = indexed.get(path)
+                try:
+                    stat = os.stat(path)
+                    if stamp is not None and stamp[:2] == (stat.st_mtime_ns, stat.st_size):
+                        continue
+                    with open(path, 'rb') as file:
+                        data = file.read()
+                except OSError:
+                    if stamp is not None:
+                        self.remove(path)
+                    continue
+
+                digest = hashlib.sha256(data).hexdigest()
+                if stamp is not None and stamp[2] == digest:
+                    # touched, but not changed
+                    self.connection.execute('UPDATE files SET mtime_ns = ?, size = ? WHERE path = ?',
+                                            (stat.st_mtime_ns, stat.st_size, path))
+                    continue
+
+                try:
+                    metadata = read_metadata(path, data.decode())
+                except UnicodeDecodeError:
+                    metadata = FileMetadata()
+
+                self.remove(path)
+                self.connection.execute('INSERT INTO files VALUES (?, ?, ?, ?, ?)',
+                                        (path, stat.st_mtime_ns, stat.st_size, digest, metadata.content_type))
+                self.connection.executemany('INSERT INTO includes VALUES (?, ?)',
+                                            [(path, target) for target in metadata.includes])
+                self.connection.executemany('INSERT INTO anchors VALUES (?, ?, ?)',
+                                            [(path, anchor, line) for anchor, line in metadata.anchors])
+                self.connection.executemany('INSERT INTO xrefs VALUES (?, ?, ?)',
+                                            [(path, target, line) for target, line in metadata.xrefs])
+                refreshed.append(path)
+
+            if paths:
+                self.prune(os.path.commonpath([os.path.dirname(path) for path in paths]))
+
+        return refreshed
+
+    def prune(self, directory: str) -> None:
+        """Remove the indexed files in a directory that no longer exist.
+
+        The files of the last refresh were already checked.
+        """
+        prefix = os.path.join(directory, '')
+        unseen = self.connection.execute(
+            'SELECT path FROM files WHERE substr(path, 1, ?) = ? AND path NOT IN (SELECT path FROM seen)',
+            (len(prefix), prefix)).fetchall()
+        for path, in unseen:
+            try:
+                os.stat(path)
+            except FileNotFoundError:
+                self.remove(path)
+
+    def remove(self, path: str) -> None:
+        """Remove a file from the index."""
+        for table in ['files', 'includes', 'anchors', 'xrefs']:
+            self.connection.execute(f'DELETE FROM {table} WHERE path = ?', (path,))
+
+    def content_type(self, path: str) -> Optional[str]:
+        """Return the content type of an indexed file, like `PROCEDURE`, or None if it has none."""
+        row = self.connection.execute(
+            'SELECT content_type FROM files WHERE path = ?', (os.path.realpath(path),)).fetchone()
+        return row[0] if row else None
+
+    def includes(self, files: Iterable[str]) -> dict[str, list[str]]:
+        """Map each indexed file to the files it includes, like `read_includes`."""
+        includes = {}
+        for path in files:
+            rows = self.connection.execute(
+                'SELECT target FROM includes WHERE path = ? ORDER BY rowid', (os.path.realpath(path),))
+            includes[path] = [target for target, in rows]
+        return includes
+
+    def included_by(self, path: str) -> list[str]:
+        """Return the indexed files that include a file."""
+        rows = self.connection.execute(
+            'SELECT DISTINCT path FROM includes WHERE target = ? ORDER BY path', (os.path.realpath(path),))
+        return [including for including, in rows]
+
+    def anchors(self, anchor: str) -> list[tuple[str, int]]:
+        """Return the files and lines that define an anchor."""
+        return self.connection.execute(
+            'SELECT path, line FROM anchors WHERE anchor = ? ORDER BY path, line', (anchor,)).fetchall()
+
+    def xrefs(self, target: str) -> list[tuple[str, int]]:
+        """Return the files and lines of the cross references to a target, as written in the xref."""
+        return self.connection.execute(
+            'SELECT path, line FROM xrefs WHERE target = ? ORDER BY path, line', (target,)).fetchall()
+
+
+def indexed_includes(files: list[str], cache_dir: str) -> dict[str, list[str]]:
+    """Map each file to the files it includes, reading only the files that changed since the last run.
+
+    If the index cannot be used, all files are read.
+    """
+    try:
+        index = MetadataIndex(cache_dir)
+        try:
+            refreshed = index.refresh(files)
+            logging.debug(f'Files indexed: {len(refreshed)}. Files unchanged: {len(files) - len(refreshed)}.')
+            return index.includes(files)
+        finally:
+            index.close()
+    except (OSError, sqlite3.Error) as e:
+        logging.debug(f'Cannot use the metadata index: {e}')
+        return read_includes(files)
@@ -0,0 +1,66 @@
+import re
+import shutil
+import tempfile
+import time
+from typing import Optional, TextIO
+
+
+# Characters escaped in attribute values
+ATTRIBUTE_ENTITIES = str.maketrans({
+    '&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', '\n': '&#10;', '\r': '&#13;', '\t': '&#9;'})
+
+
+SPECIAL_CHARACTERS = re.compile('[&<>"\n\r\t]')
+
+
+def attribute(value: str) -> str:
+    """Quote an XML attribute value."""
+    if SPECIAL_CHARACTERS.search(value):
+        value = value.translate(ATTRIBUTE_ENTITIES)
+    return '"' + value + '"'
+
+
+class JUnitWriter():
+    """Write failed test cases as JUnit XML, in the layout of the junit_xml package.
+
+    The test suite element carries the number of test cases, so the test
+    cases are spooled to a temporary file until `close`, and memory does
+    not grow with the number of test cases.
+    """
+
+    def __init__(self, stream: TextIO, suite_name: str = 'ValidationErrors'):
+        self.stream = stream
+        self.suite_name = suite_name
+        self.count = 0
+        self.cases: Optional[TextIO] = None
+
+    def add_failure(self, name: str, message: str, file: str, line: Optional[int], seconds: float) -> None:
+        """Write a test case that failed with an error."""
+        if self.cases is None:
+            self.cases = tempfile.TemporaryFile('w+')
+        self.count += 1
+
+        line_attribute = f' line="{line}"' if line else ''
+        self.cases.write(
+            f'\t\t<testcase name={attribute(name)} time="{seconds:f}" timestamp="{time.time()}" '
+            f'classname="ValidationTests" status="status" class="class" file={attribute(file)}'
+            f'{line_attribute} log="log" url="url">\n'
+            f'\t\t\t<failure type="ERROR" message={attribute(message)}/>\n'
+            f'\t\t</testcase>\n')
+
+    def close(self, seconds: float) -> None:
+        """Write the test suite with all test cases."""
+        counts = f'disabled="0" errors="0" failures="{self.count}"'
+        self.stream.write('<?xml version="1.0" ?>\n')
+        self.stream.write(f'<testsuites {counts} tests="{self.count}" time="{seconds}">\n')
+        self.stream.write(f'\t<testsuite {counts} name={attribute(self.suite_name)} skipped="0" '
+                          f'tests="{self.count}" time="{seconds}">\n')
+
+        if self.cases is not None:
+            self.cases.seek(0)
+            shutil.copyfileobj(self.cases, self.stream)
+            self.cases.close()
+            self.cases = None
+
+        self.stream.write('\t</testsuite>\n</testsuites>\n')
+        self.stream.flush()
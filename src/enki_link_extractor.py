@@ -0,0 +1,295 @@
+import os
+import re
+from typing import Iterator, Optional
+
+from enki_msg import Location
+from enki_regex import Regexes
+
+
+# Upper limit of nested includes, as in Asciidoctor
+MAX_INCLUDE_DEPTH = 64
+
+# Attributes that Asciidoctor defines in every document and that can appear in links
+INTRINSIC_ATTRIBUTES = {
+    'empty': '', 'sp': ' ', 'startsb': '[', 'endsb': ']', 'vbar': '|', 'caret': '^',
+    'asterisk': '*', 'tilde': '~', 'backtick': '`', 'plus': '+', 'amp': '&', 'lt': '<', 'gt': '>',
+}
+
+# link: {file: location of the first occurrence of the link in the file}
+Links = dict[str, dict[str, Location]]
+
+# path, line number, text, and the parsed directive, attribute entry or
+# block delimiter on the line, if any, like ('include', 'modules/con_file.adoc')
+ParsedLine = tuple[str, int, str, Optional[tuple]]
+
+
+class LinkExtractor():
+    """Find the links in books without converting them.
+
+    A book is read line by line in document order, like the Asciidoctor
+    preprocessor reads it: include directives are replaced by the lines of
+    the included file, and conditional content is kept or dropped with the
+    attributes defined so far. Attribute references are substituted in
+    include targets and in the lines that are searched for links. Comments,
+    and listing, literal and passthrough blocks, do not contain links.
+
+    The `lines` and `tags` include options are not applied, so a partially
+    included file contributes all of its links.
+    """
+
+    def __init__(self):
+        self.links: Links = {}
+        # files read, as real paths
+        self.files: set[str] = set()
+        self.attributes: dict[str, str] = {}
+        # for each open conditional, whether its content is skipped
+        self.conditionals: list[bool] = []
+        # (including file, include target): real path of the target
+        self.resolved: dict[tuple[str, str], str] = {}
+        # path: parsed lines of the file, or None if it cannot be read
+        self.parsed: dict[str, Optional[list[ParsedLine]]] = {}
+
+    def extract(self, master_adoc: str) -> None:
+        """Add the links of a book."""
+        self.attributes = dict(INTRINSIC_ATTRIBUTES)
+        self.conditionals = []
+        # the delimiter of the open comment or verbatim block
+        delimiter: Optional[str] = None
+
+        for path, line_number, line, directive in self.lines(os.path.realpath(master_adoc)):
+            if delimiter is not None:
+                if directive is not None and directive[1] == delimiter:
+                    delimiter = None
+                continue
+
+            if directive is not None:
+                if directive[0] == 'delimiter':
+                    delimiter = directive[1]
+                else:
+                    self.define(directive[1], directive[2])
+            elif not line.startswith('//'):
+                self.find_links(path, line_number, line)
+
+    def lines(self, master_adoc: str) -> Iterator[ParsedLine]:
+        """Yield the parsed lines of a book, with the included lines, except the preprocessor directives.
+
+        Lines are yielded one at a time, so conditionals are evaluated with
+        the attributes that the caller defined up to the line before.
+        """
+        # the files being read, innermost last
+        stack: list[tuple[str, Iterator[ParsedLine]]] = []
+        self.push(stack, master_adoc)
+
+        while stack:
+            path, parsed_lines = stack[-1]
+
+            for parsed_line in parsed_lines:
+                directive = parsed_line[3] or ('text',)
+                kind = directive[0]
+
+                if kind == 'endif':
+                    if self.conditionals:
+                        self.conditionals.pop()
+                    continue
+
+                if kind == 'if':
+                    content = self.open_conditional(directive)
+                    if content:
+                        yield path, parsed_line[1], content, None
+                    continue
+
+                if self.conditionals and True in self.conditionals:
+                    continue
+
+                if kind == 'include':
+                    target = self.substitute(directive[1])
+                    if '{' not in target and '://' not in target and len(stack) <= MAX_INCLUDE_DEPTH:
+                        self.push(stack, self.resolve(path, target))
+                        # continue with the first line of the included file
+                        break
+                    continue
+
+                yield parsed_line
+            else:
+                stack.pop()
+
+    def open_conditional(self, directive: tuple) -> Optional[str]:
+        """Open a conditional, or return the content of a single-line conditional whose condition holds."""
+        _kind, name, attributes, content = directive
+
+        # content nested in skipped content is skipped too
+        if True in self.conditionals or not self.condition(name, attributes):
+            if not content:
+                self.conditionals.append(True)
+            return None
+
+        if not content:
+            self.conditionals.append(False)
+        return content or None
+
+    def resolve(self, path: str, target: str) -> str:
+        """Return the real path of an include target."""
+        key = (path, target)
+        if key not in self.resolved:
+            self.resolved[key] = os.path.realpath(os.path.join(os.path.dirname(path), target))
+        return self.resolved[key]
+
+    def push(self, stack: list[tuple[str, Iterator[ParsedLine]]], path: str) -> None:
+        """Start reading a file, unless it cannot be read.
+
+        Each file is read and parsed once per run, however many books include it.
+        """
+        if path not in self.parsed:
+            try:
+                with open(path, 'r') as file:
+                    self.parsed[path] = parse_lines(path, file.read())
+            except (OSError, UnicodeDecodeError):
+                self.parsed[path] = None
+
+        parsed_lines = self.parsed[path]
+        if parsed_lines is not None:
+            self.files.add(path)
+            stack.append((path, iter(parsed_lines)))
+
+    def condition(self, directive: str, names: str) -> bool:
+        """Evaluate the condition of an ifdef or ifndef directive.
+
+        Names separated with `,` are true if any attribute is defined, and
+        names separated with `+` if all are. The expressions of ifeval are
+        not evaluated, so their content is always kept.
+        """
+        if directive == 'ifeval':
+            return True
+
+        if ',' not in names and '+' not in names:
+            defined = names in self.attributes
+        elif ',' in names:
+            defined = any(name in self.attributes for name in names.split(','))
+        else:
+            defined = all(name in self.attributes for name in names.split('+'))
+        return defined if directive == 'ifdef' else not defined
+
+    def define(self, name: str, value: str) -> None:
+        """Set or unset a document attribute."""
+        if name.startswith('!') or name.endswith('!'):
+            self.attributes.pop(name.strip('!').lower(), None)
+        else:
+            self.attributes[name.lower()] = self.substitute(value)
+
+    def substitute(self, text: str) -> str:
+        """Replace the references to defined attributes. Other references are kept."""
+        if '{' not in text:
+            return text
+        return Regexes.ATTRIBUTE_REFERENCE.sub(self._attribute_value, text)
+
+    def _attribute_value(self, reference: re.Match) -> str:
+        if reference.group(1) is None and reference.group(2).lower() in self.attributes:
+            return self.attributes[reference.group(2).lower()]
+        return reference.group(0)
+
+    def original_column(self, line: str, offset: int) -> int:
+        """Return the 1-based column in a line of an offset in the line after substitution.
+
+        An offset inside a substituted value is placed on its reference.
+        """
+        shift = 0
+        for reference in Regexes.ATTRIBUTE_REFERENCE.finditer(line):
+            start = reference.start() + shift
+            if offset < start:
+                break
+            value = self._attribute_value(reference)
+            if offset < start + len(value):
+                return reference.start() + 1
+            shift += len(value) - len(reference.group(0))
+        return offset - shift + 1
+
+    def find_links(self, path: str, line_number: int, line: str) -> None:
+        """Add the links in a line."""
+        text = self.substitute(line)
+
+        for link in Regexes.LINK.finditer(text):
+            if link.group(1):
+                # escaped
+                continue
+            target = link.group(2) or link.group(3)
+            column = self.original_column(line, link.start()) if text is not line else link.start() + 1
+            self.links.setdefault(target, {}).setdefault(path, (line_number, column))
+
+
+def comment_delimiter(line: str) -> Optional[tuple]:
+    """Parse a comment block delimiter."""
+    stripped = line.rstrip()
+    if line.startswith('////') and not stripped.strip('/'):
+        return ('delimiter', stripped)
+    return None
+
+
+def endif_directive(line: str) -> Optional[tuple]:
+    """Parse the end of a conditional."""
+    return ('endif',) if line.startswith('endif::') else None
+
+
+def if_or_include_directive(line: str) -> Optional[tuple]:
+    """Parse the start of a conditional or an include directive."""
+    if line.startswith(('ifdef::', 'ifndef::', 'ifeval::')):
+        conditional = Regexes.CONDITIONAL_DIRECTIVE.match(line)
+        return ('if', *conditional.groups()) if conditional else None
+    if line.startswith('include::'):
+        include = Regexes.INCLUDE_DIRECTIVE.match(line)
+        return ('include', include.group(1)) if include else None
+    return None
+
+
+def verbatim_delimiter(line: str) -> Optional[tuple]:
+    """Parse a listing, literal or passthrough block delimiter."""
+    stripped = line.rstrip()
+    return ('delimiter', stripped) if Regexes.VERBATIM_DELIMITER.match(stripped) else None
+
+
+def attribute_entry(line: str) -> Optional[tuple]:
+    """Parse an attribute entry."""
+    entry = Regexes.ATTRIBUTE_ENTRY.match(line.rstrip())
+    return ('attribute', entry.group(1), entry.group(2) or '') if entry else None
+
+
+# the parser of the directives that can start with a character; lines that start with other characters are text
+DIRECTIVE_PARSERS = {
+    '/': comment_delimiter,
+    'e': endif_directive,
+    'i': if_or_include_directive,
+    '-': verbatim_delimiter,
+    '.': verbatim_delimiter,
+    '+': verbatim_delimiter,
+    ':': attribute_entry,
+}
+
+
+def parse_lines(path: str, content: str) -> list[ParsedLine]:
+    """Parse the lines of a file that can contain a link or change how later lines are read.
+
+    Other lines, most of the text, are dropped, so that a file that many
+    books include is cheap to read again.
+    """
+    parsed_lines: list[ParsedLine] = []
+
+    for line_number, line in enumerate(content.splitlines(), 1):
+        parse_directive = DIRECTIVE_PARSERS.get(line[:1])
+        directive = parse_directive(line) if parse_directive is not None else None
+
+        if directive is not None or '://' in line or 'link:' in line or '{' in line:
+            parsed_lines.append((path, line_number, line, directive))
+
+    return parsed_lines
+
+
+def extract_links(master_adocs: list[str]) -> tuple[Links, int]:
+    """Find the links in books and where each one is.
+
+    The files that several books include are read and filtered once, and
+    the links of all books are merged, so each link is checked once.
+    Return the links and the number of files in the books.
+    """
+    extractor = LinkExtractor()
+    for master_adoc in master_adocs:
+        extractor.extract(master_adoc)
+    return extractor.links, len(extractor.files)
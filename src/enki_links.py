@@ -0,0 +1,125 @@
+import logging
+import os
+import sys
+import time
+from typing import Iterable, Optional
+
+from enki_cache import LinkCache
+from enki_link_extractor import Links, extract_links
+from enki_msg import Report
+
+
+# Upper limit of connections open at the same time
+DEFAULT_CONCURRENCY = 32
+
+# Upper limit of connections open to one host at the same time
+DEFAULT_PER_HOST = 4
+
+# Requests per second sent to one host
+DEFAULT_RATE = 10.0
+
+# Seconds before a link check gives up
+DEFAULT_TIMEOUT = 30
+
+# Links that are not checked: anchors, local paths, and other protocols
+SKIPPED_PREFIXES = ('#', '/', 'tab.', 'file', 'mailto', 'ftp://')
+
+# Links to example and reserved hosts are not checked
+SKIPPED_PARTS = ('example', 'tools.ietf.org')
+
+SKIPPED_LINKS = ('', 'ftp.gnome.org')
+
+
+def should_check(link: str) -> bool:
+    """Check if a link points to a web page that should be checked."""
+    if link in SKIPPED_LINKS or link.startswith(SKIPPED_PREFIXES):
+        return False
+    lowercase = link.lower()
+    return not any(part in lowercase for part in SKIPPED_PARTS)
+
+
+def check_links(
+        links: Iterable[str],
+        concurrency: int = DEFAULT_CONCURRENCY,
+        timeout: float = DEFAULT_TIMEOUT,
+        per_host: int = DEFAULT_PER_HOST,
+        rate: float = DEFAULT_RATE,
+        cache: Optional[LinkCache] = None,
+        refresh: bool = False) -> dict[str, Optional[str]]:
+    """Check links and map each link to its error, or None if it works.
+
+    Links with a result in the cache that has not expired are not checked
+    again, unless `refresh` is set. The new results are stored in the cache.
+    """
+    links = list(links)
+    now = time.time()
+    errors: dict[str, Optional[str]] = {}
+
+    if cache is not None and not refresh:
+        for link in links:
+            entry = cache.get(link, now)
+            if entry is not None:
+                errors[link] = entry['error']
+
+    unchecked = [link for link in links if link not in errors]
+    if unchecked:
+        # imported here, aiohttp takes longer to import than a short validation run
+        import asyncio
+        from enki_http import check_links_async
+        results = asyncio.run(check_links_async(unchecked, concurrency, timeout, per_host, rate))
+        for link, result in results.items():
+            errors[link] = result.error
+            if cache is not None:
+                cache.put(link, result.status, result.error, result.redirect, now)
+
+    if cache is not None:
+        cache.save(now)
+
+    logging.debug(f'Links checked: {len(unchecked)}. Links found in the cache: {len(links) - len(unchecked)}.')
+    return {link: errors[link] for link in links}
+
+
+def links_report(links: Links, errors: dict[str, Optional[str]]) -> Report:
+    """Report each broken link where it is in the files that contain it."""
+    report = Report()
+
+    for link, files in links.items():
+        error = errors.get(link)
+        if error is not None:
+            for file, location in files.items():
+                report.create_report(f'Broken link {link} ({error})', file, location)
+
+    return report
+
+
+def links_validate(
+        files: list[str],
+        start_time: float,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        per_host: int = DEFAULT_PER_HOST,
+        rate: float = DEFAULT_RATE,
+        cache: Optional[LinkCache] = None,
+        refresh: bool = False) -> None:
+    """Find broken links in the books, print them, and exit with an error if there are any."""
+    master_adocs = [file for file in files if os.path.basename(file) == 'master.adoc']
+
+    if not master_adocs:
+        logging.error('No master.adoc detected.')
+        sys.exit(2)
+
+    links, files_checked = extract_links(master_adocs)
+
+    cwd = os.getcwd()
+    links = {link: {os.path.relpath(path, cwd): location for path, location in sorted(files.items())}
+             for link, files in links.items() if should_check(link)}
+    errors = check_links(links, concurrency, DEFAULT_TIMEOUT, per_host, rate, cache, refresh)
+    report = links_report(links, errors)
+
+    report.print_report(start_time)
+
+    broken_links = sum(error is not None for error in errors.values())
+    logging.info(f'Input files: {len(master_adocs)}. Files checked: {files_checked}. '
+                 f'Links checked: {len(links)}. Errors found: {broken_links}. '
+                 f'Time: {time.time() - start_time:.1f} s.')
+
+    sys.exit(2 if broken_links else 0)
@@ -1,55 +1,240 @@
-from datetime import datetime
+import json
 import logging
+import sys
 import time
-from typing import Optional
+from array import array
+from typing import TYPE_CHECKING, Iterator, Optional, TextIO
 
-from junit_xml import TestSuite, TestCase
+if TYPE_CHECKING:
+    import enki_formats
+    import enki_junit
+
+
+# 1-based line and column of a finding in the original file
+Location = tuple[int, int]
+
+
+def format_location(file_path: str, location: Optional[Location]) -> str:
+    """Format a file path with the line and column, if known."""
+    if location is None:
+        return file_path
+    return f'{file_path}:{location[0]}:{location[1]}'
+
+
+# category, file path and location of a finding
+Finding = tuple[str, str, Optional[Location]]
 
 
 class Report():
-    """Create and print report. thank u J."""
+    """Create and print report. thank u J.
+
+    Findings are stored as columns of integers: the category and the file
+    path of each finding are indexes in tables that hold each string once,
+    and the line and column are 0 if the location is unknown. Iteration
+    yields the findings grouped by category, in the order in which the
+    categories were first reported.
+    """
 
     def __init__(self):
         """Create placeholder for problem description."""
-        self.report: dict[str, list[str]] = {}
+        self.categories: list[str] = []
+        self.category_ids: dict[str, int] = {}
+        self.files: list[str] = []
+        self.file_ids: dict[str, int] = {}
+        # one entry per finding
+        self._category = array('I')
+        self._file = array('I')
+        self._line = array('I')
+        self._column = array('I')
+        # seconds spent validating each file
+        self.times: dict[str, float] = {}
         self.count = 0
 
-    def create_report(self, category: str, file_path: str) -> None:
+    def create_report(self, category: str, file_path: str, location: Optional[Location] = None) -> None:
         """Generate report."""
         self.count += 1
-        if not category in self.report:
-            self.report[category] = []
-        self.report[category].append(file_path)
+        category_id = self.category_ids.get(category)
+        if category_id is None:
+            category_id = self.category_ids[category] = len(self.categories)
+            # the same categories are reported in every file
+            self.categories.append(sys.intern(category))
+        file_id = self.file_ids.get(file_path)
+        if file_id is None:
+            file_id = self.file_ids[file_path] = len(self.files)
+            self.files.append(file_path)
+
+        self._category.append(category_id)
+        self._file.append(file_id)
+        line, column = location or (0, 0)
+        self._line.append(line)
+        self._column.append(column)
+
+    def _finding(self, i: int) -> Finding:
+        line = self._line[i]
+        return (self.categories[self._category[i]], self.files[self._file[i]],
+                (line, self._column[i]) if line else None)
+
+    def _grouped(self) -> list[int]:
+        # a stable sort keeps the findings of a category in the order they were reported
+        return sorted(range(len(self._category)), key=self._category.__getitem__)
+
+    def __iter__(self) -> Iterator[Finding]:
+        """Yield the findings grouped by category."""
+        return (self._finding(i) for i in self._grouped())
+
+    def sorted(self) -> Iterator[Finding]:
+        """Yield the findings sorted by file, line, column and category."""
+        keys = [(self.files[self._file[i]], self._line[i], self._column[i], self.categories[self._category[i]], i)
+                for i in range(len(self._category))]
+        return (self._finding(key[-1]) for key in sorted(keys))
+
+    def by_category(self) -> dict[str, list[tuple[str, Optional[Location]]]]:
+        """Group the file paths and locations of the findings by category."""
+        groups: dict[str, list[tuple[str, Optional[Location]]]] = {}
+        for category, file_path, location in self:
+            groups.setdefault(category, []).append((file_path, location))
+        return groups
+
+    def by_file(self) -> dict[str, list[tuple[str, Optional[Location]]]]:
+        """Group the categories and locations of the findings by file, in the order in which files were reported."""
+        groups: dict[str, list[tuple[str, Optional[Location]]]] = {file_path: [] for file_path in self.files}
+        for i in range(len(self._category)):
+            category, file_path, location = self._finding(i)
+            groups[file_path].append((category, location))
+        return {file_path: findings for file_path, findings in groups.items() if findings}
+
+    def deduplicate(self) -> None:
+        """Drop the findings that repeat an earlier finding."""
+        seen = set()
+        columns = (self._category, self._file, self._line, self._column)
+        kept: tuple[array, ...] = tuple(array('I') for _column in columns)
+
+        for finding in zip(*columns):
+            if finding not in seen:
+                seen.add(finding)
+                for column, value in zip(kept, finding):
+                    column.append(value)
+
+        self._category, self._file, self._line, self._column = kept
+        self.count = len(self._category)
+
+    @property
+    def report(self) -> dict[str, list[str]]:
+        """The file paths of the findings of each category."""
+        return {category: [file_path for file_path, _location in findings]
+                for category, findings in self.by_category().items()}
+
+    @property
+    def locations(self) -> dict[str, list[Optional[Location]]]:
+        """The locations of the findings of each category, in the same order as the file paths in `report`."""
+        return {category: [location for _file_path, location in findings]
+                for category, findings in self.by_category().items()}
+
+    def findings(self) -> list[list]:
+        """Return the findings as `[category, line, column]` lists, for storage."""
+        return [[category, *(location or (None, None))] for category, _file_path, location in self]
+
+    def add_findings(self, findings: list[list], file_path: str) -> None:
+        """Add findings returned by `findings` for a file."""
+        for category, line, column in findings:
+            self.create_report(category, file_path, (line, column) if line else None)
+
+    def merge(self, other: 'Report') -> None:
+        """Append the findings and the file times of another report."""
+        self.times.update(other.times)
+        for category, file_path, location in other:
+            self.create_report(category, file_path, location)
 
     def print_report(self, start_time: float, output: Optional[str] = None) -> None:
         """Print report."""
 
         if output == 'oneline':
-            for category, files in self.report.items():
-                for file in files:
-                    logging.error(f"{category} found: {file}")
+            for category, file, location in self:
+                logging.error(f"{category} found: {format_location(file, location)}")
             return
 
         if output == 'gitlab':
+            from enki_junit import JUnitWriter
+            writer = JUnitWriter(sys.stdout)
+            for category, file, location in self:
+                writer.add_failure(f'{category} found in {file}', f'{category} found.', file,
+                                   location[0] if location else None, self.times.get(file, 0.0))
+            writer.close(time.time() - start_time)
+            return
 
-            test_cases = []
-            end_time = time.time()
+        separator = "\n\t"
 
-            for category, files in self.report.items():
-                for file in files:
-                    # time num, sys out, sys err, assertions num,
-                    test_case = TestCase(f'{category} found in {file}', 'ValidationTests', (end_time - start_time),
-                                         '', '', '', datetime.timestamp(datetime.now()), 'status', 'class', file, 'line', 'log', 'url')
-                    test_case.add_failure_info(
-                        f'{category} found.', '', 'ERROR')
-                    test_cases.append(test_case)
+        for category, findings in self.by_category().items():
+            paths = [format_location(file, location) for file, location in findings]
+            logging.error(f"{category} found in the following files:\n\t{separator.join(paths)}\n")
 
-            ts = [TestSuite("ValidationErrors", test_cases)]
-            print(TestSuite.to_xml_string(ts, prettyprint=True))
 
-            return
+# Outputs of `--format`, written by enki_formats
+FORMATS = ['sarif', 'json']
 
-        separator = "\n\t"
+# Outputs that print each finding as soon as its file is validated
+STREAMING_OUTPUTS = ['oneline', 'jsonl', 'gitlab', *FORMATS]
+
+
+class StreamingReport(Report):
+    """Print findings as they are created instead of collecting them.
 
-        for category, files in self.report.items():
-            logging.error(f"{category} found in the following files:\n\t{separator.join(files)}\n")
+    Only the number of findings and of files with findings is kept, so
+    memory does not grow with the number of findings.
+    """
+
+    def __init__(self, output: str, stream: Optional[TextIO] = None):
+        super().__init__()
+        self.output = output
+        self.stream = stream or sys.stdout
+        self.file_count = 0
+        self._last_file: Optional[str] = None
+        # the output backends are imported when used, to keep short runs fast
+        self.junit: Optional['enki_junit.JUnitWriter'] = None
+        self.writer: Optional['enki_formats.FindingWriter'] = None
+        if output == 'gitlab':
+            from enki_junit import JUnitWriter
+            self.junit = JUnitWriter(self.stream)
+        elif output in FORMATS:
+            from enki_formats import FORMAT_WRITERS
+            self.writer = FORMAT_WRITERS[output](self.stream)
+
+    def merge(self, other: 'Report') -> None:
+        """Print the findings of another report; only the times of its files are kept."""
+        self.times = {}
+        super().merge(other)
+
+    def create_report(self, category: str, file_path: str, location: Optional[Location] = None) -> None:
+        """Print a finding."""
+        self.count += 1
+
+        # findings arrive grouped by file
+        if file_path != self._last_file:
+            self.file_count += 1
+            self._last_file = file_path
+
+        if self.output == 'jsonl':
+            finding: dict[str, object] = {'category': category, 'file': file_path}
+            if location:
+                finding['line'], finding['column'] = location
+            self.stream.write(json.dumps(finding) + '\n')
+            self.stream.flush()
+        elif self.writer is not None:
+            self.writer.add(category, file_path, location)
+        elif self.junit is not None:
+            self.junit.add_failure(f'{category} found in {file_path}', f'{category} found.', file_path,
+                                   location[0] if location else None, self.times.get(file_path, 0.0))
+        else:
+            logging.error(f"{category} found: {format_location(file_path, location)}")
+
+    def print_report(self, start_time: float, output: Optional[str] = None) -> None:
+        """Print the summary; the findings are already printed."""
+        if self.output == 'jsonl':
+            summary = {'findings': self.count, 'files': self.file_count,
+                       'time': round(time.time() - start_time, 3)}
+            self.stream.write(json.dumps({'summary': summary}) + '\n')
+            self.stream.flush()
+        elif self.writer is not None:
+            self.writer.close(self.file_count, time.time() - start_time)
+        elif self.junit is not None:
+            self.junit.close(time.time() - start_time)
@@ -0,0 +1,69 @@
+import heapq
+import time
+from typing import Callable, Optional, TextIO, TypeVar
+
+
+# Number of the slowest files that a profile keeps
+SLOWEST_FILES = 10
+
+T = TypeVar('T')
+
+
+class Profile():
+    """Collect wall time, call counts and characters scanned per validation stage.
+
+    Stages are named like 'strip.CODE_BLOCK_DASHES' or 'check.sudo_check'.
+    Profiles from pool workers are combined with `merge`.
+    """
+
+    def __init__(self):
+        # stage name: [seconds, calls, characters scanned]
+        self.stages: dict[str, list] = {}
+        # min-heap of (seconds, path) of the slowest files
+        self.slowest: list[tuple[float, str]] = []
+
+    def record(self, name: str, seconds: float, size: int = 0, calls: int = 1) -> None:
+        """Add a measurement of a stage."""
+        stage = self.stages.setdefault(name, [0.0, 0, 0])
+        stage[0] += seconds
+        stage[1] += calls
+        stage[2] += size
+
+    def record_file(self, path: str, seconds: float) -> None:
+        """Add the total validation time of a file."""
+        if len(self.slowest) < SLOWEST_FILES:
+            heapq.heappush(self.slowest, (seconds, path))
+        else:
+            heapq.heappushpop(self.slowest, (seconds, path))
+
+    def merge(self, other: 'Profile') -> None:
+        """Add the measurements of another profile."""
+        for name, (seconds, calls, size) in other.stages.items():
+            self.record(name, seconds, size, calls)
+        for seconds, path in other.slowest:
+            self.record_file(path, seconds)
+
+    def print_profile(self, stream: TextIO) -> None:
+        """Print the stages from slowest to fastest, and the slowest files."""
+        stream.write('Profile (wall time summed over all workers):\n')
+        stream.write(f"{'stage':<44}{'calls':>8}{'time (ms)':>12}{'M chars':>10}{'M chars/s':>11}\n")
+
+        for name, (seconds, calls, size) in sorted(self.stages.items(), key=lambda item: -item[1][0]):
+            chars = size / 1e6
+            rate = f'{chars / seconds:.1f}' if size and seconds else '-'
+            stream.write(f'{name:<44}{calls:>8}{seconds * 1000:>12.2f}{chars:>10.2f}{rate:>11}\n')
+
+        stream.write('\nSlowest files:\n')
+        for seconds, path in sorted(self.slowest, reverse=True):
+            stream.write(f'{seconds * 1000:>10.2f} ms  {path}\n')
+
+
+def profiled(profile: Optional[Profile], name: str, size: int, function: Callable[..., T], *args) -> T:
+    """Call a function and record its time in the profile, if there is one."""
+    if profile is None:
+        return function(*args)
+
+    start = time.perf_counter()
+    result = function(*args)
+    profile.record(name, time.perf_counter() - start, size)
+    return result
@@ -1,4 +1,145 @@
 import re
+from typing import Callable, Iterator, Optional
+
+
+def multi_line_comments(text: str) -> Iterator[tuple[int, int]]:
+    """Find multi-line comments in linear time.
+
+    Yields the spans that `(/{4,})(.*\\n)*?(/{4,})` matches, without the
+    backtracking that makes the regex quadratic when a delimiter is missing.
+    """
+    pos = 0
+    closing_found = True
+
+    while True:
+        if closing_found:
+            start = text.find('////', pos)
+        else:
+            # without a closing delimiter only a run of 8 or more slashes
+            # can match on its own
+            start = text.find('////////', pos)
+        if start < 0:
+            return
+
+        end = start + 4
+        while end < len(text) and text[end] == '/':
+            end += 1
+
+        if closing_found:
+            newline = text.find('\n', end)
+            closing = text.find('\n////', newline) if newline >= 0 else -1
+
+            if closing >= 0:
+                closing_end = closing + 5
+                while closing_end < len(text) and text[closing_end] == '/':
+                    closing_end += 1
+                yield start, closing_end
+                pos = closing_end
+                continue
+
+            # no later line starts with a delimiter
+            closing_found = False
+
+        if end - start >= 8:
+            yield start, end
+
+        pos = end
+
+
+def internal_conditionals(text: str) -> Iterator[tuple[int, int]]:
+    """Find internal conditionals in linear time.
+
+    Yields the spans that `(ifdef::internal\\[\\])(.*\\n)*?(endif::\\[\\])`
+    matches, without the backtracking that makes the regex quadratic when
+    the closing statement is missing.
+    """
+    opening = 'ifdef::internal[]'
+    closing = 'endif::[]'
+    pos = 0
+    closing_found = True
+
+    while True:
+        if closing_found:
+            start = text.find(opening, pos)
+        else:
+            # without a closing statement at a line start only a closing
+            # statement that directly follows the opening one can match
+            start = text.find(opening + closing, pos)
+        if start < 0:
+            return
+
+        # the closing statement either follows the opening statement
+        # directly or starts a later line
+        end = start + len(opening)
+        if text.startswith(closing, end):
+            closing_start = end
+        else:
+            newline = text.find('\n' + closing, end)
+            if newline < 0:
+                closing_found = False
+                pos = end
+                continue
+            closing_start = newline + 1
+
+        yield start, closing_start + len(closing)
+        pos = closing_start + len(closing)
+
+
+class LinearPattern:
+    """A pattern matched by a linear-time finder instead of `re`.
+
+    Supports the part of the `re.Pattern` interface used with the
+    stripping patterns.
+    """
+
+    def __init__(self, pattern: str, finder: Callable[[str], Iterator[tuple[int, int]]]):
+        self.pattern = pattern
+        self.finder = finder
+
+    def spans(self, string: str) -> Iterator[tuple[int, int]]:
+        """Yield the (start, end) spans of the matches."""
+        return self.finder(string)
+
+    def search(self, string: str) -> Optional[tuple[int, int]]:
+        """Return the span of the first match, or None."""
+        return next(self.finder(string), None)
+
+    def sub(self, repl: str, string: str) -> str:
+        """Replace every match with `repl`."""
+        pieces = []
+        pos = 0
+
+        for start, end in self.finder(string):
+            pieces.append(string[pos:start])
+            pieces.append(repl)
+            pos = end
+
+        if not pieces:
+            return string
+
+        pieces.append(string[pos:])
+        return ''.join(pieces)
+
+
+class LazyRegex:
+    """A regex compiled the first time it is used.
+
+    Most runs use a few of the patterns, and a short run spends a large part
+    of its time compiling them. On first access through the class, the
+    compiled pattern replaces the descriptor, so later uses cost nothing.
+    """
+
+    def __init__(self, pattern: str, flags: int = 0):
+        self.pattern = pattern
+        self.flags = flags
+
+    def __set_name__(self, owner: type, name: str) -> None:
+        self.name = name
+
+    def __get__(self, instance: object, owner: type) -> re.Pattern:
+        compiled = re.compile(self.pattern, self.flags)
+        setattr(owner, self.name, compiled)
+        return compiled
 
 
 class Tags:
@@ -22,7 +163,7 @@ class Regexes:
     #   root
     #   administrative access (ignire case)
     #
-    SUDO = re.compile(r'((\S+\])?[$#]\s+)?sudo|su |su -\b')
+    SUDO = LazyRegex(r'((\S+\])?[$#]\s+)?sudo|su |su -\b')
 
     # Concious language
     #
@@ -35,7 +176,7 @@ class Regexes:
     #   master
     #   slave
     #
-    CON_LANG = re.compile(r'master|slave|blacklist|black list|black-list|black_list|whitelist|white list|white-list|white_list')
+    CON_LANG = LazyRegex(r'master|slave|blacklist|black list|black-list|black_list|whitelist|white list|white-list|white_list')
 
     # Path-based xrefs
     #
@@ -45,7 +186,7 @@ class Regexes:
     #
     #   xref:modules/performance/ref_priority-map.adoc[Description of the priority range]
     #
-    PATH_XREF = re.compile(r'xref:(.+?)\/([^\/]+?)\.adoc\[')
+    PATH_XREF = LazyRegex(r'xref:(.+?)\/([^\/]+?)\.adoc\[')
 
     # pantheonenv var
     #
@@ -55,7 +196,7 @@ class Regexes:
     #
     #   ifndef::pantheonenv[]
     #
-    PV_ENV = re.compile(r'pantheonenv')
+    PV_ENV = LazyRegex(r'pantheonenv')
 
     # Additional resources tag
     #
@@ -66,7 +207,7 @@ class Regexes:
     #
     #   [role="_additional-resources"]
     #
-    ADD_RES = re.compile(r'\[role="_additional-resources"\]')
+    ADD_RES = LazyRegex(r'\[role="_additional-resources"\]')
 
     # Opening conditionals
     #
@@ -79,7 +220,7 @@ class Regexes:
     #   ifeval::["{attribute}" >= "v.1"]
     #   ifdef::condition[description!]
     #
-    OPENING_CONDITIONAL = re.compile(r'(ifdef|ifndef|ifeval)::(.*)?\]')
+    OPENING_CONDITIONAL = LazyRegex(r'(ifdef|ifndef|ifeval)::(.*)?\]')
 
     # Closing conditionals
     #
@@ -90,7 +231,7 @@ class Regexes:
     #   endif::condition[]
     #   endif::[]
     #
-    CLOSING_CONDITIONAL = re.compile(r'endif::(.*)?\]')
+    CLOSING_CONDITIONAL = LazyRegex(r'endif::(.*)?\]')
 
     # Single-line conditionals
     #
@@ -101,7 +242,7 @@ class Regexes:
     # ifdef::condition[description!]
     # ifndef::condition[description!]
     #
-    SINGLE_LINE_CONDITIONAL = re.compile(
+    SINGLE_LINE_CONDITIONAL = LazyRegex(
         r'(ifdef|ifndef)::[\S]*\[(?!\])(.*)\]')
 
     # Empty line after
@@ -113,7 +254,7 @@ class Regexes:
     #   include::file.adoc[]
     #
     #
-    EMPTY_LINE_AFTER_INCLUDE = re.compile(r'include::.*\]\ninclude::.*\]')
+    EMPTY_LINE_AFTER_INCLUDE = LazyRegex(r'include::.*\]\ninclude::.*\]')
 
     # Module content type tags
     #
@@ -125,7 +266,7 @@ class Regexes:
     #   :_content-type: CONCEPT
     #   :_content-type: REFERENCE
     #
-    MODULE_TYPE = re.compile(r':_content-type: (PROCEDURE|CONCEPT|REFERENCE)')
+    MODULE_TYPE = LazyRegex(r':_content-type: (PROCEDURE|CONCEPT|REFERENCE)')
 
     # Assembly content type tag
     #
@@ -135,7 +276,7 @@ class Regexes:
     #
     #   :_content-type: ASSEMBLY
     #
-    ASSEMBLY_TYPE = re.compile(r':_content-type: ASSEMBLY')
+    ASSEMBLY_TYPE = LazyRegex(r':_content-type: ASSEMBLY')
 
     # Snippet content type tag
     #
@@ -145,7 +286,7 @@ class Regexes:
     #
     #   :_content-type: SNIPPET
     #
-    SNIPPET_TYPE = re.compile(r':_content-type: SNIPPET')
+    SNIPPET_TYPE = LazyRegex(r':_content-type: SNIPPET')
 
     # Vanilla xrefs
     #
@@ -159,7 +300,7 @@ class Regexes:
     #   <<some-id>>
     #   <<id,text>>
     #
-    VANILLA_XREF = re.compile(r'<<[^\s]*>>')
+    VANILLA_XREF = LazyRegex(r'<<[^\s]*>>')
 
     # Multi-line comment
     #
@@ -172,7 +313,10 @@ class Regexes:
     #   multi-line comment
     #   ////
     #
-    MULTI_LINE_COMMENT = re.compile(r'(/{4,})(.*\n)*?(/{4,})')
+    # Matched by a linear-time finder; the regex backtracks when the closing
+    # delimiter is missing.
+    #
+    MULTI_LINE_COMMENT = LinearPattern(r'(/{4,})(.*\n)*?(/{4,})', multi_line_comments)
 
     # Single-line comment TODO: remove lookaround
     #
@@ -181,7 +325,7 @@ class Regexes:
     # Example
     #   // This is a single-line comment
     #
-    SINGLE_LINE_COMMENT = re.compile(
+    SINGLE_LINE_COMMENT = LazyRegex(
         r'(?<!\/\/)(?<!\/)^\/\/(?!\/\/).*\n', re.M)
 
     # In-line anchor
@@ -191,7 +335,7 @@ class Regexes:
     # Example
     #   [[this-is-an-inline-anchor]]
     #
-    INLINE_ANCHOR = re.compile(r'=.*\[\[.*\]\]')
+    INLINE_ANCHOR = LazyRegex(r'=.*\[\[.*\]\]')
 
     # HTML markup (NOTE:DISABLED)
     #
@@ -205,7 +349,7 @@ class Regexes:
     #       Page Title
     #   </title>
     #
-    HTML_MARKUP = re.compile(r'(?<!\`|_)<.*>.*<\/.*>|<.*>\n.*\n</.*>(?!\`|_)')
+    HTML_MARKUP = LazyRegex(r'(?<!\`|_)<.*>.*<\/.*>|<.*>\n.*\n</.*>(?!\`|_)')
 
     # Internal conditionals TODO: expand regex to include oneliners
     #
@@ -218,7 +362,10 @@ class Regexes:
     #   Internally
     #   endif::[]
     #
-    INTERNAL_IFDEF = re.compile(r'(ifdef::internal\[\])(.*\n)*?(endif::\[\])')
+    # Matched by a linear-time finder; the regex backtracks when the closing
+    # statement is missing.
+    #
+    INTERNAL_IFDEF = LinearPattern(r'(ifdef::internal\[\])(.*\n)*?(endif::\[\])', internal_conditionals)
 
     # Code block 4 dashes
     #
@@ -230,7 +377,7 @@ class Regexes:
     #    this is a code block
     #    ----
     #
-    CODE_BLOCK_DASHES = re.compile(r'----([^Ï]+?)----', re.DOTALL)
+    CODE_BLOCK_DASHES = LazyRegex(r'----([^Ï]+?)----', re.DOTALL)
 
     # Code block 4 dots
     #
@@ -242,7 +389,7 @@ class Regexes:
     #    this is a code block
     #    ....
     #
-    CODE_BLOCK_DOTS = re.compile(r'\.\.\.\.([^Ï]+?)\.\.\.\.', re.DOTALL)
+    CODE_BLOCK_DOTS = LazyRegex(r'\.\.\.\.([^Ï]+?)\.\.\.\.', re.DOTALL)
 
     # Code block 2 dashes
     #
@@ -254,7 +401,7 @@ class Regexes:
     #    this is a code block
     #    --
     #
-    CODE_BLOCK_TWO_DASHES = re.compile(r'--\n([^Ï]+?)--\n', re.DOTALL) # matches any character except Ï; fix logic later
+    CODE_BLOCK_TWO_DASHES = LazyRegex(r'--\n([^Ï]+?)--\n', re.DOTALL) # matches any character except Ï; fix logic later
 
     # Links without uman readable label
     # Matches links without human readable label
@@ -264,7 +411,7 @@ class Regexes:
     #   https://link.com[]
     #   link:https://link.com[]
     #
-    HUMAN_READABLE_LABEL_LINKS = re.compile(
+    HUMAN_READABLE_LABEL_LINKS = LazyRegex(
         r'\b(?:https?|file|ftp|irc):\/\/[^\s\[\]<]*\[\]')
 
     # Xrefs without human readable label
@@ -274,7 +421,7 @@ class Regexes:
     #
     #   xref:some-id[]
     #
-    HUMAN_READABLE_LABEL_XREFS = re.compile(
+    HUMAN_READABLE_LABEL_XREFS = LazyRegex(
         r'xref:[\S]*\[\]')
 
     # Include statement
@@ -285,7 +432,7 @@ class Regexes:
     #   include::file.adoc[]
     #   include::file.adoc[leveloffset=+1]
     #
-    INCLUDE_STATEMENT = re.compile(r'include::[\S]*\]')
+    INCLUDE_STATEMENT = LazyRegex(r'include::[\S]*\]')
 
     # Included snippets
     #
@@ -295,7 +442,7 @@ class Regexes:
     #   include::sni-file.adoc[leveloffset=+1]
     #   include::snip_file.adoc[leveloffset=+1]
     #
-    SNIPPET_INCLUDE = re.compile(r'include::[\S]*(snip-|snip_)[\S]*\[')
+    SNIPPET_INCLUDE = LazyRegex(r'include::[\S]*(snip-|snip_)[\S]*\[')
 
     # Related information section
     #
@@ -306,7 +453,7 @@ class Regexes:
     #   = Related information
     #   .Related information
     #
-    RELATED_INFO = re.compile(
+    RELATED_INFO = LazyRegex(
         r'== Related information|\.Related information', re.IGNORECASE)
 
     # Additional information resources section
@@ -318,10 +465,10 @@ class Regexes:
     #   == Additional information
     #   .Additional information
     #
-    ADDITIONAL_RES = re.compile(
+    ADDITIONAL_RES = LazyRegex(
         r'== Additional resources|\.Additional resources', re.IGNORECASE)
 
-    # CORRECT_ADDITIONAL_RES_SECTION = re.compile(
+    # CORRECT_ADDITIONAL_RES_SECTION = LazyRegex(
     #     r'\[role="_additional-resources"\]\n+((ifdef|ifndef|ifeval|endif)::.*\]\n+)*?(== Additional resources|\.Additional resources)\n+((ifdef|ifndef|ifeval|endif)::.*\]\n+)*?((\* .*\n+((ifdef|ifndef|ifeval|endif)::.*\]\n+)*?(^//.*\n+)*?((\/{4,})(.*\n)*?(\/{4,})\n+)*?)*\z)', re.IGNORECASE)
 
     # Deprecated footnoteref macro
@@ -331,4 +478,103 @@ class Regexes:
     # Examples
     #   footnoteref:[text]
     #
-    FOOTNOTE_REF = re.compile(r'footnoteref:\[.*?\]')
+    FOOTNOTE_REF = LazyRegex(r'footnoteref:\[.*?\]')
+
+    # Attribute entry
+    #
+    # Matches the definition or the unsetting of a document attribute
+    #
+    # Examples
+    #   :product-url: https://docs.product.com
+    #   :internal!:
+    #
+    ATTRIBUTE_ENTRY = LazyRegex(r':(!?\w[^:]*?):(?:[ \t]+(.*))?$')
+
+    # Attribute reference
+    #
+    # Matches an attribute reference, escaped or not
+    #
+    # Examples
+    #   {product-url}
+    #   \{not-substituted}
+    #
+    ATTRIBUTE_REFERENCE = LazyRegex(r'(\\)?\{(\w[\w-]*)\}')
+
+    # Preprocessor conditional
+    #
+    # Matches an opening conditional with its attributes and its single-line content, if any
+    #
+    # Examples
+    #   ifdef::internal[]
+    #   ifndef::upstream,community[]
+    #   ifdef::internal[Internal only text.]
+    #
+    CONDITIONAL_DIRECTIVE = LazyRegex(r'(ifdef|ifndef|ifeval)::(\S*?)\[(.*)\]$')
+
+    # Include directive
+    #
+    # Matches an include with its target
+    #
+    # Examples
+    #   include::modules/con_file.adoc[leveloffset=+1]
+    #   include::{snippets}/snip_file.adoc[]
+    #
+    INCLUDE_DIRECTIVE = LazyRegex(r'include::(\S+?)\[(.*)\]$')
+
+    # Verbatim block delimiter
+    #
+    # Matches the delimiter of a listing, literal or passthrough block, where links are not converted
+    #
+    # Examples
+    #   ----
+    #   ....
+    #   ++++
+    #
+    VERBATIM_DELIMITER = LazyRegex(r'(-{4,}|\.{4,}|\+{4,})$')
+
+    # Link
+    #
+    # Matches a link macro or a URL, as Asciidoctor converts them into links.
+    # The first group is the escaping backslash, the second the link macro
+    # target, and the third the URL.
+    #
+    # Examples
+    #   link:https://docs.product.com[Documentation]
+    #   https://docs.product.com[Documentation]
+    #   See <https://docs.product.com>.
+    #
+    LINK = LazyRegex(
+        r'(\\)?(?:link:([^:\s\[][^\s\[]*)\['
+        r'|(?:^|(?<=[\s<>()\[\];"\'`*_#]))((?:https?|ftp|irc)://[^\s\[\]<>]*[^\s,.?!\[\]<>)`*_#]))')
+
+    # Content type attribute
+    #
+    # Matches the content type of a file
+    #
+    # Examples
+    #   :_content-type: ASSEMBLY
+    #   :_content-type: PROCEDURE
+    #
+    CONTENT_TYPE = LazyRegex(r':_content-type: (ASSEMBLY|PROCEDURE|CONCEPT|REFERENCE|SNIPPET)')
+
+    # Anchor
+    #
+    # Matches a block ID or an inline anchor; each form captures the ID in its own group
+    #
+    # Examples
+    #   [id="proc_installing-enki_{context}"]
+    #   [[installing-enki]]
+    #   [#installing-enki]
+    #
+    ANCHOR = LazyRegex(r'^\[id=["\']([^"\']+)["\']|\[\[([^\[\],\s]+)(?:,[^\]]*)?\]\]|^\[#([^\]\s.%,]+)', re.M)
+
+    # Cross reference
+    #
+    # Matches an xref macro or a natural cross reference with its target
+    #
+    # Examples
+    #   xref:proc_installing-enki_{context}[Installing enki]
+    #   xref:assembly_getting-started.adoc#installing-enki[]
+    #   <<installing-enki,Installing enki>>
+    #
+    XREF = LazyRegex(r'xref:([^\[\s]+)\[|<<([^<>,\s]+)(?:,[^<>]*)?>>')
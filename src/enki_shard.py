@@ -0,0 +1,137 @@
+import hashlib
+import heapq
+import json
+import os
+import sys
+import time
+from typing import Optional, TextIO
+
+from enki_cache import ResultCache
+from enki_files_validator import classify_files, file_results
+from enki_msg import STREAMING_OUTPUTS, Report, StreamingReport
+
+
+# Bump when the layout of partial reports changes
+PARTIAL_REPORT_VERSION = 2
+
+
+class MergeError(Exception):
+    """Partial reports that cannot be merged into the report of a whole run."""
+
+
+def shard_files(files: list[str], shard: int, shards: int) -> list[str]:
+    """Return the files of a shard, from 1 to `shards`, in the order of `files`.
+
+    The largest files are assigned first, each to the shard with the fewest
+    bytes so far. Ties are broken by path and shard number, so every shard
+    computes the same partition from the same files.
+    """
+    sizes = {}
+    for path in files:
+        try:
+            sizes[path] = os.stat(path).st_size
+        except OSError:
+            sizes[path] = 0
+
+    # (bytes, shard) of each shard, least loaded first
+    loads = [(0, number) for number in range(1, shards + 1)]
+    assigned = set()
+    for path in sorted(files, key=lambda path: (-sizes[path], path)):
+        size, number = heapq.heappop(loads)
+        if number == shard:
+            assigned.add(path)
+        heapq.heappush(loads, (size + sizes[path], number))
+
+    return [path for path in files if path in assigned]
+
+
+def file_set_digest(files: list[str], cwd: str) -> str:
+    """Hash the paths of all files, so that shards of different file sets are not merged."""
+    digest = hashlib.sha256()
+    for path in files:
+        digest.update(os.path.relpath(path, cwd).encode() + b'\0')
+    return digest.hexdigest()
+
+
+def shard_validate(
+        files: list[str],
+        shard: int,
+        shards: int,
+        output: Optional[str] = None,
+        jobs: int = 1,
+        cache: Optional[ResultCache] = None,
+        stream: Optional[TextIO] = None) -> None:
+    """Validate the files of a shard and write its partial report as JSON.
+
+    The partial report keeps the position of each file in `files`, so that
+    `merged_results` can restore the order of a single run.
+    """
+    start = time.time()
+    cwd = os.getcwd()
+    index = {path: i for i, path in enumerate(files)}
+    selected = shard_files(files, shard, shards)
+
+    results = []
+    for path, file_report in file_results(selected, classify_files(selected), output, jobs, cache):
+        if file_report.count:
+            relative_path = os.path.relpath(path, cwd)
+            results.append([index[path], relative_path, file_report.findings(), file_report.times[relative_path]])
+
+    if cache is not None:
+        cache.prune()
+
+    partial = {
+        'version': PARTIAL_REPORT_VERSION,
+        'shard': shard,
+        'shards': shards,
+        'files': file_set_digest(files, cwd),
+        'output': output,
+        'time': round(time.time() - start, 3),
+        'results': results,
+    }
+    json.dump(partial, stream or sys.stdout)
+    (stream or sys.stdout).write('\n')
+
+
+def merged_results(partials: list[dict]) -> list[list]:
+    """Combine the results of the partial reports of all shards of a run, in the order of a single run.
+
+    Each result is an `[index, file, findings, seconds]` list. Raise MergeError if
+    shards are missing or the partial reports are not from the same run.
+    """
+    if not partials:
+        raise MergeError('No partial reports')
+    first = partials[0]
+
+    for partial in partials:
+        if partial.get('version') != PARTIAL_REPORT_VERSION:
+            raise MergeError(f"Unsupported partial report version: {partial.get('version')}")
+        for key in ['shards', 'files', 'output']:
+            if partial[key] != first[key]:
+                raise MergeError(f'The partial reports are from different runs: their {key} differ')
+
+    shards = sorted(partial['shard'] for partial in partials)
+    if shards != list(range(1, first['shards'] + 1)):
+        raise MergeError(f"Expected shards 1 to {first['shards']}, got {', '.join(map(str, shards))}")
+
+    return sorted(result for partial in partials for result in partial['results'])
+
+
+def print_merged(partials: list[dict]) -> None:
+    """Print the report of the whole run like a single run would, and exit with an error if there are findings."""
+    results = merged_results(partials)
+    output = partials[0]['output']
+    # the run took as long as its slowest shard
+    start_time = time.time() - max(partial['time'] for partial in partials)
+
+    report: Report = StreamingReport(output) if output in STREAMING_OUTPUTS else Report()
+    for _index, file_path, findings, seconds in results:
+        file_report = Report()
+        file_report.add_findings(findings, file_path)
+        file_report.times[file_path] = seconds
+        report.merge(file_report)
+
+    if report.count != 0 or isinstance(report, StreamingReport):
+        report.print_report(start_time, output)
+
+    sys.exit(2 if report.count else 0)
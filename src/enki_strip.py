@@ -0,0 +1,229 @@
+import time
+from bisect import bisect_right
+from functools import partial
+from typing import Callable, Iterator, Optional
+
+from enki_profile import Profile
+from enki_regex import Regexes, internal_conditionals, multi_line_comments
+
+
+# Each finder yields the (start, end) spans that the matching pattern in
+# enki_regex.Regexes removes with `re.sub`, in order. They use `str.find`
+# on the delimiters instead of the regular expressions, and a stage only
+# builds a new string when it has something to remove. The finders for
+# multi-line comments and internal conditionals live in enki_regex.
+
+
+def single_line_comments(text: str) -> Iterator[tuple[int, int]]:
+    """Find the spans of Regexes.SINGLE_LINE_COMMENT."""
+    line_start = 0 if text.startswith('//') else _next_comment_line(text, 0)
+
+    while line_start >= 0:
+        line_end = text.find('\n', line_start)
+        if line_end < 0:
+            return
+
+        if text.startswith('//', line_start + 2):
+            # four or more slashes start a multi-line comment delimiter
+            line_start = _next_comment_line(text, line_start)
+        else:
+            yield line_start, line_end + 1
+            line_start = _next_comment_line(text, line_end)
+
+
+def _next_comment_line(text: str, pos: int) -> int:
+    """Return the start of the next line that starts with '//', or -1."""
+    newline = text.find('\n//', pos)
+    return newline + 1 if newline >= 0 else -1
+
+
+def delimited_blocks(text: str, delimiter: str) -> Iterator[tuple[int, int]]:
+    """Find the spans of `<delimiter>([^Ï]+?)<delimiter>`.
+
+    Covers Regexes.CODE_BLOCK_DASHES, CODE_BLOCK_DOTS and CODE_BLOCK_TWO_DASHES.
+    """
+    pos = 0
+    size = len(delimiter)
+
+    while True:
+        start = text.find(delimiter, pos)
+        if start < 0:
+            return
+
+        # the block content is at least one character long
+        closing = text.find(delimiter, start + size + 1)
+        if closing < 0:
+            return
+
+        excluded = text.find('Ï', start + size, closing)
+        if excluded >= 0:
+            pos = excluded + 1
+            continue
+
+        yield start, closing + size
+        pos = closing + size
+
+
+def single_line_conditionals(text: str) -> Iterator[tuple[int, int]]:
+    """Find the spans of Regexes.SINGLE_LINE_CONDITIONAL."""
+    for match in Regexes.SINGLE_LINE_CONDITIONAL.finditer(text):
+        yield match.span()
+
+
+class OffsetMap:
+    """Map offsets in stripped text back to offsets in the original text.
+
+    Every stripping stage records where it cut the text and how much text
+    was removed up to that cut; mapping an offset is a binary search per
+    stage.
+    """
+
+    def __init__(self):
+        # per stage: offsets of the cuts in the stage output, and the
+        # total length removed up to and including each cut
+        self.stages: list[tuple[list[int], list[int]]] = []
+
+    def copy(self) -> 'OffsetMap':
+        """Return a map with the stages recorded so far."""
+        offsets = OffsetMap()
+        offsets.stages = list(self.stages)
+        return offsets
+
+    def add_stage(self, cuts: list[int], removed: list[int]) -> None:
+        """Record the cuts of a stripping stage."""
+        if cuts:
+            self.stages.append((cuts, removed))
+
+    def original_offset(self, offset: int) -> int:
+        """Map an offset in the stripped text to the original text."""
+        for cuts, removed in reversed(self.stages):
+            i = bisect_right(cuts, offset)
+            if i:
+                offset += removed[i - 1]
+        return offset
+
+
+class LineIndex:
+    """Find the line and column of an offset with a binary search on the line starts."""
+
+    def __init__(self, text: str):
+        self.text = text
+        self._line_starts: Optional[list[int]] = None
+
+    def line_column(self, offset: int) -> tuple[int, int]:
+        """Return the 1-based line and column of an offset."""
+        if self._line_starts is None:
+            line_starts = [0]
+            newline = self.text.find('\n')
+            while newline >= 0:
+                line_starts.append(newline + 1)
+                newline = self.text.find('\n', newline + 1)
+            self._line_starts = line_starts
+
+        line = bisect_right(self._line_starts, offset)
+        return line, offset - self._line_starts[line - 1] + 1
+
+
+class Locator:
+    """Find where an offset in stripped text is in the original file."""
+
+    def __init__(self, line_index: LineIndex, offsets: OffsetMap):
+        self.line_index = line_index
+        self.offsets = offsets
+
+    def __call__(self, offset: int) -> tuple[int, int]:
+        """Return the 1-based line and column in the original file."""
+        return self.line_index.line_column(self.offsets.original_offset(offset))
+
+
+def remove_spans(
+        text: str,
+        spans: Iterator[tuple[int, int]],
+        offsets: Optional[OffsetMap] = None) -> str:
+    """Remove ordered, non-overlapping spans from the text.
+
+    If `offsets` is given, record the cuts in it.
+    """
+    pieces = []
+    pos = 0
+    length = 0
+    cuts: list[int] = []
+    removed: list[int] = []
+
+    for start, end in spans:
+        piece = text[pos:start]
+        pieces.append(piece)
+        pos = end
+
+        if offsets is not None:
+            length += len(piece)
+            cuts.append(length)
+            removed.append((removed[-1] if removed else 0) + end - start)
+
+    if not pieces:
+        return text
+
+    if offsets is not None:
+        offsets.add_stage(cuts, removed)
+
+    pieces.append(text[pos:])
+    return ''.join(pieces)
+
+
+# The stripping stages, named after the pattern in enki_regex.Regexes
+# that each of them replaces, in the order they run
+COMMENT_STAGES: list[tuple[str, Callable[[str], Iterator[tuple[int, int]]]]] = [
+    ('MULTI_LINE_COMMENT', multi_line_comments),
+    ('SINGLE_LINE_COMMENT', single_line_comments),
+]
+
+BLOCK_STAGES: list[tuple[str, Callable[[str], Iterator[tuple[int, int]]]]] = [
+    ('CODE_BLOCK_DASHES', partial(delimited_blocks, delimiter='----')),
+    ('CODE_BLOCK_DOTS', partial(delimited_blocks, delimiter='....')),
+    ('CODE_BLOCK_TWO_DASHES', partial(delimited_blocks, delimiter='--\n')),
+    ('INTERNAL_IFDEF', internal_conditionals),
+    ('SINGLE_LINE_CONDITIONAL', single_line_conditionals),
+]
+
+
+def run_stages(
+        text: str,
+        stages: list[tuple[str, Callable[[str], Iterator[tuple[int, int]]]]],
+        offsets: Optional[OffsetMap] = None,
+        profile: Optional[Profile] = None) -> str:
+    """Run stripping stages in order."""
+    for name, finder in stages:
+        if profile is None:
+            text = remove_spans(text, finder(text), offsets)
+        else:
+            start = time.perf_counter()
+            size = len(text)
+            text = remove_spans(text, finder(text), offsets)
+            profile.record(f'strip.{name}', time.perf_counter() - start, size)
+    return text
+
+
+def strip_comments(
+        original: str,
+        offsets: Optional[OffsetMap] = None,
+        profile: Optional[Profile] = None) -> str:
+    """Remove multi-line and single-line comments."""
+    return run_stages(original, COMMENT_STAGES, offsets, profile)
+
+
+def strip_blocks(
+        stripped: str,
+        offsets: Optional[OffsetMap] = None,
+        profile: Optional[Profile] = None) -> str:
+    """Remove code blocks, internal conditionals and single-line conditionals."""
+    return run_stages(stripped, BLOCK_STAGES, offsets, profile)
+
+
+def strip(original: str) -> tuple[str, str]:
+    """Return the file without comments, and without comments, code blocks and conditionals.
+
+    The result is the same as applying the stripping patterns in
+    enki_regex.Regexes with `re.sub`, in the order used by the validation.
+    """
+    without_comments = strip_comments(original)
+    return without_comments, strip_blocks(without_comments)
@@ -0,0 +1,265 @@
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Optional
+
+from enki_cache import ResultCache
+from enki_discovery import discover_files, is_adoc_name, scan_tree
+from enki_files_validator import FileKind, classify_files, file_results
+from enki_includes import dependents, including_files, read_includes
+from enki_msg import Location, Report, format_location
+
+
+# Seconds between two scans of the watched files
+DEFAULT_INTERVAL = 0.5
+
+# (st_mtime_ns, st_size) of a file; a different value means the file changed
+FileStamp = tuple[int, int]
+
+# category: location of each finding in a file
+Findings = dict[str, Optional[Location]]
+
+
+class Change():
+    """Findings that appeared or were resolved by a scan."""
+
+    def __init__(self):
+        self.revalidated: list[str] = []
+        self.appeared: list[tuple[str, str, Optional[Location]]] = []
+        self.resolved: list[tuple[str, str]] = []
+
+
+class Watcher():
+    """Revalidate the files that change in a set of paths.
+
+    Every scan stats the known files and directories. Only the directories
+    that changed, that is, where a file was added, removed or renamed, are
+    scanned again. Changed files are revalidated together with the files
+    that include them.
+    """
+
+    def __init__(
+            self,
+            paths: list[Path],
+            output: Optional[str] = None,
+            jobs: int = 1,
+            cache: Optional[ResultCache] = None):
+        self.paths = paths
+        self.output = output
+        self.jobs = jobs
+        self.cache = cache
+        self.cwd = os.getcwd()
+
+        self.stamps: dict[str, FileStamp] = {}
+        # directory: modification time and entry names
+        self.directories: dict[str, tuple[int, set[str]]] = {}
+        self.includes: dict[str, list[str]] = {}
+        self.included_by: dict[str, list[str]] = {}
+        self.findings: dict[str, Findings] = {}
+
+    def start(self) -> Change:
+        """Validate every file; the findings are reported as appeared."""
+        files = self.discover()
+        self.stamps = {path: stamp for path, stamp in zip(files, map(file_stamp, files)) if stamp}
+        self.includes = read_includes(self.stamps)
+        self.included_by = including_files(self.includes)
+
+        change = Change()
+        self.revalidate(list(self.stamps), change)
+        return change
+
+    def discover(self) -> list[str]:
+        """List the files in the watched paths and remember the directories."""
+        directories: list[str] = []
+        files, _unsupported = discover_files(self.paths, scanned_directories=directories)
+        self.track(directories)
+        return files
+
+    def track(self, directories: list[str]) -> None:
+        """Remember the modification time and the entries of directories."""
+        for directory in directories:
+            try:
+                # stat first: a change after the stat is caught by the next scan
+                mtime = os.stat(directory).st_mtime_ns
+                self.directories[directory] = (mtime, set(os.listdir(directory)))
+            except OSError:
+                self.directories.pop(directory, None)
+
+    def rescan(self, directory: str) -> list[str]:
+        """Return the files added to a changed directory.
+
+        New subdirectories are scanned and tracked. Removed files are found
+        by the scan, because they cannot be stat'ed anymore.
+        """
+        _mtime, previous = self.directories[directory]
+        self.track([directory])
+
+        if directory not in self.directories:
+            # the directory was removed
+            for known in [known for known in self.directories if is_under(known, directory)]:
+                del self.directories[known]
+            return []
+
+        added: list[str] = []
+        for name in sorted(self.directories[directory][1] - previous):
+            path = os.path.join(directory, name)
+            if os.path.isdir(path) and not os.path.islink(path):
+                subdirectories: list[str] = []
+                added.extend(file for file, _key in scan_tree(path, subdirectories))
+                self.track(subdirectories)
+            elif is_adoc_name(name) and os.path.isfile(path):
+                added.append(os.path.realpath(path))
+
+        return added
+
+    def scan(self) -> Change:
+        """Revalidate the files that changed since the last scan."""
+        added = []
+        for directory, (mtime, _entries) in list(self.directories.items()):
+            if directory in self.directories and directory_changed(directory, mtime):
+                added.extend(self.rescan(directory))
+
+        files = list(self.stamps)
+        files.extend(path for path in dict.fromkeys(added) if path not in self.stamps)
+
+        changed = []
+        stamps = {}
+        previous = self.stamps
+        for path in files:
+            # the stat of every file is most of the time of a scan
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            stamp = stamps[path] = stat.st_mtime_ns, stat.st_size
+            if previous.get(path) != stamp:
+                changed.append(path)
+
+        removed = [path for path in self.stamps if path not in stamps]
+        self.stamps = stamps
+
+        change = Change()
+        if not changed and not removed:
+            return change
+
+        for path in removed:
+            self.remove(path, change)
+        for path, targets in read_includes(changed).items():
+            self.update_includes(path, targets)
+
+        affected = dependents(changed, self.included_by, set(stamps))
+        self.revalidate([path for path in stamps if path in affected], change)
+        return change
+
+    def update_includes(self, path: str, targets: list[str]) -> None:
+        """Replace the include targets of a file in the include graph."""
+        for target in self.includes.get(path, []):
+            self.included_by[target].remove(path)
+        for target in targets:
+            self.included_by.setdefault(target, []).append(path)
+        self.includes[path] = targets
+
+    def remove(self, path: str, change: Change) -> None:
+        """Forget a removed file; its findings are reported as resolved."""
+        self.stamps.pop(path, None)
+        self.update_includes(path, [])
+        del self.includes[path]
+        for category in self.findings.pop(path, {}):
+            change.resolved.append((path, category))
+
+    def revalidate(self, files: list[str], change: Change) -> None:
+        """Validate files and record how their findings changed.
+
+        A file can be removed or rewritten between the scan and the read,
+        for example by an editor that saves by renaming. The files that are
+        left are then validated one by one, so that one file cannot stop
+        the watch. The cache is then pruned, so that a long session keeps
+        it within its size cap.
+        """
+        kinds = classify_files(files)
+        validated = set()
+
+        try:
+            for path, report in file_results(files, kinds, self.output, self.jobs, self.cache):
+                self.record(path, report, change)
+                validated.add(path)
+        except (OSError, UnicodeDecodeError):
+            for path in files:
+                if path not in validated:
+                    self.revalidate_file(path, kinds, change)
+
+        if self.cache is not None and files:
+            self.cache.prune()
+
+    def revalidate_file(self, path: str, kinds: dict[str, FileKind], change: Change) -> None:
+        """Validate a file that may have been removed or be unreadable."""
+        try:
+            for _path, report in file_results([path], kinds, self.output, 1, self.cache):
+                self.record(path, report, change)
+        except FileNotFoundError:
+            self.remove(path, change)
+        except (OSError, UnicodeDecodeError) as e:
+            # the findings are kept until the file can be read again
+            logging.warning(f"Cannot read {os.path.relpath(path, self.cwd)}: {e}")
+
+    def record(self, path: str, report: Report, change: Change) -> None:
+        """Record the findings of a validated file and how they changed."""
+        findings: Findings = {}
+        for category, _file_path, location in report:
+            findings.setdefault(category, location)
+
+        previous = self.findings.get(path, {})
+        for category, location in findings.items():
+            if category not in previous:
+                change.appeared.append((path, category, location))
+        for category in previous:
+            if category not in findings:
+                change.resolved.append((path, category))
+
+        self.findings[path] = findings
+        change.revalidated.append(path)
+
+    def print_change(self, change: Change, elapsed: float, action: str = 'Revalidated') -> None:
+        """Log the findings that appeared or were resolved."""
+        for path, category, location in change.appeared:
+            logging.error(f"{category} found: {format_location(os.path.relpath(path, self.cwd), location)}")
+        for path, category in change.resolved:
+            logging.info(f"{category} resolved: {os.path.relpath(path, self.cwd)}")
+
+        if change.revalidated or change.resolved:
+            count = sum(len(findings) for findings in self.findings.values())
+            logging.info(f"{action} {len(change.revalidated)} files in {elapsed * 1000:.0f} ms, "
+                         f"{count} findings in {len(self.stamps)} files")
+
+    def watch(self, interval: float = DEFAULT_INTERVAL) -> None:
+        """Print the findings, then print how they change until interrupted."""
+        start = time.perf_counter()
+        self.print_change(self.start(), time.perf_counter() - start, 'Validated')
+        logging.info(f"Watching {len(self.stamps)} files for changes. Press Ctrl+C to stop.")
+
+        while True:
+            time.sleep(interval)
+            start = time.perf_counter()
+            change = self.scan()
+            self.print_change(change, time.perf_counter() - start)
+
+
+def file_stamp(path: str) -> Optional[FileStamp]:
+    """Return the modification time and size of a file, or None if it is gone."""
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+def directory_changed(directory: str, mtime: int) -> bool:
+    """Check if files were added to or removed from a directory."""
+    stamp = file_stamp(directory)
+    return stamp is None or stamp[0] != mtime
+
+
+def is_under(path: str, directory: str) -> bool:
+    """Check if a path is a directory or inside it."""
+    return path == directory or path.startswith(directory + os.sep)
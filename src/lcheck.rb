@@ -1,6 +1,5 @@
 require 'asciidoctor'
-require 'faraday'
-require 'thread'
+require 'json'
 
 
 @expanded_files = []
@@ -16,12 +15,14 @@ for arg in ARGV
 end
 
 
-def return_broken_links()
-    #Parses the file for links; excludes pseudo links
-        #e.g. xrefs
+def extract_links()
+    #Parses the file for links
     #Creates a hash with links as keys and file paths as values
         #e.g. hash = {'www.example.com'=>['path/to/file1.adoc', 'path/to/file2.adoc']}
-    #Runs link checker and prints the results.
+    #Prints the hash and the number of checked files as JSON.
+    #enki_link_extractor.py finds the links without Asciidoctor; this script
+    #is the reference that its output is compared with in the tests and in
+    #benchmarks/bench_links.py.
     files_checked = []
     links_dict = {}
 
@@ -37,96 +38,19 @@ def return_broken_links()
 
             links = l.content.scan(/(?<=href\=")[^\s]*(?=">)|(?<=href\=")[^\s]*(?=" class="bare")/)
 
-            if not links.empty?
-                links.each do |link|
-                    next if link.start_with?( '#', '/', 'tab.', 'file', 'mailto', 'ftp://') or link.downcase.include?('example') or link.downcase.include?('tools.ietf.org') or link.empty? or link == 'ftp.gnome.org'
-                    if not links_dict.key?(link)
-                        links_dict[link] = [l.file]
-                    else
-                        if not links_dict[link].include?(l.file)
-                            links_dict[link].push(l.file)
-                        end
-                    end
-                end
-            end
-        end
-    end
-
-    broken_links = queue_broken_links(links_dict)
-
-    puts "\nStatistics:"
-    puts "Input files: #{@expanded_files.size}. Files checked: #{files_checked.size}. Errors found: #{broken_links}."
-    exit 1
-
-end
-
-
-def print_msg(link, error_type, files)
-    puts "\nLink: #{link}"
-    puts "Response code: #{error_type}"
-
-    if files.count > 1
-        puts "File count: #{files.count}"
-    end
-
-    # Format file paths as clickable links
-    puts "File path: #{files.map { |file| "file://#{file}" }.join(", ")}"
-end
-
-
-def queue_broken_links(links_dict)
-    # Takes in the \nLink: path hash
-        # #e.g. hash = {'www.example.com'=>['path/to/file1.adoc', 'path/to/file2.adoc']}
-    # Runs link check on the hash keys
-    # Returns the list of broken links (for statistics)
-    # Handles exceptions
-    broken_links = 0
-
-    semaphore = Queue.new
-    10.times { semaphore.push(1) }
-
-    threads = []
-
-    links_dict.each do |link,files|
-        threads << Thread.new do
-            semaphore.pop
-
-            encoded_link = CGI.escape(link)
-
-            conn = Faraday.new(url: encoded_link) do |faraday|
-                faraday.response :raise_error
-            end
-
-            begin
-                conn.get(link)
-            rescue URI::BadURIError => e
-                broken_links += 1
-                error_type = 'Bad URI'
-                print_msg(link, error_type, files)
-
-            rescue URI::InvalidURIError => e
-                broken_links += 1
-                error_type = 'Invalid URL'
-                print_msg(link, error_type, files)
-
-            rescue Faraday::Error => e
-                broken_links += 1
-                if e.response.nil?
-                    error_type = 'TimeoutError'
+            links.each do |link|
+                if not links_dict.key?(link)
+                    links_dict[link] = [l.file]
                 else
-                    error_type = e.response[:status]
+                    if not links_dict[link].include?(l.file)
+                        links_dict[link].push(l.file)
+                    end
                 end
-                
-                print_msg(link, error_type, files)
-
             end
-            semaphore.push(1) # Release token
         end
     end
 
-    threads.each(&:join)
-
-    return broken_links
+    puts JSON.generate({'links' => links_dict, 'files_checked' => files_checked.size})
 end
 
-return_broken_links()
+extract_links()
@@ -0,0 +1,114 @@
+import http.server
+import threading
+import time
+
+
+# Chunks of 1 MB in the body of /stream
+STREAM_CHUNKS = 64
+
+
+class LinkHandler(http.server.BaseHTTPRequestHandler):
+    """Answer link checks with the status that the path asks for."""
+    protocol_version = 'HTTP/1.1'
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def do_GET(self):
+        self.answer(body=True)
+
+    def do_HEAD(self):
+        self.answer(body=False)
+
+    def answer(self, body):
+        with self.server.lock:
+            self.server.requests.append((self.command, self.path))
+            self.server.in_flight += 1
+            self.server.max_in_flight = max(self.server.max_in_flight, self.server.in_flight)
+        try:
+            self.answer_path(body)
+        finally:
+            with self.server.lock:
+                self.server.in_flight -= 1
+
+    def answer_path(self, body):
+        path = self.path.split('?')[0]
+        if path == '/slow':
+            time.sleep(1)
+        if path == '/busy':
+            time.sleep(0.05)
+        if path == '/nohead' and not body:
+            self.send_response(405)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        if path == '/stream':
+            self.answer_stream(body)
+            return
+        if path == '/redirect':
+            self.send_response(301)
+            self.send_header('Location', '/ok')
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+
+        status = {'/missing': 404, '/forbidden': 403}.get(path, 200)
+        content = b'x' * 1000
+        self.send_response(status)
+        self.send_header('Content-Length', str(len(content)))
+        self.end_headers()
+        if body:
+            self.wfile.write(content)
+
+    def answer_stream(self, body):
+        """Answer with a large chunked body, and count the chunks sent before the client hangs up."""
+        if not body:
+            # an answer to HEAD has no body, not even the last chunk
+            self.send_response(405)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('Transfer-Encoding', 'chunked')
+        self.end_headers()
+        chunk = b'x' * 1024 * 1024
+        try:
+            for _ in range(STREAM_CHUNKS):
+                self.wfile.write(b'%x\r\n%s\r\n' % (len(chunk), chunk))
+                with self.server.lock:
+                    self.server.chunks_sent += 1
+            self.wfile.write(b'0\r\n\r\n')
+        except OSError:
+            self.close_connection = True
+
+    def log_message(self, format, *args):
+        pass
+
+
+class LinkServer(http.server.ThreadingHTTPServer):
+    """A local stand-in for the web servers that links point to."""
+    daemon_threads = True
+
+    def __init__(self, handler=LinkHandler):
+        super().__init__(('127.0.0.1', 0), handler)
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.requests = []
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.chunks_sent = 0
+        self.thread = threading.Thread(target=self.serve_forever, args=(0.01,))
+
+    def url(self, path):
+        return f'http://127.0.0.1:{self.server_address[1]}{path}'
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self.shutdown()
+        self.thread.join()
+        self.server_close()
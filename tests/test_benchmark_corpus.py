@@ -0,0 +1,41 @@
+import unittest
+from benchmarks.corpus import generate_corpus
+import os
+import tempfile
+
+
+def read_corpus(root):
+    contents = {}
+    for dirpath, _dirnames, filenames in os.walk(root):
+        for name in filenames:
+            path = os.path.join(dirpath, name)
+            with open(path, 'r') as file:
+                contents[os.path.relpath(path, root)] = file.read()
+    return contents
+
+
+class TestCorpus(unittest.TestCase):
+    def test_reproducible(self):
+        with tempfile.TemporaryDirectory() as first, tempfile.TemporaryDirectory() as second, \
+                tempfile.TemporaryDirectory() as other_seed:
+            generate_corpus(first, 'small', seed=1)
+            generate_corpus(second, 'small', seed=1)
+            generate_corpus(other_seed, 'small', seed=2)
+
+            self.assertEqual(read_corpus(first), read_corpus(second))
+            self.assertNotEqual(read_corpus(first), read_corpus(other_seed))
+
+    def test_layout(self):
+        with tempfile.TemporaryDirectory() as root:
+            paths = generate_corpus(root, 'small')
+            contents = read_corpus(root)
+
+        self.assertEqual(len(paths), len(contents))
+        self.assertIn('master.adoc', contents)
+        self.assertIn(':_content-type: ASSEMBLY', contents[os.path.join('assemblies', 'assembly_0.adoc')])
+        self.assertIn('include::../snippets/', ''.join(contents.values()))
+
+
+# run all the tests in this file
+if __name__ == '__main__':
+    unittest.main()
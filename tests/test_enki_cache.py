@@ -0,0 +1,158 @@
+import unittest
+from src.enki_cache import LinkCache, ResultCache
+from src.enki_files_validator import FileKind, validate_file
+import os
+import tempfile
+from unittest import mock
+
+
+class TestResultCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache = ResultCache(self.tmp_dir.name)
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_roundtrip(self):
+        key = self.cache.key('= Heading\n', 'some/path.adoc', 'module', True)
+        self.assertIsNone(self.cache.get(key))
+
+        self.cache.put(key, [['Vanilla xrefs', 3, 5]])
+        self.assertEqual(self.cache.get(key), [['Vanilla xrefs', 3, 5]])
+
+    def test_key_depends_on_content_and_checks(self):
+        key = self.cache.key('= Heading\n', 'some/path.adoc', 'module', True)
+
+        self.assertNotEqual(key, self.cache.key('= Other\n', 'some/path.adoc', 'module', True))
+        self.assertNotEqual(key, self.cache.key('= Heading\n', 'some/path.adoc', 'module', False))
+        self.assertNotEqual(key, self.cache.key('= Heading\n', 'other/path.adoc', 'module', True))
+
+    def test_prune_evicts_least_recently_used(self):
+        keys = [self.cache.key(str(i), 'path.adoc', 'module', True) for i in range(3)]
+        for i, key in enumerate(keys):
+            self.cache.put(key, [['x' * 100, None, None]])
+            entry_path = self.cache._entry_path(key)
+            os.utime(entry_path, (i, i))
+
+        entry_size = os.path.getsize(self.cache._entry_path(keys[0]))
+        self.cache.max_size = entry_size * 2
+        self.cache.prune()
+
+        self.assertIsNone(self.cache.get(keys[0]))
+        self.assertIsNotNone(self.cache.get(keys[1]))
+        self.assertIsNotNone(self.cache.get(keys[2]))
+
+    def test_prune_lists_entries_only_over_the_cap(self):
+        self.cache.put(self.cache.key('0', 'path.adoc', 'module', True), [])
+        self.cache.prune()
+
+        with mock.patch('os.scandir') as scandir:
+            # nothing written
+            cache = ResultCache(self.tmp_dir.name)
+            cache.prune()
+
+            # under the cap
+            cache = ResultCache(self.tmp_dir.name)
+            cache.put(cache.key('1', 'path.adoc', 'module', True), [])
+            cache.prune()
+            scandir.assert_not_called()
+
+        cache = ResultCache(self.tmp_dir.name, max_size=1)
+        key = cache.key('2', 'path.adoc', 'module', True)
+        cache.put(key, [])
+        cache.prune()
+        self.assertIsNone(cache.get(key))
+
+    def test_prune_shard_removed_while_listed(self):
+        key = self.cache.key('= Heading\n', 'path.adoc', 'module', True)
+        self.cache.put(key, [])
+        scandir = os.scandir
+
+        def scandir_without_shards(path):
+            if path != self.cache.cache_dir:
+                raise FileNotFoundError(path)
+            return scandir(path)
+
+        with mock.patch('os.scandir', side_effect=scandir_without_shards):
+            self.cache.prune()
+        self.assertIsNotNone(self.cache.get(key))
+
+    def test_validate_file_uses_cache(self):
+        path = os.path.join(self.tmp_dir.name, 'proc_test.adoc')
+        with open(path, 'w') as file:
+            file.write(':_content-type: PROCEDURE\n= Heading\n\n<<some-id>>\n')
+
+        report = validate_file(path, FileKind.MODULE, self.tmp_dir.name, None, self.cache)
+        cached_report = validate_file(path, FileKind.MODULE, self.tmp_dir.name, None, self.cache)
+
+        self.assertIn('Vanilla xrefs', report.report)
+        self.assertEqual(report.report, cached_report.report)
+
+    def test_outputs_share_entries(self):
+        path = os.path.join(self.tmp_dir.name, 'proc_test.adoc')
+        with open(path, 'w') as file:
+            file.write(':_content-type: PROCEDURE\n= Heading\n')
+
+        def entries():
+            return sum(len(os.listdir(shard.path)) for shard in os.scandir(self.cache.cache_dir) if shard.is_dir())
+
+        for output in [None, 'oneline', 'json', 'sarif']:
+            validate_file(path, FileKind.MODULE, self.tmp_dir.name, output, self.cache)
+        self.assertEqual(entries(), 1)
+
+        # the CLI-only checks do not run for GitLab
+        validate_file(path, FileKind.MODULE, self.tmp_dir.name, 'gitlab', self.cache)
+        self.assertEqual(entries(), 2)
+
+
+class TestLinkCache(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_roundtrip(self):
+        cache = LinkCache(self.tmp_dir.name)
+        cache.put('https://some.com/old', 301, None, 'https://some.com/new', 1000)
+        cache.save(1000)
+
+        entry = LinkCache(self.tmp_dir.name).get('https://some.com/old', 1000)
+        self.assertEqual(entry, {'status': 301, 'error': None, 'redirect': 'https://some.com/new', 'checked': 1000})
+
+    def test_ttl(self):
+        cache = LinkCache(self.tmp_dir.name, success_ttl=100, failure_ttl=10)
+        cache.put('https://some.com/ok', 200, None, None, 1000)
+        cache.put('https://some.com/missing', 404, '404', None, 1000)
+
+        self.assertIsNotNone(cache.get('https://some.com/missing', 1009))
+        self.assertIsNone(cache.get('https://some.com/missing', 1010))
+        self.assertIsNotNone(cache.get('https://some.com/ok', 1099))
+        self.assertIsNone(cache.get('https://some.com/ok', 1100))
+
+    def test_save_drops_expired(self):
+        cache = LinkCache(self.tmp_dir.name, success_ttl=100, failure_ttl=10)
+        cache.put('https://some.com/ok', 200, None, None, 1000)
+        cache.put('https://some.com/new', 200, None, None, 1200)
+        cache.save(1200)
+
+        self.assertEqual(list(LinkCache(self.tmp_dir.name).entries), ['https://some.com/new'])
+
+    def test_corrupt_file(self):
+        with open(os.path.join(self.tmp_dir.name, 'links.json'), 'w') as file:
+            file.write('[not json')
+        self.assertEqual(LinkCache(self.tmp_dir.name).entries, {})
+
+    def test_result_cache_version_is_separate(self):
+        cache = LinkCache(self.tmp_dir.name)
+        cache.put('https://some.com/ok', 200, None, None, 1000)
+        cache.save(1000)
+
+        with mock.patch('src.enki_cache.CACHE_VERSION', 'other'):
+            self.assertIn('https://some.com/ok', LinkCache(self.tmp_dir.name).entries)
+
+
+# run all the tests in this file
+if __name__ == '__main__':
+    unittest.main()
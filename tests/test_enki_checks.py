@@ -3,6 +3,7 @@ from src.enki_regex import Regexes
 from src.enki_checks import *
 from src.enki_msg import Report
 import os
+import random
 
 
 # class for every function
@@ -484,6 +485,69 @@ Sample text."""
         self.assertFalse(result, "Should return False when file has no related information` section.")
 
 
+class TestScanChecks(unittest.TestCase):
+    def individual_checks(self, file_contents):
+        found = set()
+        for name, check in [
+                ('unterminated_conditional', unterminated_conditional_check),
+                ('related_info', related_info_check),
+                ('vanilla_xref', vanilla_xref_check),
+                ('empty_line_after_include', empty_line_after_include_check),
+                ('pantheon_env', pantheon_env_check),
+                ('path_xref', path_xref_check)]:
+            if check(file_contents):
+                found.add(name)
+        return found
+
+    def test_all_checks(self):
+        file_contents = """= Heading
+
+ifdef::pantheonenv[]
+include::some.adoc[]
+include::other.adoc[]
+See <<some-id>> and xref:path/to/file.adoc[file].
+
+.RELATED information
+"""
+        self.assertEqual(set(scan_checks(file_contents)), {
+            'unterminated_conditional', 'related_info', 'vanilla_xref',
+            'empty_line_after_include', 'pantheon_env', 'path_xref'})
+
+    def test_no_checks(self):
+        file_contents = """= Heading
+
+ifdef::attribute[]
+Related information without a title.
+endif::[]
+"""
+        self.assertEqual(scan_checks(file_contents), {})
+
+    def test_matches_individual_checks(self):
+        tokens = ['ifdef::', 'ifndef::', 'ifeval::', 'endif::', '[]', ']', '[', 'x',
+                  'pantheonenv', 'include::a[]', '\n', '<<', '>>', ' ', 'xref:', 'a/b',
+                  '.adoc[', '== Related information', '.related INFORMATION', 'Relatéd']
+        rnd = random.Random(0)
+
+        for _ in range(2000):
+            file_contents = ''.join(rnd.choice(tokens) for _ in range(rnd.randint(0, 25)))
+            self.assertEqual(set(scan_checks(file_contents)), self.individual_checks(file_contents),
+                             repr(file_contents))
+
+
+class TestUnterminatedConditionalOffset(unittest.TestCase):
+    def test_terminated(self):
+        file_contents = "ifdef::a[]\nifndef::b[]\nendif::[]\nendif::[]\n"
+        self.assertIsNone(unterminated_conditional_offset(file_contents))
+
+    def test_unclosed_opening(self):
+        file_contents = "ifdef::a[]\nifdef::b[]\nendif::[]\n"
+        self.assertEqual(unterminated_conditional_offset(file_contents), 0)
+
+    def test_closing_without_opening(self):
+        file_contents = "ifdef::a[]\nendif::[]\nendif::[]\n"
+        self.assertEqual(unterminated_conditional_offset(file_contents), 21)
+
+
 # run all the tests in this file
 if __name__ == '__main__':
     unittest.main()
@@ -0,0 +1,100 @@
+import unittest
+from src.enki_daemon import ValidationServer, ping, prepare_socket_directory, request, validate_remote
+from src.enki_files_validator import classify_files, validate
+from src.enki_msg import Report
+from tests.test_enki_files_validator import fixture_files
+import os
+import tempfile
+import stat
+import threading
+from unittest import mock
+
+
+class TestDaemon(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.socket_path = os.path.join(self.tmp_dir.name, 'enki.sock')
+        self.server = ValidationServer(self.socket_path, jobs=2)
+        self.thread = threading.Thread(target=self.server.serve_forever, args=(0.01,))
+        self.thread.start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.thread.join()
+        self.server.server_close()
+        self.tmp_dir.cleanup()
+
+    def test_matches_in_process_validation(self):
+        files = fixture_files()
+        local = validate(files, Report(), classify_files(files), None)
+
+        for jobs in [2, 1]:
+            remote = Report()
+            self.assertEqual(validate_remote(files, remote, None, self.socket_path, jobs), [])
+            self.assertEqual(remote.report, local.report)
+            self.assertEqual(remote.locations, local.locations)
+
+    def test_error_after_some_files(self):
+        files = fixture_files()[:2]
+        with tempfile.NamedTemporaryFile(suffix='.adoc') as undecodable:
+            undecodable.write(b'\xff\xfe')
+            undecodable.flush()
+
+            report = Report()
+            remaining = validate_remote(files + [undecodable.name], report, None, self.socket_path)
+
+        self.assertEqual(remaining, [undecodable.name])
+        self.assertEqual(report.report, validate(files, Report(), classify_files(files), None).report)
+
+    def test_results_are_cached(self):
+        files = fixture_files()
+        validate_remote(files, Report(), None, self.socket_path)
+        self.assertEqual(len(self.server.cache.entries), len(files))
+
+        validate_remote(files, Report(), None, self.socket_path)
+        self.assertEqual(len(self.server.cache.entries), len(files))
+
+    def test_buffers(self):
+        results = request(self.socket_path, {'buffers': [
+            {'path': 'modules/proc_some.adoc', 'content': ':_content-type: PROCEDURE\n$ sudo command\n'}]})
+        self.assertGreaterEqual(results[0].pop('time'), 0)
+        self.assertEqual(results, [{'file': 'modules/proc_some.adoc',
+                                    'findings': [['Mentions of sudo access', 2, 1]]}])
+
+    def test_errors(self):
+        with self.assertRaises(ValueError):
+            request(self.socket_path, {'files': ['does-not-exist.adoc']})
+        self.assertTrue(ping(self.socket_path))
+
+    def test_socket_is_private(self):
+        self.assertEqual(os.stat(self.socket_path).st_mode & 0o077, 0)
+
+    def test_socket_of_other_user(self):
+        with mock.patch('os.getuid', return_value=os.getuid() + 1):
+            self.assertEqual(validate_remote(fixture_files(), Report(), None, self.socket_path), fixture_files())
+            self.assertFalse(ping(self.socket_path))
+
+
+class TestSocketDirectory(unittest.TestCase):
+    def test_created_private(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            directory = os.path.join(tmp_dir, 'enki')
+            prepare_socket_directory(os.path.join(directory, 'enki.sock'))
+            self.assertEqual(stat.S_IMODE(os.stat(directory).st_mode), 0o700)
+
+    def test_directory_of_other_user(self):
+        with tempfile.TemporaryDirectory() as tmp_dir, mock.patch('os.getuid', return_value=os.getuid() + 1):
+            with self.assertRaises(OSError):
+                prepare_socket_directory(os.path.join(tmp_dir, 'enki.sock'))
+
+
+class TestClientFallback(unittest.TestCase):
+    def test_no_daemon(self):
+        files = fixture_files()
+        self.assertEqual(validate_remote(files, Report(), None, '/nonexistent/enki.sock'), files)
+        self.assertFalse(ping('/nonexistent/enki.sock'))
+
+
+# run all the tests in this file
+if __name__ == '__main__':
+    unittest.main()
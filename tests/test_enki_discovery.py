@@ -0,0 +1,58 @@
+import unittest
+from src.enki_discovery import discover_files, scan_tree
+from pathlib import Path
+import os
+import tempfile
+
+
+class TestDiscovery(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.root = os.path.realpath(self.tmp_dir.name)
+
+        for name in ['b/proc_b.adoc', 'a/con_a.adoc', 'master.adoc', 'a/_attributes.adoc',
+                     'README.adoc', 'notes.txt', 'c/z/ref_z.adoc']:
+            path = os.path.join(self.root, name)
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            with open(path, 'w') as file:
+                file.write('= Heading\n')
+
+        os.symlink(os.path.join(self.root, 'a'), os.path.join(self.root, 'c', 'linked-dir'))
+        os.symlink(os.path.join(self.root, 'b', 'proc_b.adoc'), os.path.join(self.root, 'c', 'linked.adoc'))
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def path(self, name):
+        return os.path.join(self.root, name)
+
+    def test_scan_tree_order(self):
+        files = [file for file, _key in scan_tree(self.root)]
+        self.assertEqual(files, [
+            self.path('master.adoc'),
+            self.path('a/con_a.adoc'),
+            self.path('b/proc_b.adoc'),
+            self.path('b/proc_b.adoc'),
+            self.path('c/z/ref_z.adoc'),
+        ])
+
+    def test_discover_files_deduplicates(self):
+        paths = [Path(self.path('c')), Path(self.root), Path(self.path('a/con_a.adoc')), Path(self.path('notes.txt'))]
+        files, unsupported_files = discover_files(paths)
+
+        self.assertEqual(files, [
+            self.path('b/proc_b.adoc'),
+            self.path('c/z/ref_z.adoc'),
+            self.path('master.adoc'),
+            self.path('a/con_a.adoc'),
+        ])
+        self.assertEqual(unsupported_files, [self.path('notes.txt')])
+
+    def test_threads_match_serial(self):
+        paths = [Path(self.path('c')), Path(self.path('b')), Path(self.root)]
+        self.assertEqual(discover_files(paths), discover_files(paths, threads=3))
+
+
+# run all the tests in this file
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,101 @@
+import unittest
+from src.enki_files_validator import FileKind, classify_files, file_kind, validate
+from src.enki_msg import Report, StreamingReport
+from src.enki_profile import Profile
+import io
+import json
+import os
+
+
+def fixture_files():
+    docs_path = os.path.join(os.path.dirname(__file__), "fixtures", "docs")
+    files = []
+    for dirpath, _dirnames, filenames in os.walk(docs_path):
+        for name in sorted(filenames):
+            files.append(os.path.realpath(os.path.join(dirpath, name)))
+    return sorted(files)
+
+
+class TestFileKind(unittest.TestCase):
+    def test_file_kind(self):
+        self.assertEqual(file_kind('path/assembly_some.adoc'), FileKind.ASSEMBLY)
+        self.assertEqual(file_kind('path/proc_some.adoc'), FileKind.MODULE)
+        self.assertEqual(file_kind('path/con-some.adoc'), FileKind.MODULE)
+        self.assertEqual(file_kind('proc_path/master.adoc'), FileKind.UNDEFINED)
+
+
+class TestValidate(unittest.TestCase):
+    def setUp(self):
+        self.files = fixture_files()
+
+    def run_validation(self, jobs, output=None):
+        return validate(self.files, Report(), classify_files(self.files), output, jobs)
+
+    def test_findings(self):
+        report = self.run_validation(1)
+        self.assertIn('Nesting in modules', report.report)
+        self.assertIn('Mentions of sudo access', report.report)
+        self.assertIn('"Related information" section', report.report)
+
+    def test_parallel_matches_serial(self):
+        serial = self.run_validation(1)
+        parallel = self.run_validation(3)
+
+        self.assertEqual(list(serial.report.items()), list(parallel.report.items()))
+        self.assertEqual(serial.locations, parallel.locations)
+        self.assertEqual(serial.count, parallel.count)
+
+    def test_locations(self):
+        report = self.run_validation(1)
+        self.assertEqual(report.locations['Mentions of sudo access'], [(10, 1)])
+        self.assertEqual(report.locations['Unterminated conditional statement'], [(15, 1)])
+        self.assertEqual(report.locations['Nesting in modules'], [(18, 1)])
+        # file name checks have no location
+        self.assertEqual(report.locations[
+            'Filename contains word such as master, slave, whitelist, blacklist. Stopwords'], [None])
+
+    def test_gitlab_skips_cli_checks(self):
+        report = self.run_validation(2, output='gitlab')
+        self.assertNotIn('Mentions of sudo access', report.report)
+
+
+class TestProfile(unittest.TestCase):
+    def run_profile(self, jobs):
+        files = fixture_files()
+        profile = Profile()
+        validate(files, Report(), classify_files(files), None, jobs, profile=profile)
+        return profile
+
+    def test_parallel_matches_serial(self):
+        serial = self.run_profile(1)
+        parallel = self.run_profile(2)
+
+        calls = {name: stage[1:] for name, stage in serial.stages.items()}
+        self.assertEqual(calls, {name: stage[1:] for name, stage in parallel.stages.items()})
+        self.assertEqual(calls['read'], [6, sum(os.path.getsize(file) for file in fixture_files())])
+        self.assertIn('strip.CODE_BLOCK_DASHES', calls)
+        self.assertIn('check.sudo_check', calls)
+        self.assertEqual(sorted(path for _seconds, path in parallel.slowest),
+                         sorted(path for _seconds, path in serial.slowest))
+
+
+class TestStreamingReport(unittest.TestCase):
+    def test_jsonl(self):
+        files = fixture_files()
+        stream = io.StringIO()
+        report = validate(files, StreamingReport('jsonl', stream), classify_files(files), 'jsonl', 2)
+        report.print_report(0)
+
+        records = [json.loads(line) for line in stream.getvalue().splitlines()]
+        serial = validate(files, Report(), classify_files(files), 'jsonl', 1)
+
+        self.assertEqual(len(records), serial.count + 1)
+        self.assertEqual(report.report, {})
+        self.assertEqual(records[-1]['summary']['findings'], serial.count)
+        for record in records[:-1]:
+            self.assertIn(record['file'], serial.report[record['category']])
+
+
+# run all the tests in this file
+if __name__ == '__main__':
+    unittest.main()
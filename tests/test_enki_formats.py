@@ -0,0 +1,94 @@
+import unittest
+from src.enki_files_validator import classify_files, validate
+from src.enki_formats import FindingWriter, JsonWriter, SarifWriter, rule_id
+from src.enki_msg import Report, StreamingReport
+from tests.test_enki_files_validator import fixture_files
+import io
+import json
+
+
+class TestRuleId(unittest.TestCase):
+    def test_rule_id(self):
+        self.assertEqual(rule_id('"Related information" section'), 'related-information-section')
+        self.assertEqual(rule_id('`pantheonenv` variable'), 'pantheonenv-variable')
+        self.assertEqual(rule_id('Vanilla xrefs'), 'vanilla-xrefs')
+
+
+class TestFindingWriter(unittest.TestCase):
+    def test_abstract(self):
+        with self.assertRaises(TypeError):
+            FindingWriter(io.StringIO())  # type: ignore[abstract]
+
+
+class TestJsonWriter(unittest.TestCase):
+    def test_findings(self):
+        stream = io.StringIO()
+        writer = JsonWriter(stream)
+        writer.add('Vanilla xrefs', 'a "b".adoc', (9, 5))
+        writer.add('Too many comments', 'a "b".adoc', None)
+        writer.close(1, 0.5)
+
+        document = json.loads(stream.getvalue())
+        self.assertEqual(document['findings'], [
+            {'rule': 'vanilla-xrefs', 'category': 'Vanilla xrefs', 'file': 'a "b".adoc', 'line': 9, 'column': 5},
+            {'rule': 'too-many-comments', 'category': 'Too many comments', 'file': 'a "b".adoc'},
+        ])
+        self.assertEqual(document['summary'], {'findings': 2, 'files': 1, 'time': 0.5})
+
+    def test_no_findings(self):
+        stream = io.StringIO()
+        JsonWriter(stream).close(0, 0.1)
+        self.assertEqual(json.loads(stream.getvalue())['findings'], [])
+
+
+class TestSarifWriter(unittest.TestCase):
+    def test_log(self):
+        stream = io.StringIO()
+        writer = SarifWriter(stream)
+        writer.add('Vanilla xrefs', 'docs/a b.adoc', (9, 5))
+        writer.add('Path-based xref', 'docs/a b.adoc', (3, 1))
+        writer.add('Vanilla xrefs', 'c.adoc', None)
+        writer.close(2, 0.5)
+
+        log = json.loads(stream.getvalue())
+        self.assertEqual(log['version'], '2.1.0')
+        run = log['runs'][0]
+        rules = run['tool']['driver']['rules']
+        self.assertEqual([rule['id'] for rule in rules], ['vanilla-xrefs', 'path-based-xref'])
+
+        results = run['results']
+        self.assertEqual([(result['ruleId'], rules[result['ruleIndex']]['id']) for result in results],
+                         [('vanilla-xrefs',) * 2, ('path-based-xref',) * 2, ('vanilla-xrefs',) * 2])
+        locations = [result['locations'][0]['physicalLocation'] for result in results]
+        self.assertEqual(locations[0], {'artifactLocation': {'uri': 'docs/a%20b.adoc'},
+                                        'region': {'startLine': 9, 'startColumn': 5}})
+        self.assertNotIn('region', locations[2])
+        self.assertEqual(results[0]['message']['text'], 'Vanilla xrefs found.')
+
+
+class TestFormatReport(unittest.TestCase):
+    def test_same_findings(self):
+        files = fixture_files()
+        expected = validate(files, Report(), classify_files(files), None, 1)
+
+        for output in ['json', 'sarif']:
+            stream = io.StringIO()
+            report = validate(files, StreamingReport(output, stream), classify_files(files), output, 2)
+            report.print_report(0)
+            document = json.loads(stream.getvalue())
+
+            if output == 'json':
+                findings = [(finding['category'], finding['file']) for finding in document['findings']]
+            else:
+                rules = document['runs'][0]['tool']['driver']['rules']
+                findings = [(rules[result['ruleIndex']]['shortDescription']['text'],
+                             result['locations'][0]['physicalLocation']['artifactLocation']['uri'])
+                            for result in document['runs'][0]['results']]
+
+            self.assertEqual(sorted(findings), sorted((category, file) for category, files in expected.report.items()
+                                                      for file in files))
+
+
+# run all the tests in this file
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,51 @@
+import unittest
+from src.enki_git import changed_files
+import os
+import subprocess
+import tempfile
+
+
+class TestChangedFiles(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.root = os.path.realpath(self.tmp_dir.name)
+        self.cwd = os.getcwd()
+
+        self.git('init', '-q')
+        self.write('snippets/snip_some.adoc', 'Some text.\n')
+        self.write('modules/con_some.adoc', 'include::../snippets/snip_some.adoc[]\n')
+        self.git('add', '.')
+        self.git('-c', 'user.name=enki', '-c', 'user.email=enki@example.com', 'commit', '-q', '-m', 'Add files')
+
+    def tearDown(self):
+        os.chdir(self.cwd)
+        self.tmp_dir.cleanup()
+
+    def git(self, *args):
+        subprocess.run(['git', *args], cwd=self.root, check=True)
+
+    def write(self, name, content):
+        path = os.path.join(self.root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as file:
+            file.write(content)
+        return path
+
+    def test_changed_and_untracked(self):
+        snippet = self.write('snippets/snip_some.adoc', 'Other text.\n')
+        untracked = self.write('modules/con_new.adoc', 'New.\n')
+        os.chdir(self.root)
+
+        self.assertEqual(changed_files('HEAD'), {snippet, untracked})
+
+    def test_from_subdirectory(self):
+        snippet = self.write('snippets/snip_some.adoc', 'Other text.\n')
+        untracked = self.write('snippets/snip_new.adoc', 'New.\n')
+        os.chdir(os.path.join(self.root, 'modules'))
+
+        self.assertEqual(changed_files('HEAD'), {snippet, untracked})
+
+
+# run all the tests in this file
+if __name__ == '__main__':
+    unittest.main()
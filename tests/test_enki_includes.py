@@ -0,0 +1,43 @@
+import unittest
+from src.enki_includes import dependents, include_targets, including_files, read_includes
+import os
+
+
+class TestIncludes(unittest.TestCase):
+    def setUp(self):
+        self.docs_path = os.path.realpath(
+            os.path.join(os.path.dirname(__file__), "fixtures", "docs"))
+
+    def fixture(self, name):
+        return os.path.join(self.docs_path, name)
+
+    def test_include_targets(self):
+        content = """= Heading
+
+include::modules/con_overview.adoc[leveloffset=+1]
+include::{attribute}/con_skipped.adoc[]
+"""
+        targets = include_targets(self.fixture('assembly_test.adoc'), content)
+        self.assertEqual(targets, [self.fixture('modules/con_overview.adoc')])
+
+    def test_dependents_are_transitive(self):
+        files = [
+            self.fixture('master.adoc'),
+            self.fixture('assembly_getting-started.adoc'),
+            self.fixture('modules/con_overview.adoc'),
+            self.fixture('modules/ref_options.adoc'),
+        ]
+        included_by = including_files(read_includes(files))
+
+        result = dependents({self.fixture('snippets/snip_note.adoc')}, included_by, set(files))
+
+        self.assertEqual(result, {
+            self.fixture('master.adoc'),
+            self.fixture('assembly_getting-started.adoc'),
+            self.fixture('modules/con_overview.adoc'),
+        })
+
+
+# run all the tests in this file
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,138 @@
+import unittest
+from src.enki_includes import read_includes
+from src.enki_index import INDEX_VERSION, MetadataIndex, indexed_includes, read_metadata
+import os
+import shutil
+import sqlite3
+import tempfile
+
+
+ASSEMBLY = """:_content-type: ASSEMBLY
+[id="assembly_getting-started_{context}"]
+= Getting started
+
+// :_content-type: PROCEDURE
+See xref:proc_installing_{context}[Installing] and <<options,the options>>.
+
+include::modules/proc_installing.adoc[leveloffset=+1]
+"""
+
+PROCEDURE = """:_content-type: PROCEDURE
+[id="proc_installing_{context}"]
+= Installing
+
+[[options]]
+Install it.
+"""
+
+
+class TestMetadataIndex(unittest.TestCase):
+    def setUp(self):
+        self.root = os.path.realpath(tempfile.mkdtemp())
+        self.cache_dir = os.path.join(self.root, 'cache')
+        self.assembly = self.write('assembly_getting-started.adoc', ASSEMBLY)
+        self.procedure = self.write('modules/proc_installing.adoc', PROCEDURE)
+        self.files = [self.assembly, self.procedure]
+
+    def tearDown(self):
+        shutil.rmtree(self.root)
+
+    def write(self, name, content):
+        path = os.path.join(self.root, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w') as file:
+            file.write(content)
+        return path
+
+    def index(self):
+        index = MetadataIndex(self.cache_dir)
+        self.addCleanup(index.close)
+        return index
+
+    def test_read_metadata(self):
+        metadata = read_metadata(self.assembly, ASSEMBLY)
+        self.assertEqual(metadata.content_type, 'ASSEMBLY')
+        self.assertEqual(metadata.includes, [self.procedure])
+        self.assertEqual(metadata.anchors, [('assembly_getting-started_{context}', 2)])
+        self.assertEqual(metadata.xrefs, [('proc_installing_{context}', 6), ('options', 6)])
+
+    def test_queries(self):
+        index = self.index()
+        self.assertEqual(index.refresh(self.files), self.files)
+
+        self.assertEqual(index.content_type(self.assembly), 'ASSEMBLY')
+        self.assertEqual(index.content_type(self.procedure), 'PROCEDURE')
+        self.assertEqual(index.includes(self.files), read_includes(self.files))
+        self.assertEqual(index.included_by(self.procedure), [self.assembly])
+        self.assertEqual(index.anchors('options'), [(self.procedure, 5)])
+        self.assertEqual(index.xrefs('options'), [(self.assembly, 6)])
+
+    def test_only_changed_files_are_parsed(self):
+        self.index().refresh(self.files)
+
+        index = self.index()
+        self.assertEqual(index.refresh(self.files), [])
+
+        # touched without changes
+        os.utime(self.procedure, ns=(0, 0))
+        self.assertEqual(index.refresh(self.files), [])
+
+        self.write('modules/proc_installing.adoc', PROCEDURE.replace('PROCEDURE', 'REFERENCE'))
+        os.utime(self.procedure, ns=(1, 1))
+        self.assertEqual(index.refresh(self.files), [self.procedure])
+        self.assertEqual(index.content_type(self.procedure), 'REFERENCE')
+        self.assertEqual(index.anchors('options'), [(self.procedure, 5)])
+
+    def test_removed_file(self):
+        index = self.index()
+        index.refresh(self.files)
+        os.remove(self.procedure)
+
+        index.refresh(self.files)
+        self.assertIsNone(index.content_type(self.procedure))
+        self.assertEqual(index.anchors('options'), [])
+
+    def test_files_not_refreshed(self):
+        other_root = os.path.realpath(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, other_root)
+        other = os.path.join(other_root, 'assembly_other.adoc')
+        with open(other, 'w') as file:
+            file.write(ASSEMBLY)
+
+        index = self.index()
+        index.refresh([other])
+        index.refresh(self.files)
+
+        renamed = os.path.join(self.root, 'modules/proc_installed.adoc')
+        os.rename(self.procedure, renamed)
+        index.refresh([self.assembly, renamed])
+        self.assertIsNone(index.content_type(self.procedure))
+        self.assertEqual(index.anchors('options'), [(renamed, 5)])
+        # in another directory
+        self.assertEqual(index.content_type(other), 'ASSEMBLY')
+
+    def test_subset_refresh_keeps_other_files(self):
+        index = self.index()
+        index.refresh(self.files)
+
+        self.assertEqual(index.refresh([self.assembly]), [])
+        self.assertEqual(index.content_type(self.procedure), 'PROCEDURE')
+        self.assertEqual(index.refresh(self.files), [])
+
+    def test_other_version_is_rebuilt(self):
+        self.index().refresh(self.files)
+        with sqlite3.connect(os.path.join(self.cache_dir, 'index.sqlite3')) as connection:
+            connection.execute(f'PRAGMA user_version = {INDEX_VERSION + 1}')
+
+        self.assertEqual(self.index().refresh(self.files), self.files)
+
+    def test_indexed_includes_without_index(self):
+        # the cache directory is a file, so the index cannot be created
+        cache_file = self.write('cache-file', '')
+        self.assertEqual(indexed_includes(self.files, cache_file), read_includes(self.files))
+        self.assertEqual(indexed_includes(self.files, self.cache_dir), read_includes(self.files))
+
+
+# run all the tests in this file
+if __name__ == '__main__':
+    unittest.main()
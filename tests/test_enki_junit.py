@@ -0,0 +1,53 @@
+import unittest
+from src.enki_files_validator import classify_files, validate
+from src.enki_junit import JUnitWriter
+from src.enki_msg import StreamingReport
+from tests.test_enki_files_validator import fixture_files
+import io
+import xml.etree.ElementTree as ElementTree
+
+
+class TestJUnitWriter(unittest.TestCase):
+    def test_cases(self):
+        stream = io.StringIO()
+        writer = JUnitWriter(stream)
+        writer.add_failure('"Related information" found in a&b.adoc', '"Related information" found.',
+                           'a&b.adoc', 18, 0.25)
+        writer.add_failure('Too many comments found in c.adoc', 'Too many comments found.', 'c.adoc', None, 0.5)
+        writer.close(1.5)
+
+        suites = ElementTree.fromstring(stream.getvalue())
+        suite = suites.find('testsuite')
+        self.assertEqual((suites.get('tests'), suite.get('failures'), suite.get('time')), ('2', '2', '1.5'))
+
+        cases = suite.findall('testcase')
+        self.assertEqual([case.get('file') for case in cases], ['a&b.adoc', 'c.adoc'])
+        self.assertEqual([case.get('line') for case in cases], ['18', None])
+        self.assertEqual([case.get('time') for case in cases], ['0.250000', '0.500000'])
+        self.assertEqual(cases[0].find('failure').get('message'), '"Related information" found.')
+
+    def test_no_cases(self):
+        stream = io.StringIO()
+        JUnitWriter(stream).close(0.1)
+        self.assertEqual(ElementTree.fromstring(stream.getvalue()).get('tests'), '0')
+
+
+class TestGitlabReport(unittest.TestCase):
+    def test_file_times(self):
+        files = fixture_files()
+        stream = io.StringIO()
+        report = validate(files, StreamingReport('gitlab', stream), classify_files(files), 'gitlab', 2)
+        report.print_report(0)
+
+        cases = ElementTree.fromstring(stream.getvalue()).find('testsuite').findall('testcase')
+        self.assertEqual(len(cases), report.count)
+        # the cases of a file share the time spent on the file
+        times = {}
+        for case in cases:
+            self.assertEqual(times.setdefault(case.get('file'), case.get('time')), case.get('time'))
+        self.assertGreater(len(set(times.values())), 1)
+
+
+# run all the tests in this file
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,120 @@
+import unittest
+from src.enki_link_extractor import LinkExtractor, extract_links
+import json
+import os
+import subprocess
+import tempfile
+
+
+LINKS_PATH = os.path.realpath(os.path.join(os.path.dirname(__file__), "fixtures", "links"))
+
+LCHECK_PATH = os.path.join(os.path.dirname(__file__), "..", "src", "lcheck.rb")
+
+
+def asciidoctor_available():
+    try:
+        return subprocess.run(['ruby', '-e', 'require "asciidoctor"'], capture_output=True).returncode == 0
+    except OSError:
+        return False
+
+
+class TestExtractLinks(unittest.TestCase):
+    def test_fixture_book(self):
+        links, files_checked = extract_links([os.path.join(LINKS_PATH, 'master.adoc')])
+
+        assembly = os.path.join(LINKS_PATH, 'assembly_links.adoc')
+        module = os.path.join(LINKS_PATH, 'modules', 'con_sources.adoc')
+        self.assertEqual(links, {
+            'https://www.product.test/start': {assembly: (6, 5)},
+            'https://docs.product.test/2.1/release-notes': {assembly: (8, 28)},
+            'https://git.product.test/sources': {module: (5, 20)},
+            'https://mirror.product.test/sources': {module: (6, 16)},
+            'https://downstream.product.test': {module: (18, 5)},
+            'https://issues.product.test': {os.path.join(LINKS_PATH, 'snippets', 'snip_issues.adoc'): (3, 25)},
+        })
+        self.assertEqual(files_checked, 4)
+
+    @unittest.skipUnless(asciidoctor_available(), 'the asciidoctor gem is not installed')
+    def test_matches_asciidoctor(self):
+        master_adoc = os.path.join(LINKS_PATH, 'master.adoc')
+        result = subprocess.run(['ruby', LCHECK_PATH, master_adoc], capture_output=True, text=True, check=True)
+
+        links, _files_checked = extract_links([master_adoc])
+        self.assertEqual(set(links), set(json.loads(result.stdout)['links']))
+
+
+class TestLinkExtractor(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def links(self, content, **files):
+        for name, text in dict(files, **{'master.adoc': content}).items():
+            with open(os.path.join(self.tmp_dir.name, name), 'w') as file:
+                file.write(text)
+
+        extractor = LinkExtractor()
+        extractor.extract(os.path.join(self.tmp_dir.name, 'master.adoc'))
+        return {link: list(files.values())[0] for link, files in extractor.links.items()}
+
+    def test_link_forms(self):
+        links = self.links('link:https://one.test[One] and https://two.test[Two], <https://three.test>, '
+                           '*https://four.test*, link:relative/page.html[], `\\https://escaped.test`\n')
+        self.assertEqual(list(links), ['https://one.test', 'https://two.test', 'https://three.test',
+                                       'https://four.test', 'relative/page.html'])
+
+    def test_attributes(self):
+        links = self.links(':url: https://docs.test\n:path: {url}/guide\n'
+                           'See {path}/index.html and {undefined}/page.\n'
+                           ':url!:\nNot {url}.\n')
+        self.assertEqual(links, {'https://docs.test/guide/index.html': (3, 5)})
+
+    def test_conditionals(self):
+        links = self.links(':one:\n:two:\n'
+                           'ifdef::one+two[]\nhttps://all.test\nendif::[]\n'
+                           'ifdef::one,missing[]\nhttps://any.test\nendif::[]\n'
+                           'ifdef::missing[]\nifndef::missing[]\nhttps://nested.test\nendif::[]\nendif::[]\n'
+                           'ifndef::one[https://single-skipped.test]\n'
+                           'ifdef::one[https://single.test]\n')
+        self.assertEqual(list(links), ['https://all.test', 'https://any.test', 'https://single.test'])
+
+    def test_include_with_attribute_and_cycle(self):
+        links = self.links(':dir: .\ninclude::{dir}/included.adoc[]\n',
+                           **{'included.adoc': 'https://included.test\ninclude::included.adoc[]\n'})
+        self.assertEqual(links, {'https://included.test': (1, 1)})
+
+    def test_shared_files_are_read_once(self):
+        os.makedirs(os.path.join(self.tmp_dir.name, 'book1'))
+        os.makedirs(os.path.join(self.tmp_dir.name, 'book2'))
+        module = os.path.join(self.tmp_dir.name, 'con_shared.adoc')
+        with open(module, 'w') as file:
+            file.write('ifdef::book1[]\nhttps://book1.test\nendif::[]\nhttps://{host}.test\n')
+        for book in ['book1', 'book2']:
+            with open(os.path.join(self.tmp_dir.name, book, 'master.adoc'), 'w') as file:
+                file.write(f':{book}:\n:host: {book}-host\nhttps://shared.test\ninclude::../con_shared.adoc[]\n')
+
+        extractor = LinkExtractor()
+        extractor.extract(os.path.join(self.tmp_dir.name, 'book1', 'master.adoc'))
+        os.remove(module)
+        extractor.extract(os.path.join(self.tmp_dir.name, 'book2', 'master.adoc'))
+
+        # the conditionals and attributes of each book apply to the parsed module
+        self.assertEqual(sorted(extractor.links), ['https://book1-host.test', 'https://book1.test',
+                                                   'https://book2-host.test', 'https://shared.test'])
+        self.assertEqual(len(extractor.links['https://shared.test']), 2)
+        self.assertEqual(len(extractor.files), 3)
+
+    def test_blocks(self):
+        links = self.links('----\nhttps://listing.test\n----\n'
+                           '....\nhttps://literal.test\n....\n'
+                           '////\nhttps://comment.test\n////\n'
+                           '// https://line-comment.test\n'
+                           'https://text.test\n')
+        self.assertEqual(list(links), ['https://text.test'])
+
+
+# run all the tests in this file
+if __name__ == '__main__':
+    unittest.main()
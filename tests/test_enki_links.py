@@ -0,0 +1,147 @@
+import unittest
+import asyncio
+import tempfile
+import time
+from src.enki_cache import LinkCache
+from src.enki_http import HostScheduler, TokenBucket
+from src.enki_links import check_links, links_report, should_check
+from tests.link_server import STREAM_CHUNKS, LinkServer
+
+
+class TestShouldCheck(unittest.TestCase):
+    def test_skipped_links(self):
+        for link in ['', '#anchor', '/local/path', 'mailto:someone', 'ftp://host/file',
+                     'https://www.example.com', 'https://tools.ietf.org/html/rfc1', 'ftp.gnome.org']:
+            self.assertFalse(should_check(link), link)
+        self.assertTrue(should_check('https://docs.redhat.com'))
+
+
+class TestCheckLinks(unittest.TestCase):
+    def test_errors(self):
+        with LinkServer() as server:
+            errors = check_links([server.url('/ok'), server.url('/missing'), server.url('/forbidden'),
+                                  server.url('/redirect'), 'http://[invalid', 'xref:http://some.com'])
+
+        self.assertEqual(list(errors.values()), [None, '404', '403', None, 'Invalid URL', 'Bad URI'])
+
+    def test_timeout(self):
+        with LinkServer() as server:
+            errors = check_links([server.url('/slow')], timeout=0.2)
+        self.assertEqual(list(errors.values()), ['TimeoutError'])
+
+    def test_queued_links_do_not_time_out(self):
+        with LinkServer() as server:
+            port = server.server_address[1]
+            links = [f'http://{host}:{port}/slow?page={i}' for host in ['127.0.0.1', 'localhost'] for i in range(2)]
+            # one connection at a time: the last link waits 3 s for its turn
+            errors = check_links(links, concurrency=1, timeout=1.5)
+        self.assertEqual(list(errors.values()), [None] * 4)
+
+    def test_connections_are_pooled(self):
+        with LinkServer() as server:
+            errors = check_links([server.url(f'/ok?page={i}') for i in range(40)], concurrency=3)
+
+            self.assertEqual(set(errors.values()), {None})
+            self.assertEqual(len(server.requests), 40)
+            self.assertLessEqual(server.connections, 3)
+
+    def test_head_first(self):
+        with LinkServer() as server:
+            errors = check_links([server.url('/ok'), server.url('/nohead'), server.url('/missing')])
+
+            self.assertEqual(list(errors.values()), [None, None, '404'])
+            self.assertEqual(sorted(server.requests), [
+                ('GET', '/missing'), ('GET', '/nohead'), ('HEAD', '/missing'), ('HEAD', '/nohead'), ('HEAD', '/ok')])
+
+    def test_body_of_unknown_length_is_not_downloaded(self):
+        with LinkServer() as server:
+            errors = check_links([server.url('/stream')])
+            time.sleep(0.2)
+
+            self.assertEqual(list(errors.values()), [None])
+            self.assertLess(server.chunks_sent, STREAM_CHUNKS)
+
+    def test_per_host_concurrency(self):
+        with LinkServer() as server:
+            errors = check_links([server.url(f'/busy?page={i}') for i in range(12)], per_host=2, rate=0)
+
+            self.assertEqual(set(errors.values()), {None})
+            self.assertEqual(server.max_in_flight, 2)
+            self.assertLessEqual(server.connections, 2)
+
+    def test_rate(self):
+        with LinkServer() as server:
+            start = time.perf_counter()
+            check_links([server.url(f'/ok?page={i}') for i in range(6)], per_host=1, rate=20)
+            # the first request uses the initial token, the next five wait 1/20 s each
+            self.assertGreaterEqual(time.perf_counter() - start, 0.24)
+
+    def test_rate_counts_every_request(self):
+        with LinkServer() as server:
+            start = time.perf_counter()
+            check_links([server.url(f'/nohead?page={i}') for i in range(3)], per_host=1, rate=20)
+            # a HEAD and a GET for each link: six requests, five of them wait 1/20 s
+            self.assertEqual(len(server.requests), 6)
+            self.assertGreaterEqual(time.perf_counter() - start, 0.24)
+
+    def test_cache(self):
+        with tempfile.TemporaryDirectory() as cache_dir, LinkServer() as server:
+            links = [server.url('/ok'), server.url('/missing'), server.url('/redirect')]
+            first = check_links(links, cache=LinkCache(cache_dir))
+            requests = len(server.requests)
+
+            cache = LinkCache(cache_dir)
+            self.assertEqual(check_links(links, cache=cache), first)
+            self.assertEqual(len(server.requests), requests)
+            self.assertEqual(cache.get(server.url('/redirect'), time.time())['redirect'], server.url('/ok'))
+            self.assertEqual(cache.get(server.url('/missing'), time.time())['status'], 404)
+
+            self.assertEqual(check_links(links, cache=LinkCache(cache_dir), refresh=True), first)
+            self.assertGreater(len(server.requests), requests)
+
+    def test_report(self):
+        links = {'https://some.com/missing': {'book/master.adoc': (3, 1), 'book/modules/con_some.adoc': (10, 7)},
+                 'https://some.com/ok': {'book/master.adoc': (4, 1)}}
+        report = links_report(links, {'https://some.com/missing': '404', 'https://some.com/ok': None})
+
+        self.assertEqual(report.report, {
+            'Broken link https://some.com/missing (404)': ['book/master.adoc', 'book/modules/con_some.adoc']})
+        self.assertEqual(report.locations, {'Broken link https://some.com/missing (404)': [(3, 1), (10, 7)]})
+
+
+class TestTokenBucket(unittest.TestCase):
+    def test_burst(self):
+        async def acquire(bucket, count):
+            for _ in range(count):
+                await bucket.acquire()
+
+        bucket = TokenBucket(rate=1000, capacity=3)
+        start = time.perf_counter()
+        asyncio.run(acquire(bucket, 3))
+        self.assertLess(time.perf_counter() - start, 0.05)
+        self.assertLess(bucket.tokens, 1)
+
+
+class TestHostScheduler(unittest.TestCase):
+    def test_waiting_for_a_token_does_not_hold_a_connection(self):
+        async def request(scheduler, host):
+            async with scheduler.slot(host):
+                return time.perf_counter()
+
+        async def requests():
+            scheduler = HostScheduler(per_host=1, rate=1, concurrency=1)
+            await request(scheduler, 'throttled')
+            # waits a second for a token of its host
+            throttled = asyncio.create_task(request(scheduler, 'throttled'))
+            await asyncio.sleep(0.01)
+            return await request(scheduler, 'idle'), await throttled
+
+        start = time.perf_counter()
+        idle, throttled = asyncio.run(requests())
+        self.assertLess(idle - start, 0.5)
+        self.assertGreaterEqual(throttled - start, 0.9)
+
+
+# run all the tests in this file
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+import unittest
+from src.enki_msg import Report
+
+
+def sample_report() -> Report:
+    report = Report()
+    report.create_report('Vanilla xrefs', 'b.adoc', (9, 5))
+    report.create_report('Path-based xref', 'a.adoc', (3, 1))
+    report.create_report('Vanilla xrefs', 'a.adoc', (7, 2))
+    report.create_report('Too many comments', 'b.adoc')
+    return report
+
+
+class TestReport(unittest.TestCase):
+    def test_views(self):
+        report = sample_report()
+        self.assertEqual(report.count, 4)
+        self.assertEqual(report.report, {
+            'Vanilla xrefs': ['b.adoc', 'a.adoc'],
+            'Path-based xref': ['a.adoc'],
+            'Too many comments': ['b.adoc'],
+        })
+        self.assertEqual(report.locations, {
+            'Vanilla xrefs': [(9, 5), (7, 2)],
+            'Path-based xref': [(3, 1)],
+            'Too many comments': [None],
+        })
+
+    def test_strings_stored_once(self):
+        report = sample_report()
+        self.assertEqual(report.categories, ['Vanilla xrefs', 'Path-based xref', 'Too many comments'])
+        self.assertEqual(report.files, ['b.adoc', 'a.adoc'])
+
+    def test_grouping(self):
+        report = sample_report()
+        self.assertEqual(report.by_file(), {
+            'b.adoc': [('Vanilla xrefs', (9, 5)), ('Too many comments', None)],
+            'a.adoc': [('Path-based xref', (3, 1)), ('Vanilla xrefs', (7, 2))],
+        })
+        self.assertEqual(list(report.sorted()), [
+            ('Path-based xref', 'a.adoc', (3, 1)),
+            ('Vanilla xrefs', 'a.adoc', (7, 2)),
+            ('Too many comments', 'b.adoc', None),
+            ('Vanilla xrefs', 'b.adoc', (9, 5)),
+        ])
+
+    def test_deduplicate(self):
+        report = sample_report()
+        report.merge(sample_report())
+        self.assertEqual(report.count, 8)
+        self.assertEqual(report.files, ['b.adoc', 'a.adoc'])
+
+        report.deduplicate()
+        self.assertEqual(report.count, 4)
+        self.assertEqual(list(report), list(sample_report()))
+
+    def test_findings_round_trip(self):
+        findings = [['Vanilla xrefs', 9, 5], ['Too many comments', None, None]]
+        report = Report()
+        report.add_findings(findings, 'b.adoc')
+        self.assertEqual(report.findings(), findings)
+
+
+# run all the tests in this file
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,70 @@
+import unittest
+from src.enki_files_validator import classify_files, validate
+from src.enki_msg import Report
+from src.enki_shard import MergeError, merged_results, shard_files, shard_validate
+from tests.test_enki_files_validator import fixture_files
+import io
+import json
+import os
+import tempfile
+
+
+class TestShardFiles(unittest.TestCase):
+    def test_partition_is_balanced_by_size(self):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            files = []
+            for i, size in enumerate([100, 60, 50, 40, 30, 20, 10, 10]):
+                path = os.path.join(tmp_dir, f'file{i}.adoc')
+                with open(path, 'w') as file:
+                    file.write('x' * size)
+                files.append(path)
+
+            shards = [shard_files(files, shard, 3) for shard in range(1, 4)]
+
+            self.assertEqual(sorted(sum(shards, [])), sorted(files))
+            # each shard keeps the order of the files
+            for shard in shards:
+                self.assertEqual(shard, [path for path in files if path in shard])
+            loads = [sum(os.path.getsize(path) for path in shard) for shard in shards]
+            self.assertLessEqual(max(loads) - min(loads), 30)
+            self.assertEqual(shards, [shard_files(files, shard, 3) for shard in range(1, 4)])
+
+
+class TestMerge(unittest.TestCase):
+    def setUp(self):
+        self.files = fixture_files()
+
+    def partials(self, shards, output=None):
+        partials = []
+        for shard in range(1, shards + 1):
+            stream = io.StringIO()
+            shard_validate(self.files, shard, shards, output, stream=stream)
+            partials.append(json.loads(stream.getvalue()))
+        return partials
+
+    def test_merge_matches_single_run(self):
+        for output in [None, 'gitlab']:
+            single = validate(self.files, Report(), classify_files(self.files), output)
+
+            merged = Report()
+            for _index, file_path, findings, _seconds in merged_results(self.partials(3, output)):
+                merged.add_findings(findings, file_path)
+
+            self.assertEqual(list(merged.report.items()), list(single.report.items()))
+            self.assertEqual(merged.locations, single.locations)
+
+    def test_missing_shard(self):
+        partials = self.partials(3)
+        with self.assertRaises(MergeError):
+            merged_results(partials[:2])
+
+    def test_different_runs(self):
+        partials = self.partials(2)
+        partials[1]['output'] = 'gitlab'
+        with self.assertRaises(MergeError):
+            merged_results(partials)
+
+
+# run all the tests in this file
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,39 @@
+import unittest
+import json
+import os
+import subprocess
+import sys
+
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+
+# Modules that a validation run does not need and that are slow to import
+DEFERRED_MODULES = ['aiohttp', 'asyncio', 'concurrent.futures.process', 'enki_http', 'enki_junit', 'enki_formats',
+                    'enki_daemon', 'enki_shard', 'enki_watch', 'enki_git', 'socket', 'socketserver', 'subprocess']
+
+
+def imported_after(code: str) -> dict:
+    """Run code in a new interpreter and return the JSON that it prints."""
+    result = subprocess.run([sys.executable, '-c', code], cwd=SRC_DIR, capture_output=True, text=True, check=True)
+    return json.loads(result.stdout)
+
+
+class TestStartup(unittest.TestCase):
+    def test_deferred_imports(self):
+        loaded = imported_after(
+            'import json, sys, enki\n'
+            f'print(json.dumps([module for module in {DEFERRED_MODULES!r} if module in sys.modules]))')
+        self.assertEqual(loaded, [])
+
+    def test_lazy_regexes(self):
+        compiled = imported_after(
+            'import json, re, enki\n'
+            'from enki_regex import Regexes\n'
+            'print(json.dumps(sorted(name for name, value in vars(Regexes).items() if isinstance(value, re.Pattern))))')
+        # only the patterns of the search checks are compiled when enki_checks is imported
+        self.assertEqual(compiled, ['EMPTY_LINE_AFTER_INCLUDE', 'PATH_XREF', 'PV_ENV', 'VANILLA_XREF'])
+
+
+# run all the tests in this file
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+import unittest
+from src.enki_regex import Regexes
+from src.enki_strip import LineIndex, Locator, OffsetMap, strip, strip_blocks, strip_comments
+import os
+import random
+import re
+
+
+# the regexes the linear-time finders replace
+MULTI_LINE_COMMENT_REGEX = re.compile(Regexes.MULTI_LINE_COMMENT.pattern)
+INTERNAL_IFDEF_REGEX = re.compile(Regexes.INTERNAL_IFDEF.pattern)
+
+
+def regex_strip(original):
+    """Strip the file with the regular expressions, as validation used to."""
+    stripped = MULTI_LINE_COMMENT_REGEX.sub('', original)
+    stripped = Regexes.SINGLE_LINE_COMMENT.sub('', stripped)
+    without_comments = stripped
+
+    stripped = Regexes.CODE_BLOCK_DASHES.sub('', stripped)
+    stripped = Regexes.CODE_BLOCK_DOTS.sub('', stripped)
+    stripped = Regexes.CODE_BLOCK_TWO_DASHES.sub('', stripped)
+    stripped = INTERNAL_IFDEF_REGEX.sub('', stripped)
+    stripped = Regexes.SINGLE_LINE_CONDITIONAL.sub('', stripped)
+
+    return without_comments, stripped
+
+
+class TestStrip(unittest.TestCase):
+    def test_comments(self):
+        file_contents = """= Heading
+////
+multi-line comment
+////
+// single-line comment
+//// not a comment
+text
+"""
+        without_comments, _stripped = strip(file_contents)
+        self.assertEqual(without_comments, "= Heading\n\n//// not a comment\ntext\n")
+
+    def test_blocks_and_conditionals(self):
+        file_contents = """= Heading
+----
+$ sudo command
+----
+ifdef::internal[]
+internal text
+endif::[]
+ifdef::attribute[single-line text]
+text
+"""
+        without_comments, stripped = strip(file_contents)
+        self.assertEqual(without_comments, file_contents)
+        self.assertEqual(stripped, "= Heading\n\n\n\ntext\n")
+
+    def test_unterminated_comment(self):
+        file_contents = "= Heading\n////\ntext\n" * 100
+        self.assertEqual(strip(file_contents), regex_strip(file_contents))
+
+    def test_fixtures_match_regexes(self):
+        fixtures_path = os.path.join(os.path.dirname(__file__), "fixtures")
+        for dirpath, _dirnames, filenames in os.walk(fixtures_path):
+            for name in filenames:
+                with open(os.path.join(dirpath, name), 'r') as file:
+                    original = file.read()
+                self.assertEqual(strip(original), regex_strip(original), name)
+
+    def test_random_input_matches_regexes(self):
+        tokens = ['////', '////////', '//', '/', '\n', '\n', '\n//', '----', '--\n', '--', '-',
+                  '....', '.', 'ifdef::internal[]', 'endif::[]', 'ifdef::x[y]', 'ifndef::a[]',
+                  'ifdef::a[b] c]', 'x', 'a b', ']', '[', 'Ï']
+        rnd = random.Random(0)
+
+        for _ in range(5000):
+            original = ''.join(rnd.choice(tokens) for _ in range(rnd.randint(0, 40)))
+            self.assertEqual(strip(original), regex_strip(original), repr(original))
+
+
+class TestLocator(unittest.TestCase):
+    def test_line_column(self):
+        line_index = LineIndex("= Heading\n\ntext\n")
+        self.assertEqual(line_index.line_column(0), (1, 1))
+        self.assertEqual(line_index.line_column(11), (3, 1))
+        self.assertEqual(line_index.line_column(13), (3, 3))
+
+    def test_location_after_stripping(self):
+        original = "= Heading\n// comment\n----\nsudo\n----\ntext sudo\n"
+        offsets = OffsetMap()
+        stripped = strip_blocks(strip_comments(original, offsets), offsets)
+        locate = Locator(LineIndex(original), offsets)
+        self.assertEqual(locate(stripped.index('sudo')), (6, 6))
+
+    def test_random_input_maps_to_original(self):
+        tokens = ['////', '//', '\n', '\n//', '----', '--\n', '....', 'ifdef::internal[]',
+                  'endif::[]', 'ifdef::x[y]', 'x', 'a b', ']', '[', 'Ï']
+        rnd = random.Random(0)
+
+        for _ in range(2000):
+            original = ''.join(rnd.choice(tokens) for _ in range(rnd.randint(0, 40)))
+            offsets = OffsetMap()
+            stripped = strip_blocks(strip_comments(original, offsets), offsets)
+
+            mapped = [offsets.original_offset(offset) for offset in range(len(stripped))]
+            self.assertEqual(''.join(original[offset] for offset in mapped), stripped, repr(original))
+            self.assertEqual(mapped, sorted(set(mapped)), repr(original))
+
+
+# run all the tests in this file
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,123 @@
+import unittest
+from src.enki_cache import ResultCache
+from src.enki_watch import Watcher
+from pathlib import Path
+import os
+import tempfile
+from unittest import mock
+
+
+MODULE = ':_content-type: PROCEDURE\n= Module\n\nText.\n'
+
+
+class TestWatcher(unittest.TestCase):
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.root = os.path.realpath(self.tmp_dir.name)
+        os.mkdir(os.path.join(self.root, 'modules'))
+        self.write('modules/proc_one.adoc', MODULE)
+        self.write('assembly_book.adoc', ':_content-type: ASSEMBLY\n= Book\n\ninclude::modules/proc_one.adoc[]\n')
+        self.write('assembly_other.adoc', ':_content-type: ASSEMBLY\n= Other\n')
+
+        self.watcher = Watcher([Path(self.root)])
+        self.start = self.watcher.start()
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def write(self, name, content):
+        path = os.path.join(self.root, name)
+        with open(path, 'w') as file:
+            file.write(content)
+        # make the change visible on file systems with a coarse mtime
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        return path
+
+    def test_start(self):
+        self.assertEqual(len(self.start.revalidated), 3)
+        self.assertEqual(self.start.appeared, [])
+
+    def test_no_change(self):
+        change = self.watcher.scan()
+        self.assertEqual((change.revalidated, change.appeared, change.resolved), ([], [], []))
+
+    def test_changed_file_and_includers(self):
+        path = self.write('modules/proc_one.adoc', MODULE + '$ sudo command\n')
+        change = self.watcher.scan()
+
+        self.assertEqual(sorted(change.revalidated),
+                         [os.path.join(self.root, 'assembly_book.adoc'), path])
+        self.assertEqual(change.appeared, [(path, 'Mentions of sudo access', (5, 1))])
+
+        self.write('modules/proc_one.adoc', MODULE)
+        change = self.watcher.scan()
+        self.assertEqual(change.resolved, [(path, 'Mentions of sudo access')])
+
+    def test_cache_is_pruned(self):
+        with tempfile.TemporaryDirectory() as cache_dir:
+            cache = ResultCache(cache_dir)
+            watcher = Watcher([Path(self.root)], cache=cache)
+            watcher.start()
+
+            with mock.patch.object(cache, 'prune') as prune:
+                self.write('modules/proc_one.adoc', MODULE + '$ sudo command\n')
+                watcher.scan()
+                prune.assert_called_once()
+
+                # nothing revalidated
+                watcher.scan()
+                prune.assert_called_once()
+
+    def test_added_and_removed_files(self):
+        path = self.write('modules/proc_new.adoc', MODULE + 'Add it to the whitelist.\n')
+        change = self.watcher.scan()
+        self.assertEqual(change.revalidated, [path])
+        self.assertEqual(change.appeared,
+                         [(path, 'Words such as master, slave, whitelist, blacklist', (5, 15))])
+
+        os.remove(path)
+        change = self.watcher.scan()
+        self.assertEqual(change.revalidated, [])
+        self.assertEqual(change.resolved, [(path, 'Words such as master, slave, whitelist, blacklist')])
+
+    def test_file_removed_before_validation(self):
+        path = self.write('modules/proc_one.adoc', MODULE + '$ sudo command\n')
+        self.watcher.scan()
+        self.write('modules/proc_one.adoc', MODULE + '$ sudo command\nAdd it to the whitelist.\n')
+        revalidate = self.watcher.revalidate
+
+        def remove_and_revalidate(files, change):
+            # removed after the scan saw the change
+            os.remove(path)
+            revalidate(files, change)
+
+        with mock.patch.object(self.watcher, 'revalidate', remove_and_revalidate):
+            change = self.watcher.scan()
+
+        self.assertEqual(change.revalidated, [os.path.join(self.root, 'assembly_book.adoc')])
+        self.assertEqual(change.resolved, [(path, 'Mentions of sudo access')])
+        self.assertNotIn(path, self.watcher.stamps)
+        self.assertEqual(self.watcher.scan().revalidated, [])
+
+    def test_undecodable_file(self):
+        path = os.path.join(self.root, 'modules/proc_one.adoc')
+        with open(path, 'wb') as file:
+            file.write(b'\xff\xfe text')
+        stat = os.stat(path)
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 2 * 10 ** 9))
+
+        with self.assertLogs(level='WARNING'):
+            change = self.watcher.scan()
+        self.assertEqual(change.revalidated, [os.path.join(self.root, 'assembly_book.adoc')])
+
+    def test_added_directory(self):
+        os.mkdir(os.path.join(self.root, 'snippets'))
+        path = self.write('snippets/snip_note.adoc', ':_content-type: SNIPPET\n$ sudo command\n')
+        change = self.watcher.scan()
+        self.assertEqual(change.appeared, [(path, 'Mentions of sudo access', (2, 1))])
+
+
+# run all the tests in this file
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+from src.enki_checks import scan_checks
+from src.enki_regex import LinearPattern, Regexes
+from src.enki_strip import strip
+import re
+import time
+
+
+# Lines that start constructs but never close them
+PATHOLOGICAL_LINES = [
+    'text //// text\n',
+    'ifdef::internal[] text\n',
+    '---- text Ï\n',
+    '.... text\n',
+    'ifdef::attribute[text\n',
+    'endif::attribute\n',
+    '<<some text>\n',
+    'xref:some/path/file[text]\n',
+    'include::file.adoc\n',
+    '<title>text\n',
+    '// comment\n',
+]
+
+
+def pathological_file(lines: int) -> str:
+    """Build a file of unterminated constructs."""
+    size = len(PATHOLOGICAL_LINES)
+    return ''.join(PATHOLOGICAL_LINES[i % size] for i in range(lines))
+
+
+def best_time(function, argument, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function(argument)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+class TestLinearScaling(unittest.TestCase):
+    # 8 times the input takes about 8 times as long in linear time and
+    # 64 times as long in quadratic time
+    SMALL = 2000
+    LARGE = 16000
+    MAX_RATIO = 24
+    # timer noise on very fast runs
+    MIN_TIME = 0.0005
+
+    def assertLinear(self, function, make_input, name):
+        small = best_time(function, make_input(self.SMALL))
+        large = best_time(function, make_input(self.LARGE))
+        ratio = large / max(small, self.MIN_TIME)
+        self.assertLess(ratio, self.MAX_RATIO, f'{name} scales superlinearly: {ratio:.1f}x')
+
+    def test_unterminated_multi_line_comment(self):
+        self.assertLinear(Regexes.MULTI_LINE_COMMENT.search,
+                          lambda lines: 'text //// text\n' * lines, 'MULTI_LINE_COMMENT')
+
+    def test_unterminated_internal_conditional(self):
+        self.assertLinear(Regexes.INTERNAL_IFDEF.search,
+                          lambda lines: 'ifdef::internal[] text\n' * lines, 'INTERNAL_IFDEF')
+
+    def test_strip(self):
+        self.assertLinear(strip, pathological_file, 'strip')
+
+    def test_checks(self):
+        self.assertLinear(scan_checks, pathological_file, 'scan_checks')
+
+    def test_patterns(self):
+        for name in list(vars(Regexes)):
+            # getattr compiles the patterns that are not compiled yet
+            pattern = getattr(Regexes, name)
+            if isinstance(pattern, (re.Pattern, LinearPattern)):
+                with self.subTest(pattern=name):
+                    self.assertLinear(lambda text: pattern.sub('', text), pathological_file, name)
+
+
+# run all the tests in this file
+if __name__ == '__main__':
+    unittest.main()